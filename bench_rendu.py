@@ -0,0 +1,211 @@
+"""
+Benchmark du rendu (sans fenêtre)
+---------------------------------
+Mesure SceneJeu.dessiner et chaque calque visible dans des états représentatifs,
+avec le pilote vidéo « dummy » de SDL :
+  - plateau_vide     : début de partie
+  - plateau_complet  : les 5x9 cases découvertes
+  - tirage           : overlay de choix des pièces ouvert
+  - boutique         : overlay boutique ouvert
+  - conso            : menu de consommation (touche M) ouvert
+  - defaite          : écran de défaite
+  - manoir_100x200   : grand manoir entièrement découvert (caméra zoomée)
+
+« image » = image complète (tous les calques invalidés), « stable » = image sans
+changement (coût des signatures seules), puis un temps par calque.
+Médiane et p99 en millisecondes ; le JSON (clés triées, arrondi à 1 µs) sert de
+référence : une régression se voit en diff, ou avec --comparer.
+
+Usage : python bench_rendu.py [-n 200] [--sortie bench_rendu.json] [--comparer bench_rendu.json]
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Callable, Dict, List
+
+import pygame
+
+from moteur import GameState, PIECES_MODELES, BIT_DIR, DECOUVERTE
+from jeu import SceneJeu, LARGEUR, HAUTEUR
+
+GRAINE = 1
+
+# ------------------ États ------------------
+def explorer_tout(etat: GameState):
+    """Pose une pièce dans chaque case, toutes les portes intérieures ouvertes."""
+    g = etat.grille
+    k = 0
+    for i in sorted(range(g.n), key=g.xy):     # colonne par colonne
+        if not g.a(i, DECOUVERTE):
+            g.pieces[i] = PIECES_MODELES[k % len(PIECES_MODELES)]
+            g.marquer(i, DECOUVERTE)
+            k += 1
+        g.portes[i] = sum(BIT_DIR[d] for d in g.voisins[i])
+    etat.revision += 1
+
+def scene_plateau_vide() -> SceneJeu:
+    return SceneJeu(GameState(GRAINE))
+
+def scene_plateau_complet() -> SceneJeu:
+    scene = SceneJeu(GameState(GRAINE))
+    explorer_tout(scene.etat)
+    return scene
+
+def scene_tirage() -> SceneJeu:
+    scene = SceneJeu(GameState(GRAINE))
+    scene.jouer(("ok",))
+    scene.tirage.ouvrir()
+    return scene
+
+def scene_boutique() -> SceneJeu:
+    scene = SceneJeu(GameState(GRAINE))
+    explorer_tout(scene.etat)
+    scene.shop.ouvrir()
+    return scene
+
+def scene_conso() -> SceneJeu:
+    scene = SceneJeu(GameState(GRAINE))
+    for nom in ("Pomme", "Banane", "Gâteau", "Sandwich", "Repas"):
+        scene.inv.ajouter_autre_objet(nom, 2)
+    scene.conso.toggle()
+    return scene
+
+def scene_defaite() -> SceneJeu:
+    scene = SceneJeu(GameState(GRAINE))
+    explorer_tout(scene.etat)
+    scene.inv.pas = 0
+    return scene
+
+def scene_manoir_100x200() -> SceneJeu:
+    scene = SceneJeu(GameState(GRAINE, largeur=100, hauteur=200))
+    explorer_tout(scene.etat)
+    return scene
+
+SCENES: Dict[str, Callable[[], SceneJeu]] = {
+    "plateau_vide": scene_plateau_vide,
+    "plateau_complet": scene_plateau_complet,
+    "tirage": scene_tirage,
+    "boutique": scene_boutique,
+    "conso": scene_conso,
+    "defaite": scene_defaite,
+    "manoir_100x200": scene_manoir_100x200,
+}
+
+# ------------------ Mesures ------------------
+def _stats(durees: List[float]) -> Dict[str, float]:
+    d = sorted(durees)
+    n = len(d)
+    med = d[n // 2] if n % 2 else (d[n // 2 - 1] + d[n // 2]) / 2
+    p99 = d[min(n - 1, int(0.99 * n))]
+    return {"median_ms": round(med * 1000, 3), "p99_ms": round(p99 * 1000, 3)}
+
+def _chrono(f: Callable[[], object], n: int, echauffement: int) -> Dict[str, float]:
+    for _ in range(echauffement):
+        f()
+    durees = []
+    horloge = time.perf_counter
+    for _ in range(n):
+        t = horloge()
+        f()
+        durees.append(horloge() - t)
+    return _stats(durees)
+
+def mesurer_scene(scene: SceneJeu, surf: pygame.Surface, n: int, echauffement: int = 10) -> Dict:
+    rendu = scene.rendu
+
+    def image_complete():
+        rendu.tout_invalider()
+        scene.dessiner(surf)
+
+    res = {"image": _chrono(image_complete, n, echauffement)}
+    scene.dessiner(surf)
+    res["stable"] = _chrono(lambda: scene.dessiner(surf), n, echauffement)
+    calques = {}
+    for c in rendu.calques:
+        if c.signature() is None:
+            continue
+        calques[c.nom] = _chrono(lambda c=c: c.dessiner(surf), n, echauffement)
+    res["calques"] = calques
+    return res
+
+def lancer(n: int, scenes=None) -> Dict:
+    pygame.init()
+    surf = pygame.display.set_mode((LARGEUR, HAUTEUR))
+    res = {
+        "config": {"images": n, "resolution": [LARGEUR, HAUTEUR], "graine": GRAINE,
+                   "pygame": pygame.version.ver, "sdl": ".".join(map(str, pygame.get_sdl_version())),
+                   "python": platform.python_version()},
+        "scenes": {},
+    }
+    for nom in scenes or SCENES:
+        res["scenes"][nom] = mesurer_scene(SCENES[nom](), surf, n)
+    pygame.quit()
+    return res
+
+# ------------------ Comparaison ------------------
+def _aplatir(res: Dict) -> Dict[str, float]:
+    plat = {}
+    for nom, s in res["scenes"].items():
+        for cle in ("image", "stable"):
+            plat[f"{nom}.{cle}"] = s[cle]["median_ms"]
+        for c, v in s["calques"].items():
+            plat[f"{nom}.{c}"] = v["median_ms"]
+    return plat
+
+def comparer(reference: Dict, actuel: Dict, seuil: float) -> int:
+    """Affiche les écarts de médiane ; renvoie le nombre de régressions au-delà du seuil (en %)."""
+    ref, act = _aplatir(reference), _aplatir(actuel)
+    scenes = set(actuel["scenes"])
+    ref = {k: v for k, v in ref.items() if k.split(".")[0] in scenes}
+    regressions = 0
+    for cle in sorted(set(ref) | set(act)):
+        a, b = ref.get(cle), act.get(cle)
+        if a is None or b is None:
+            print(f"  {cle:<32} {'—' if a is None else f'{a:8.3f}'} -> {'—' if b is None else f'{b:8.3f}'}")
+            continue
+        ecart = 100 * (b - a) / a if a else 0.0
+        marque = ""
+        if ecart > seuil:
+            regressions += 1
+            marque = "  <-- régression"
+        print(f"  {cle:<32} {a:8.3f} -> {b:8.3f} ms  {ecart:+6.1f} %{marque}")
+    return regressions
+
+def afficher(res: Dict):
+    for nom, s in res["scenes"].items():
+        print(f"{nom}")
+        lignes = [("image", s["image"]), ("stable", s["stable"])] + list(s["calques"].items())
+        for cle, v in lignes:
+            print(f"  {cle:<12} médiane {v['median_ms']:8.3f} ms   p99 {v['p99_ms']:8.3f} ms")
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark du rendu sans fenêtre.")
+    ap.add_argument("-n", type=int, default=200, help="images mesurées par cas")
+    ap.add_argument("--scene", action="append", choices=sorted(SCENES), help="limiter à certaines scènes")
+    ap.add_argument("--sortie", help="écrire les résultats (JSON de référence)")
+    ap.add_argument("--comparer", help="JSON de référence à comparer")
+    ap.add_argument("--seuil", type=float, default=20.0, help="régression au-delà de ce %% (médiane)")
+    args = ap.parse_args()
+
+    res = lancer(args.n, args.scene)
+    afficher(res)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            reference = json.load(f)
+        print(f"Comparaison avec {args.comparer} :")
+        if comparer(reference, res, args.seuil):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Joueur automatique par recherche en faisceau
+--------------------------------------------
+L'IA joue par macro-actions sur des copies de la partie (GameState.copie) :
+  - ("porte", x, y, d)            voyage rapide jusqu'à (x, y) puis ouvre la porte d
+  - ("choisir", i) / ("relancer",) pendant un tirage
+  - ("boutique", x, y, idx, n)    rejoint une boutique et achète n fois l'article idx
+Ramasser, creuser (pelle), ouvrir un coffre au marteau et manger quand les pas
+manquent sont faits sans recherche (toujours bénéfiques).
+
+Les copies tirent dans le générateur de l'IA : elle ne connaît pas les tirages à
+venir de la vraie partie. Chaque décision développe `largeur` nœuds par niveau
+sur `profondeur` niveaux et garde la macro-action de tête du meilleur.
+
+Usage : python ia.py -n 20 --graine 1 [--largeur 4 --profondeur 2]
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from moteur import (
+    GameState, AleaJeu, AUTRES_CATALOGUE, BOUTIQUE, BOUTIQUE_ARTICLES, DELTAS,
+    GRID_W, GRID_H,
+)
+
+Macro = Tuple
+
+# Achats envisagés (indice dans BOUTIQUE_ARTICLES, quantité)
+ACHATS = [(i, 5 if ("gain_cle" in a or "gain_gemme" in a) else 2 if "objet" in a else 1)
+          for i, a in enumerate(BOUTIQUE_ARTICLES)]
+
+# ------------------ Évaluation ------------------
+def evaluer(e: GameState) -> float:
+    """Score heuristique d'une position (plus haut = meilleur)."""
+    st = e.statut()
+    if st == "victoire":
+        return 1e9 - e.pas_utilises
+    vx, vy = e.case_victoire()
+    # case vide la plus proche de l'Antichambre derrière une porte de la frontière
+    proche = min((abs(x + DELTAS[d][0] - vx) + abs(y + DELTAS[d][1] - vy)
+                  for (x, y, d) in e.frontiere.portes), default=e.grille.largeur + e.grille.hauteur)
+    score = -25.0 * proche
+    if st is not None:
+        return score - 1e6
+    inv = e.inv
+    nourriture = sum(AUTRES_CATALOGUE.get(n, ("", 0))[1] * q for n, q in inv.autres_objets.items())
+    n0, n1, n2 = e.frontiere.par_niveau
+    score += (8 * min(inv.cles, 8) + 4 * min(inv.gemmes, 6) + 3 * min(inv.des, 3)
+              + 0.6 * min(inv.pas + nourriture, 80) + 0.01 * inv.or_
+              + 3 * min(n0, 4) + 2 * min(n1, 4) + min(n2, 4)
+              + 6 * (inv.pelle + inv.marteau + inv.kit_crochetage + inv.detecteur_metaux + inv.patte_lapin))
+    if e.frontiere.boutiques:
+        score += 15
+    return score
+
+# ------------------ Macro-actions ------------------
+def _ouvrable(e: GameState, niveau: int) -> bool:
+    if niveau == 1:
+        return e.inv.kit_crochetage or e.inv.cles > 0
+    if niveau == 2:
+        return e.inv.cles > 0
+    return True
+
+def actions_gratuites(e: GameState) -> List[Tuple]:
+    """Actions sans contrepartie à faire tout de suite dans la pièce courante (hors tirage)."""
+    if e.ouverture_en_cours:
+        return []
+    inv = e.inv
+    for i, entry in enumerate(e.menu_actions):
+        req = entry.get("req")
+        if entry["kind"] == "pickup" or (req == "pelle" and inv.pelle) or (req == "coffre" and inv.marteau):
+            return [("menu", i)]
+    if inv.pas <= 3 and inv.autres_objets:
+        return [("consommer", min(inv.autres_objets, key=lambda n: AUTRES_CATALOGUE.get(n, ("", 0))[1]))]
+    return []
+
+def macros(e: GameState, max_portes: int = 6) -> List[Macro]:
+    """Macro-actions candidates dans l'état e (hors actions gratuites)."""
+    if e.ouverture_en_cours:
+        acts: List[Macro] = [("choisir", i) for i, p in enumerate(e.choix) if p.cout_gemmes <= e.inv.gemmes]
+        if e.inv.des > 0:
+            acts.append(("relancer",))
+        return acts or [("choisir", 0)]
+
+    vx, vy = e.case_victoire()
+    portes = []
+    for (x, y, d), lvl in e.frontiere.portes.items():
+        if not _ouvrable(e, lvl):
+            continue
+        dist = e.distance_vers(x, y)
+        if dist is None or dist + 1 > e.inv.pas:
+            continue
+        cible = abs(x + DELTAS[d][0] - vx) + abs(y + DELTAS[d][1] - vy)
+        portes.append((cible, dist, lvl, ("porte", x, y, d)))
+    portes.sort()
+    acts = [m for *_, m in portes[:max_portes]]
+
+    # boutique la plus proche
+    g = e.grille
+    meilleure = None
+    for i in range(g.n):
+        if g.a(i, BOUTIQUE):
+            dist = e.distance_vers(*g.xy(i))
+            if dist is not None and dist <= e.inv.pas and (meilleure is None or dist < meilleure[0]):
+                meilleure = (dist,) + g.xy(i)
+    if meilleure is not None:
+        _, bx, by = meilleure
+        for idx, n in ACHATS:
+            a = BOUTIQUE_ARTICLES[idx]
+            if a["prix"] > e.inv.or_:
+                continue
+            if a.get("permanent") == "Pelle" and e.inv.pelle or a.get("permanent") == "Patte de lapin" and e.inv.patte_lapin:
+                continue
+            acts.append(("boutique", bx, by, idx, n))
+    if not acts and e.inv.autres_objets:
+        # rien à portée : manger pour allonger le rayon d'action
+        acts.append(("consommer", max(e.inv.autres_objets, key=lambda n: AUTRES_CATALOGUE.get(n, ("", 0))[1])))
+    return acts
+
+def appliquer(e: GameState, m: Macro) -> List[Tuple[str, float]]:
+    """
+    Joue la macro-action m (plusieurs appels à step) puis les actions gratuites qui
+    suivent ; renvoie les messages produits.
+    """
+    verbe = m[0]
+    msgs: List[Tuple[str, float]] = []
+    if verbe == "porte":
+        _, x, y, d = m
+        if (x, y) != (e.x, e.y):
+            msgs += e.step(("voyager", x, y))
+            # avant d'ouvrir : pendant le tirage, plus rien ne se ramasse
+            msgs += _jouer_gratuites(e)
+        msgs += e.step(("ouvrir", d))
+    elif verbe == "boutique":
+        _, x, y, idx, n = m
+        if (x, y) != (e.x, e.y):
+            msgs += e.step(("voyager", x, y))
+        for _ in range(n):
+            msgs += e.step(("acheter", idx))
+    else:
+        msgs += e.step(m)
+    return msgs + _jouer_gratuites(e)
+
+def _jouer_gratuites(e: GameState) -> List[Tuple[str, float]]:
+    msgs: List[Tuple[str, float]] = []
+    for _ in range(20):
+        gratuites = actions_gratuites(e)
+        if not gratuites or e.statut() is not None:
+            break
+        msgs += e.step(gratuites[0])
+    return msgs
+
+# ------------------ Recherche ------------------
+class IA:
+    """Recherche en faisceau sur des copies de la partie ; compte les nœuds développés."""
+    def __init__(self, largeur: int = 4, profondeur: int = 2, graine: Optional[int] = None):
+        self.largeur = largeur
+        self.profondeur = profondeur
+        self.alea = AleaJeu.commun(random.Random(graine))
+        self.noeuds = 0
+        self.duree = 0.0
+
+    def decider(self, e: GameState) -> Optional[Macro]:
+        """Meilleure macro-action pour e (None si la partie est finie ou sans issue)."""
+        if e.statut() is not None:
+            return None
+        gratuites = actions_gratuites(e)
+        if gratuites:
+            return gratuites[0]
+        t = time.perf_counter()
+        candidats = macros(e)
+        if len(candidats) <= 1:
+            self.duree += time.perf_counter() - t
+            return candidats[0] if candidats else None
+
+        faisceau = []
+        for m in candidats:
+            c = e.copie(self.alea)
+            appliquer(c, m)
+            faisceau.append((evaluer(c), m, c))
+        self.noeuds += len(candidats)
+
+        for _ in range(1, self.profondeur):
+            faisceau.sort(key=lambda n: n[0], reverse=True)
+            suivants = []
+            for score, tete, c in faisceau[:self.largeur]:
+                fils = macros(c) if c.statut() is None else []
+                if not fils:
+                    suivants.append((score, tete, c))
+                    continue
+                for m in fils:
+                    c2 = c.copie(self.alea)
+                    appliquer(c2, m)
+                    suivants.append((evaluer(c2), tete, c2))
+                self.noeuds += len(fils)
+            faisceau = suivants
+
+        self.duree += time.perf_counter() - t
+        return max(faisceau, key=lambda n: n[0])[1]
+
+    def jouer_partie(self, e: GameState, max_decisions: int = 2000) -> str:
+        for _ in range(max_decisions):
+            m = self.decider(e)
+            if m is None:
+                break
+            appliquer(e, m)
+        return e.statut() or "abandon"
+
+    def noeuds_par_seconde(self) -> float:
+        return self.noeuds / self.duree if self.duree else 0.0
+
+# ------------------ Benchmark ------------------
+def main():
+    ap = argparse.ArgumentParser(description="IA par recherche en faisceau : taux de victoire et débit.")
+    ap.add_argument("-n", type=int, default=20, help="nombre de parties")
+    ap.add_argument("--graine", type=int, default=0)
+    ap.add_argument("--largeur", type=int, default=4, help="largeur du faisceau")
+    ap.add_argument("--profondeur", type=int, default=2, help="niveaux de macro-actions explorés")
+    ap.add_argument("--taille", type=int, nargs=2, default=(GRID_W, GRID_H), metavar=("L", "H"))
+    args = ap.parse_args()
+
+    issues: Dict[str, int] = {}
+    ia = IA(args.largeur, args.profondeur, graine=args.graine)
+    t = time.perf_counter()
+    for i in range(args.n):
+        e = GameState((args.graine << 32) + i, largeur=args.taille[0], hauteur=args.taille[1])
+        st = ia.jouer_partie(e)
+        issues[st] = issues.get(st, 0) + 1
+    duree = time.perf_counter() - t
+    print(f"{args.n} parties {args.taille[0]}x{args.taille[1]}, faisceau {args.largeur} x {args.profondeur} : "
+          f"{duree / args.n * 1000:.0f} ms/partie")
+    print("  " + "  ".join(f"{k} {v}" for k, v in sorted(issues.items())))
+    print(f"  {ia.noeuds} nœuds, {ia.noeuds_par_seconde():,.0f} nœuds/s")
+
+
+if __name__ == "__main__":
+    main()
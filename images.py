@@ -0,0 +1,270 @@
+"""
+Icônes des pièces
+-----------------
+Le manifeste associe un nom de pièce à un fichier image :
+  - images/pieces/manifeste.csv (colonnes nom;fichier), s'il existe,
+  - sinon, pour chaque pièce, images/pieces/<nom en minuscules, espaces -> _>.png.
+
+ChargeurImages lit le manifeste et décode les fichiers dans un thread ; la boucle
+principale récupère les images prêtes (recuperer) et les convertit au format de
+l'écran, dans un budget de temps par image. Tant qu'une icône n'est pas prête, la
+pièce garde sa tuile de couleur : la première image du jeu n'attend aucun fichier.
+
+CacheIcones garde les icônes déjà mises à la taille d'une case ou d'une carte et au
+format de l'écran, rangées dans un Atlas par taille, en LRU borné en octets.
+"""
+import math
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pygame
+
+DOSSIER_IMAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images", "pieces")
+FICHIER_MANIFESTE = "manifeste.csv"
+
+def nom_fichier(nom: str) -> str:
+    return nom.lower().strip().replace(" ", "_") + ".png"
+
+def manifeste_pieces(noms: Iterable[str], dossier: str = DOSSIER_IMAGES) -> List[Tuple[str, str]]:
+    """[(nom de pièce, chemin)] des icônes présentes sur le disque."""
+    try:
+        presents = {e.name for e in os.scandir(dossier) if e.is_file()}
+    except OSError:
+        return []
+    if FICHIER_MANIFESTE in presents:
+        import csv
+        with open(os.path.join(dossier, FICHIER_MANIFESTE), encoding="utf-8", newline="") as f:
+            lignes = [(r[0].strip(), r[1].strip()) for r in csv.reader(f, delimiter=";") if len(r) >= 2]
+    else:
+        lignes = [(nom, nom_fichier(nom)) for nom in noms]
+    return [(nom, os.path.join(dossier, fichier)) for nom, fichier in lignes if fichier in presents]
+
+class ChargeurImages:
+    """
+    Chargement des icônes en tâche de fond.
+    images     : {nom de pièce: Surface convertie}, rempli au fil de recuperer()
+    generation : incrémentée à chaque image ajoutée (à mettre dans les signatures de rendu)
+    """
+    def __init__(self, images: Optional[Dict[str, pygame.Surface]] = None):
+        self.images = images if images is not None else {}
+        self.generation = 0
+        self.echecs = 0
+        self._file: "queue.Queue[Tuple[str, Optional[pygame.Surface]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._restantes: Optional[int] = None    # inconnu tant que le manifeste n'est pas lu
+
+    def demarrer(self, noms: Iterable[str], dossier: str = DOSSIER_IMAGES):
+        """Lance le thread de chargement (sans effet s'il tourne déjà)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._travail, args=(list(noms), dossier),
+                                        name="chargement-images", daemon=True)
+        self._thread.start()
+
+    def _travail(self, noms: List[str], dossier: str):
+        manifeste = manifeste_pieces(noms, dossier)
+        self._restantes = len(manifeste)
+        for nom, chemin in manifeste:
+            try:
+                img = pygame.image.load(chemin)
+            except (pygame.error, OSError):
+                img = None
+            self._file.put((nom, img))
+
+    def recuperer(self, budget: float = 0.002) -> int:
+        """
+        À appeler depuis la boucle principale : convertit les images décodées pendant
+        au plus `budget` secondes ; renvoie le nombre d'images ajoutées.
+        """
+        if self._thread is None:
+            return 0
+        fin = time.perf_counter() + budget
+        ajoutees = 0
+        while True:
+            try:
+                nom, img = self._file.get_nowait()
+            except queue.Empty:
+                break
+            self._restantes -= 1
+            if img is None:
+                self.echecs += 1
+            else:
+                self.images[nom] = img.convert_alpha() if pygame.display.get_surface() else img
+                ajoutees += 1
+            if time.perf_counter() >= fin:
+                break
+        if ajoutees:
+            self.generation += 1
+        return ajoutees
+
+    @property
+    def termine(self) -> bool:
+        return self._restantes == 0
+
+    def image(self, nom: str) -> Optional[pygame.Surface]:
+        return self.images.get(nom)
+
+
+# ------------------ Atlas de textures ------------------
+# Poignée d'une image rangée dans un atlas : (page, sous-rectangle)
+Poignee = Tuple[pygame.Surface, pygame.Rect]
+
+PAGE_ATLAS = (1024, 1024)
+
+class Atlas:
+    """
+    Petites surfaces rangées dans une ou quelques grandes pages, par étagères :
+    on remplit une rangée de gauche à droite, puis on ouvre la suivante sous la plus
+    haute image de la rangée. ajouter() renvoie une poignée (page, rect) ; dessiner
+    une liste de poignées se fait en un seul Surface.blits par page.
+    """
+    def __init__(self, taille_page: Tuple[int, int] = PAGE_ATLAS, marge: int = 1):
+        self.taille_page = taille_page
+        self.marge = marge
+        self.pages: List[pygame.Surface] = []
+        self._poignees: Dict = {}
+        self._courante: Optional[pygame.Surface] = None     # page des étagères en cours
+        self._x = self._y = self._haut = 0
+
+    def _page(self, taille: Tuple[int, int]) -> pygame.Surface:
+        page = pygame.Surface(taille, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            page = page.convert_alpha()
+        page.fill((0, 0, 0, 0))
+        self.pages.append(page)
+        return page
+
+    def _nouvelle_page(self):
+        self._courante = self._page(self.taille_page)
+        self._x = self._y = self._haut = 0
+
+    def ajouter(self, cle, surface: pygame.Surface) -> Poignee:
+        poignee = self._poignees.get(cle)
+        if poignee is not None:
+            return poignee
+        w, h = surface.get_size()
+        pw, ph = self.taille_page
+        m = self.marge
+        if w > pw or h > ph:
+            # trop grande pour une page : page à sa taille, la page courante reste ouverte
+            page = self._page((w, h))
+            x = y = 0
+        else:
+            if self._courante is None:
+                self._nouvelle_page()
+            if self._x + w > pw:                       # rangée pleine
+                self._x, self._y, self._haut = 0, self._y + self._haut + m, 0
+            if self._y + h > ph:                       # page pleine
+                self._nouvelle_page()
+            page = self._courante
+            x, y = self._x, self._y
+            self._x += w + m
+            self._haut = max(self._haut, h)
+        # copie exacte des pixels et de l'alpha (la page est transparente à cet endroit)
+        page.blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        poignee = self._poignees[cle] = (page, pygame.Rect(x, y, w, h))
+        return poignee
+
+    def get(self, cle) -> Optional[Poignee]:
+        return self._poignees.get(cle)
+
+    def __contains__(self, cle) -> bool:
+        return cle in self._poignees
+
+    def __len__(self) -> int:
+        return len(self._poignees)
+
+    @property
+    def octets(self) -> int:
+        return sum(p.get_bytesize() * p.get_width() * p.get_height() for p in self.pages)
+
+    def vider(self):
+        self.pages.clear()
+        self._poignees.clear()
+        self._courante = None
+        self._x = self._y = self._haut = 0
+
+def dessiner_lot(cible: pygame.Surface, lot: List[Tuple[Poignee, Tuple[int, int]]]):
+    """Dessine [(poignée, position)] avec un Surface.blits par lot."""
+    if lot:
+        cible.blits([(page, pos, rect) for (page, rect), pos in lot], doreturn=False)
+
+
+# ------------------ Icônes mises à l'échelle ------------------
+PLAFOND_ICONES = 32 * 1024 * 1024     # octets
+
+class CacheIcones:
+    """
+    Icônes redimensionnées, un atlas par taille (case du plateau, carte du tirage...) :
+    toutes les pièces d'un plateau se dessinent depuis une même page.
+    Vidé quand le contexte (résolution, taille du manoir) change ; au-delà de
+    `plafond` octets, les atlas des tailles les moins récemment utilisées sont évincés.
+    """
+    def __init__(self, sources: Dict[str, pygame.Surface], plafond: int = PLAFOND_ICONES,
+                 prevues: int = 64):
+        self.sources = sources
+        self.plafond = plafond
+        self.prevues = prevues        # icônes par atlas, pour dimensionner les pages
+        self._atlas: "OrderedDict[Tuple[int, int], Atlas]" = OrderedDict()
+        self._contexte = None
+        self.octets = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def contexte(self, *cle):
+        """À appeler avant de dessiner : (résolution, taille de la grille, ...)."""
+        if cle != self._contexte:
+            self._contexte = cle
+            self.vider()
+
+    def _atlas_pour(self, taille: Tuple[int, int]) -> Atlas:
+        atlas = self._atlas.get(taille)
+        if atlas is None:
+            # pages carrées d'environ `prevues` icônes, bornées par PAGE_ATLAS
+            cote = math.isqrt(self.prevues - 1) + 1
+            atlas = self._atlas[taille] = Atlas((min(PAGE_ATLAS[0], cote * (taille[0] + 1)),
+                                                 min(PAGE_ATLAS[1], cote * (taille[1] + 1))))
+        else:
+            self._atlas.move_to_end(taille)
+        return atlas
+
+    def icone(self, nom: str, taille: Tuple[int, int]) -> Optional[Poignee]:
+        """Poignée de l'icône de `nom` à la taille donnée, None si l'image n'est pas (encore) chargée."""
+        taille = (taille[0], taille[1])
+        atlas = self._atlas.get(taille)
+        if atlas is not None:
+            poignee = atlas.get(nom)
+            if poignee is not None:
+                self.hits += 1
+                self._atlas.move_to_end(taille)
+                return poignee
+        source = self.sources.get(nom)
+        if source is None or taille[0] <= 0 or taille[1] <= 0:
+            return None
+        self.misses += 1
+        # smoothscale n'accepte que les surfaces 24/32 bits (image non convertie : palette)
+        mise_a_echelle = pygame.transform.smoothscale if source.get_bitsize() >= 24 else pygame.transform.scale
+        atlas = self._atlas_pour(taille)
+        avant = atlas.octets
+        poignee = atlas.ajouter(nom, mise_a_echelle(source, taille))   # la page est au format de l'écran
+        self.octets += atlas.octets - avant
+        while self.octets > self.plafond and len(self._atlas) > 1:
+            t, vieux = next(iter(self._atlas.items()))
+            if t == taille:
+                break
+            del self._atlas[t]
+            self.octets -= vieux.octets
+            self.evictions += 1
+        return poignee
+
+    def __len__(self) -> int:
+        return sum(len(a) for a in self._atlas.values())
+
+    def vider(self):
+        self._atlas.clear()
+        self.octets = 0
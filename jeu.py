@@ -1,10 +1,3 @@
-import pygame
-import random
-from dataclasses import dataclass, field
-from typing import List, Dict, Tuple, Optional
-from menu import *
-from main import*
-
 """
 Jeu type Blue Prince - version conforme à tes demandes + PDF prof
 -----------------------------------------------------------------
@@ -14,6 +7,12 @@ Jeu type Blue Prince - version conforme à tes demandes + PDF prof
 - Flèches : se balader (inspection) entre chambres déjà découvertes (pas de coût).
 - OK (Espace/Entrée) : ouvre le menu en haut avec 3 rooms possibles pour la case visée.
   - R = relancer le tirage (consomme 1 dé si disponible).
+- T : voyage rapide vers une pièce découverte reliée (coût = plus court chemin en pas).
+- Retour arrière : annuler la dernière action (historique borné).
+- F5 : sauvegarder la partie, F9 : recharger la dernière sauvegarde.
+- I : partie automatique (IA par recherche en faisceau, ia.py) ; I de nouveau pour reprendre la main.
+- python jeu.py --demarrage : rapport du temps de démarrage (imports, init, première image).
+- python jeu.py --enregistrer=f.scn : touches jouées écrites dans f.scn, rejouable par pilote.py.
 - Couleurs d’onglets (autour de la cellule courante) :
   vert = porte niveau 0     (sans clé)
   orange = porte niveau 1   (clé OU kit)
@@ -25,10 +24,35 @@ Jeu type Blue Prince - version conforme à tes demandes + PDF prof
 - Défaite : plus de pas OU bloqué (aucune progression possible).
 - Victoire : atteindre l’Antichambre (case x=milieu, y=0).
 """
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional
+
+# pygame importe numpy (surfarray) et pkg_resources (pkgdata) dès qu'ils sont installés :
+# plus de 250 ms au démarrage pour des modules dont le jeu ne se sert pas. Ils sont masqués
+# le temps de cet import seulement (numpy reste importable, pour simulation_lot).
+_masques = [m for m in ("numpy", "pkg_resources") if m not in sys.modules]
+sys.modules.update(dict.fromkeys(_masques, None))
+try:
+    import pygame
+finally:
+    for m in _masques:
+        del sys.modules[m]
+
+from moteur import (
+    Inventaire, Piece, PIECES_MODELES, GRID_W, GRID_H, DELTAS,
+    Cellule, Grille, DECOUVERTE, BOUTIQUE_ARTICLES, GameState,
+)
+from images import ChargeurImages, CacheIcones, Atlas, Poignee, dessiner_lot
+
 
 # ------------------ Paramètres d'écran ------------------
 LARGEUR, HAUTEUR = 1920, 1080
 FPS = 60
+FICHIER_SAUVEGARDE = "partie.sav"
+DELAI_IA = 0.4      # secondes entre deux macro-actions en partie automatique
 GAUCHE_W, DROITE_W = 380, 420
 CENTRE_W = LARGEUR - GAUCHE_W - DROITE_W
 
@@ -38,14 +62,6 @@ COULEUR_TEXTE   = (235, 235, 245)
 COULEUR_ACCENT  = (110, 170, 255)
 COULEUR_MUTE    = (150, 150, 170)
 
-# Couleurs des rooms (PDF)
-C_JAUNE  = (230, 200, 80)    # shop
-C_VERT   = (100, 200, 120)   # jardins
-C_VIOLET = (160, 120, 220)   # chambres (rend des pas)
-C_ORANGE = (240, 150, 60)    # couloirs
-C_ROUGE  = (210, 70, 70)     # indésirables
-C_BLEU   = (90, 140, 240)    # communes
-
 # ------------------ Touches ------------------
 TOUCHE_OKS    = {pygame.K_SPACE, pygame.K_RETURN}
 TOUCHE_RETOUR = pygame.K_ESCAPE
@@ -61,19 +77,64 @@ ARROW_UP    = pygame.K_UP
 ARROW_DOWN  = pygame.K_DOWN
 ARROW_LEFT  = pygame.K_LEFT
 ARROW_RIGHT = pygame.K_RIGHT
+FLECHES = {ARROW_UP: "N", ARROW_DOWN: "S", ARROW_LEFT: "W", ARROW_RIGHT: "E"}
 
 # ------------------ Police / texte ------------------
-_cache_police: Dict[int, pygame.font.Font] = {}
 def police(sz: int) -> pygame.font.Font:
-    f = _cache_police.get(sz)
-    if f:
-        return f
-    _cache_police[sz] = pygame.font.SysFont("arial", sz)
-    return _cache_police[sz]
-
-def texte(surface, txt, pos, size=24, couleur=(255,255,255), centre=False):
-    font = pygame.font.Font(None, size)
-    s = font.render(txt, True, couleur)
+    """
+    Police des textes : celle fournie avec pygame. SysFont("arial") listait toutes
+    les polices du système (fc-list) au premier appel, pour un rendu équivalent.
+    """
+    return police_defaut(sz)
+
+_cache_police_defaut: Dict[int, pygame.font.Font] = {}
+def police_defaut(sz: int) -> pygame.font.Font:
+    """Police par défaut de pygame (celle de texte()), construite une seule fois par taille."""
+    f = _cache_police_defaut.get(sz)
+    if f is None:
+        f = _cache_police_defaut[sz] = pygame.font.Font(None, sz)
+    return f
+
+class CacheTexte:
+    """
+    Cache LRU des surfaces de texte déjà rendues.
+    Clé : (texte, taille, couleur, antialias). Les compteurs hits / misses / evictions
+    permettent de vérifier le taux de réussite en jeu.
+    """
+    def __init__(self, capacite: int = 512):
+        self.capacite = capacite
+        self._surfaces: "OrderedDict[Tuple, pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def rendu(self, txt: str, size: int, couleur, antialias: bool = True) -> pygame.Surface:
+        cle = (txt, size, tuple(couleur), antialias)
+        s = self._surfaces.get(cle)
+        if s is not None:
+            self._surfaces.move_to_end(cle)
+            self.hits += 1
+            return s
+        self.misses += 1
+        s = police_defaut(size).render(txt, antialias, couleur)
+        self._surfaces[cle] = s
+        if len(self._surfaces) > self.capacite:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return s
+
+    def vider(self):
+        self._surfaces.clear()
+        _cache_police_defaut.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "taille": len(self._surfaces)}
+
+cache_texte = CacheTexte()
+
+def texte(surface, txt, pos, size=24, couleur=(255,255,255), centre=False, antialias=True):
+    s = cache_texte.rendu(txt, size, couleur, antialias)
     r = s.get_rect()
     if centre:
         r.center = pos
@@ -82,337 +143,49 @@ def texte(surface, txt, pos, size=24, couleur=(255,255,255), centre=False):
     surface.blit(s, r)
 
 
+# ------------------ Voiles translucides (overlays) ------------------
+class CompositeurVoiles:
+    """
+    Voiles noirs semi-transparents partagés par les overlays (tirage, boutique,
+    consommation, écrans de fin). Un voile est alloué une seule fois par
+    (taille d'écran, alpha) puis réutilisé ; `allocations` compte les créations.
+    """
+    def __init__(self):
+        self._voiles: Dict[Tuple[Tuple[int, int], int], pygame.Surface] = {}
+        self.allocations = 0
+        self.octets_alloues = 0
 
-ROOM_IMAGES = {}
+    def voile(self, taille: Tuple[int, int], alpha: int) -> pygame.Surface:
+        cle = (tuple(taille), alpha)
+        v = self._voiles.get(cle)
+        if v is None:
+            v = pygame.Surface(taille, pygame.SRCALPHA)
+            v.fill((0, 0, 0, alpha))
+            self._voiles[cle] = v
+            self.allocations += 1
+            self.octets_alloues += v.get_bytesize() * v.get_width() * v.get_height()
+        return v
 
-ROOM_IMAGES = {}
+    def assombrir(self, surf: pygame.Surface, alpha: int):
+        surf.blit(self.voile(surf.get_size(), alpha), (0, 0))
 
-def charger_images_pieces():
-    for r in ROOM_DATA:
-        chemin = r["icon"]
-        nom = r["name"]
+    def vider(self):
+        self._voiles.clear()
 
-        if chemin and os.path.exists(chemin):
-            try:
-                img = pygame.image.load(chemin).convert_alpha()
-                ROOM_IMAGES[nom] = img
-            except Exception:
-                # On ignore l’erreur, la pièce sera dessinée en couleur simple
-                pass
-        # si le fichier n’existe pas, on ne fait rien → pas de print
-
-
-# ------------------ Inventaire & objets ------------------
-@dataclass
-class Inventaire:
-    pas: int = 70
-    or_: int = 500
-    gemmes: int = 2
-    cles: int = 0
-    des: int = 0
-
-    # dictionnaire des autres objets : nom -> quantité
-    autres_objets: Dict[str, int] = field(default_factory=dict)
-
-    # Objets permanents
-    pelle: bool = False
-    marteau: bool = False
-    kit_crochetage: bool = False
-    detecteur_metaux: bool = False
-    patte_lapin: bool = False
-
-    def consommer_pas(self, n: int = 1):
-        self.pas = max(0, self.pas - n)
-
-    def ajouter_autre_objet(self, nom: str, nb: int = 1):
-        """Ajoute un objet consommable dans la section 'Autres objets'."""
-        self.autres_objets[nom] = self.autres_objets.get(nom, 0) + nb
-
-    def consommer_autre_objet(self, nom: str, messages: "MessageBar"):
-        """Consomme un objet (Pomme, Repas, ...) et applique son effet."""
-        q = self.autres_objets.get(nom, 0)
-        if q <= 0:
-            messages.show(f"Tu n'as plus de {nom}.")
-            return
-        self.autres_objets[nom] = q - 1
+voiles = CompositeurVoiles()
 
-        if nom in AUTRES_CATALOGUE:
-            _, gain = AUTRES_CATALOGUE[nom]
-            self.pas += gain
-            messages.show(f"{nom} consommé : +{gain} pas.")
-        else:
-            messages.show(f"{nom} consommé.")
-
-    def ajouter_objet_permanent(self, nom: str):
-        """Débloque un objet permanent (pelle, marteau, etc.)."""
-        n = nom.lower()
-        if "pelle" in n:
-            self.pelle = True
-        elif "marteau" in n:
-            self.marteau = True
-        elif "crochet" in n or "crochetage" in n:
-            self.kit_crochetage = True
-        elif "détecteur" in n or "detecteur" in n:
-            self.detecteur_metaux = True
-        elif "patte" in n:
-            self.patte_lapin = True
-
-# Consommables
-AUTRES_CATALOGUE = {
-    "Pomme":    ("+2 pas", 2),
-    "Banane":   ("+3 pas", 3),
-    "Gâteau":   ("+10 pas", 10),
-    "Sandwich": ("+15 pas", 15),
-    "Repas":    ("+25 pas", 25),
-}
 
-# ------------------ Rooms ------------------
-@dataclass
-class Piece:
-    nom: str
-    couleur: Tuple[int, int, int]
-    rarete: int        # 1 commun, 2 un peu rare, 3 rare
-    cout_gemmes: int   # 0 / 1 / 2...
-    effets: List[str]  # texte court
-    actions: Dict[str, int]  # ex: {"Gemmes":30, "Creuser":25, "Coffre":10}
-
-def nb_portes_theoriques(piece: Piece) -> int:
-    """Nombre de portes pour cette pièce en fonction de sa couleur."""
-    if piece.couleur == C_ORANGE:  # couloirs
-        return 4
-    if piece.couleur == C_BLEU:    # communes
-        return 3
-    if piece.couleur == C_VIOLET:  # chambres
-        return 2
-    if piece.couleur == C_VERT:    # jardins
-        return 3
-    if piece.couleur == C_ROUGE:   # indésirables
-        return 1
-    if piece.couleur == C_JAUNE:   # shops
-        return 2
-    return 3
-
-
-# ======================= Catalogue de pièces =======================
-PIECES_MODELES: List[Piece] = [
-    # ----- Rooms "fondation" / communes (bleues) -----
-    Piece("Entrance Hall", C_BLEU, 1, 0,
-          ["Pièce de départ", "Quelques ressources"],
-          {"Clé": 10, "Gemmes": 5, "+Pas": 10}),
-    Piece("Foundation", C_BLEU, 1, 0,
-          ["Basique", "Peu d'effets"],
-          {"Clé": 5, "Gemmes": 5}),
-    Piece("Spare Room", C_BLEU, 1, 0,
-          ["Petite salle", "Chance légère de ressources"],
-          {"Clé": 10, "Gemmes": 10}),
-    Piece("Rotunda", C_ORANGE, 1, 0,
-          ["Couloir circulaire", "Plusieurs portes"],
-          {"Clé": 5}),
-    Piece("Parlor", C_BLEU, 1, 0,
-          ["Salon", "Un peu de tout"],
-          {"Clé": 10, "Gemmes": 15}),
-    Piece("Billiard Room", C_BLEU, 1, 0,
-          ["Salle de billard", "Quelques pièces"],
-          {"Gemmes": 15, "Clé": 5}),
-    Piece("Gallery", C_BLEU, 1, 0,
-          ["Galerie", "Chance d'or"],
-          {"Gemmes": 10}),
-    Piece("Closet", C_BLEU, 1, 0,
-          ["Placard", "Petits objets"],
-          {"Clé": 10}),
-    Piece("Walk-in Closet", C_BLEU, 1, 0,
-          ["Grand placard", "Ressources variées"],
-          {"Clé": 15, "Gemmes": 10}),
-    Piece("Attic", C_BLEU, 1, 0,
-          ["Grenier", "Objet caché"],
-          {"Clé": 15, "Gemmes": 10, "Coffre": 20}),
-    Piece("Storeroom", C_BLEU, 1, 0,
-          ["Réserve", "Beaucoup d'objets"],
-          {"Clé": 10, "Gemmes": 15, "Coffre": 25}),
-
-    # ----- Rooms "milieu" ----- 
-    Piece("Nook", C_BLEU, 2, 0,
-          ["Coin tranquille", "Quelques ressources"],
-          {"Clé": 10, "Gemmes": 10}),
-    Piece("Garage", C_BLEU, 2, 0,
-          ["Garage", "Objets métalliques"],
-          {"Clé": 15, "Gemmes": 10}),
-    Piece("Music Room", C_BLEU, 2, 0,
-          ["Salle de musique", "Parfois des gemmes"],
-          {"Gemmes": 20}),
-    Piece("Locker Room", C_BLEU, 2, 0,
-          ["Vestiaire", "Casiers verrouillés"],
-          {"Clé": 20, "Coffre": 10}),
-    Piece("Den", C_VERT, 2, 0,
-          ["Foyer", "Souvent une gemme"],
-          {"Gemmes": 60, "Coffre": 20}),
-    Piece("Wine Cellar", C_BLEU, 2, 0,
-          ["Cave à vin", "Coffres et gemmes"],
-          {"Gemmes": 30, "Coffre": 35}),
-    Piece("Trophy Room", C_BLEU, 2, 0,
-          ["Salle des trophées", "Objets rares"],
-          {"Clé": 20, "Gemmes": 20, "Coffre": 30}),
-    Piece("Ballroom", C_ORANGE, 2, 0,
-          ["Grande salle de bal", "Beaucoup de portes"],
-          {"Clé": 10}),
-    Piece("Pantry", C_JAUNE, 2, 1,
-          ["Garde-manger", "Beaucoup de nourriture"],
-          {"+Pas": 60, "Gemmes": 10}),
-    Piece("Rumpus Room", C_BLEU, 2, 0,
-          ["Salle de jeux", "Ressources variées"],
-          {"Gemmes": 20, "+Pas": 20}),
-    Piece("Vault", C_JAUNE, 2, 2,
-          ["Coffre-fort", "Beaucoup de coffres"],
-          {"Clé": 15, "Gemmes": 25, "Coffre": 60}),
-    Piece("Office", C_BLEU, 2, 0,
-          ["Bureau", "Clés et gemmes"],
-          {"Clé": 20, "Gemmes": 15}),
-
-    # ----- Bibliothèque / étude (niveau 3) -----
-    Piece("Drawing Room", C_BLEU, 2, 1,
-          ["Salon élégant", "Petits bonus"],
-          {"Gemmes": 20, "+Pas": 20}),
-    Piece("Study", C_BLEU, 2, 1,
-          ["Étude", "Clés cachées"],
-          {"Clé": 25, "Gemmes": 10}),
-    Piece("Library", C_BLEU, 2, 1,
-          ["Bibliothèque", "Quelques gemmes"],
-          {"Gemmes": 25}),
-    Piece("Chamber of Mirrors", C_ROUGE, 3, 2,
-          ["Salle dangereuse", "Peut faire perdre des pas"],
-          {"Gemmes": 30, "-Pas": 40}),
-    Piece("The Pool", C_VERT, 3, 1,
-          ["Piscine", "Objets sous l'eau"],
-          {"Gemmes": 25, "Clé": 15, "Creuser": 40}),
-    Piece("Drafting Studio", C_BLEU, 3, 1,
-          ["Atelier de plans", "Bonus variés"],
-          {"Clé": 15, "Gemmes": 20, "+Pas": 10}),
-
-    # ----- Jardins (vertes) -----
-    Piece("Garden", C_VERT, 2, 0,
-          ["Jardin d'intérieur", "Gemmes et endroits à creuser"],
-          {"Gemmes": 35, "Creuser": 60, "Clé": 10}),
-    Piece("Greenhouse", C_VERT, 3, 1,
-          ["Serre", "Beaucoup d'endroits à creuser"],
-          {"Gemmes": 40, "Creuser": 80, "Clé": 15, "Coffre": 20}),
-    Piece("Solarium", C_VERT, 3, 1,
-          ["Solarium", "Bonus de pas et gemmes"],
-          {"Gemmes": 30, "Creuser": 50, "+Pas": 40}),
-    Piece("Veranda", C_VERT, 2, 0,
-          ["Véranda", "Endroits à creuser"],
-          {"Creuser": 60, "Gemmes": 20}),
-
-    # ----- Chambres (violettes) -----
-    Piece("Bedroom", C_VIOLET, 2, 0,
-          ["Chambre", "Redonne des pas"],
-          {"+Pas": 70}),
-    Piece("Boudoir", C_VIOLET, 2, 1,
-          ["Boudoir", "Beaucoup de repos"],
-          {"+Pas": 90, "Gemmes": 10}),
-    Piece("Guest Room", C_VIOLET, 2, 0,
-          ["Chambre d'amis", "Redonne quelques pas"],
-          {"+Pas": 60}),
-    Piece("Nursery", C_VIOLET, 2, 0,
-          ["Chambre d'enfant", "Rend des pas"],
-          {"+Pas": 55}),
-    Piece("Maid's Chamber", C_VIOLET, 2, 0,
-          ["Chambre de bonne", "Petits bonus"],
-          {"+Pas": 40, "Gemmes": 10}),
-
-    # ----- Couloirs (oranges) -----
-    Piece("Corridor", C_ORANGE, 1, 0,
-          ["Couloir", "Beaucoup de portes"],
-          {"Clé": 5}),
-    Piece("Long Corridor", C_ORANGE, 2, 0,
-          ["Long couloir", "Encore plus de portes"],
-          {"Clé": 10}),
-    Piece("Grand Staircase", C_ORANGE, 2, 1,
-          ["Grand escalier", "Bonne connectivité"],
-          {"Clé": 10}),
-    Piece("Cloister", C_ORANGE, 3, 1,
-          ["Cloître", "Couloirs multiples"],
-          {"Clé": 10, "Gemmes": 10}),
-
-    # ----- Salles rouges -----
-    Piece("Furnace", C_ROUGE, 3, 1,
-          ["Fournaise", "Peut retirer des pas"],
-          {"-Pas": 60, "Gemmes": 20}),
-    Piece("Boiler Room", C_ROUGE, 3, 1,
-          ["Chaufferie", "Dangereuse mais rentable"],
-          {"-Pas": 40, "Gemmes": 30, "Clé": 15}),
-    Piece("Closed Exhibit", C_ROUGE, 3, 2,
-          ["Exposition fermée", "Souvent mauvais plan"],
-          {"-Pas": 50, "Gemmes": 20}),
-    Piece("Darkroom", C_ROUGE, 2, 1,
-          ["Chambre noire", "Peut faire perdre des pas"],
-          {"-Pas": 50, "Gemmes": 20}),
-
-    # ----- Shops (jaunes) -----
-    Piece("Bookshop", C_JAUNE, 3, 2,
-          ["Librairie", "Échange or contre objets"],
-          {"Gemmes": 25, "+Pas": 30}),
-    Piece("Casino", C_JAUNE, 3, 3,
-          ["Casino", "Très risqué"],
-          {"Gemmes": 40, "-Pas": 40, "+Pas": 40}),
-    Piece("Dining Room", C_JAUNE, 2, 1,
-          ["Salle à manger", "Nourriture (pas)"],
-          {"+Pas": 70}),
-    Piece("Cafeteria", C_JAUNE, 2, 1,
-          ["Cafétéria", "Beaucoup de nourriture"],
-          {"+Pas": 80, "Gemmes": 10}),
-
-    # ----- Autres bleues -----
-    Piece("Archives", C_BLEU, 2, 1,
-          ["Archives", "Clés et gemmes"],
-          {"Clé": 25, "Gemmes": 20}),
-    Piece("Aquarium", C_BLEU, 2, 1,
-          ["Aquarium", "Objets sous l'eau"],
-          {"Gemmes": 25, "Clé": 10}),
-    Piece("Observatory", C_BLEU, 3, 2,
-          ["Observatoire", "Bonus variés"],
-          {"Gemmes": 30, "Clé": 15, "+Pas": 20}),
-    Piece("Chapel", C_BLEU, 2, 1,
-          ["Chapelle", "Petit bonus de pas"],
-          {"+Pas": 30, "Gemmes": 10}),
-
-    # ----- Objectif -----
-    Piece("Antechamber", C_BLEU, 3, 0,
-          ["Dernière pièce", "But du jeu"],
-          {"Gemmes": 0}),
-]
-
-# ------------------ Grille & Portes ------------------
-GRID_W, GRID_H = 5, 9  # 5 colonnes, 9 rangées (0 = haut)
-
-def niveau_verrou_pour_ligne(y: int) -> int:
-    """
-    - dernière rangée (bas, y==GRID_H-1) : niveau 0 uniquement
-    - première rangée (haut, y==0)       : niveau 2 uniquement
-    - autres : probas intermédiaires (plus on monte, plus 1/2 apparaissent)
-    """
-    if y == GRID_H - 1:
-        return 0
-    if y == 0:
-        return 2
-    base = [0, 1, 2]
-    dist_top = (GRID_H - 1) - y
-    w0 = max(1, 5 - dist_top)
-    w1 = max(1, 1 + dist_top)
-    w2 = max(1, dist_top // 2 + 1)
-    return random.choices(base, weights=[w0, w1, w2], k=1)[0]
-
-@dataclass
-class Cellule:
-    piece: Optional[Piece] = None
-    decouverte: bool = False
-    portes: Dict[str, int] = field(default_factory=lambda: {"N": 0, "E": 0, "S": 0, "W": 0})
-    portes_existent: Dict[str, bool] = field(default_factory=lambda: {"N": False, "E": False, "S": False, "W": False})
-    has_coffre: bool = False
-    has_trou: bool = False
-    has_casier: bool = False
-    is_shop: bool = False
-    pickables: List[Dict] = field(default_factory=list)
-    loot_genere: bool = False
+# ------------------ Icônes des pièces ------------------
+# Remplies en tâche de fond ; une pièce sans icône garde sa tuile de couleur.
+ROOM_IMAGES: Dict[str, pygame.Surface] = {}
+chargeur_images = ChargeurImages(ROOM_IMAGES)
+# Icônes à la taille des cases et des cartes (vidé si la résolution ou la grille change)
+cache_icones = CacheIcones(ROOM_IMAGES)
+
+def charger_images_pieces():
+    """Lance le chargement des icônes du manifeste (images.py) sans bloquer."""
+    chargeur_images.demarrer(p.nom for p in PIECES_MODELES)
+
 
 # ------------------ Panneaux ------------------
 class Panneau:
@@ -428,6 +201,9 @@ class PanneauPermanents(Panneau):
     def __init__(self, rect: pygame.Rect, inv: Inventaire):
         super().__init__(rect, "Objets permanents")
         self.inv = inv
+    def signature(self):
+        i = self.inv
+        return (i.pelle, i.marteau, i.kit_crochetage, i.detecteur_metaux, i.patte_lapin)
     def dessiner(self, surf: pygame.Surface):
         super().dessiner(surf)
         y = self.rect.y + 56
@@ -447,6 +223,9 @@ class PanneauInventaire(Panneau):
     def __init__(self, rect: pygame.Rect, inv: Inventaire):
         super().__init__(rect, "Inventaire")
         self.inv = inv
+    def signature(self):
+        i = self.inv
+        return (i.pas, i.or_, i.gemmes, i.cles, i.des, tuple(i.autres_objets.items())[:10])
     def dessiner(self, surf: pygame.Surface):
         super().dessiner(surf)
         y = self.rect.y + 56
@@ -467,169 +246,368 @@ class MessageBar:
     def show(self, txt: str, sec=2.0):
         self.msg = txt
         self.timer = sec
+    def show_many(self, msgs: List[Tuple[str, float]]):
+        """Affiche les messages renvoyés par GameState.step (le dernier reste visible)."""
+        for txt, sec in msgs:
+            self.show(txt, sec)
     def update(self, dt: float):
         if self.timer > 0:
             self.timer = max(0.0, self.timer - dt)
+    def zone(self) -> pygame.Rect:
+        return pygame.Rect(GAUCHE_W, int(HAUTEUR * 0.92), CENTRE_W, 50)
+    def signature(self):
+        return self.msg if self.timer > 0 and self.msg else None
     def draw(self, surf: pygame.Surface):
         if self.timer <= 0 or not self.msg:
             return
-        bar = pygame.Rect(GAUCHE_W, int(HAUTEUR * 0.92), CENTRE_W, 50)
+        bar = self.zone()
         pygame.draw.rect(surf, (24, 24, 34), bar)
         pygame.draw.rect(surf, (60, 60, 80), bar, 2)
         texte(surf, self.msg, (bar.centerx, bar.centery), 22, COULEUR_TEXTE, centre=True)
 
 # ------------------ Plateau (grille au centre) ------------------
+# Caméra : taille de case en pixels quand la grille entière ne tient pas dans le panneau
+ZOOM_MIN, ZOOM_MAX = 16, 200
+ZOOM_DEFAUT = 64
+TAILLE_AJUSTEE_MIN = 40     # en dessous, on zoome au lieu d'afficher toute la grille
+
 class Plateau:
-    def __init__(self, rect: pygame.Rect, inv: Inventaire):
+    """
+    Vue de la grille : lit l'état de la partie, ne le modifie jamais.
+    Caméra : grille entière ajustée au panneau (zoom None) ou cases carrées de
+    `zoom` pixels avec défilement ; seules les cases visibles sont dessinées.
+    Molette / + / - : zoom, glisser (clic gauche) : défiler, 0 : vue ajustée.
+    """
+    def __init__(self, rect: pygame.Rect, etat: GameState):
         self.rect = rect
-        self.inv = inv
-        self.grid: List[List[Cellule]] = [[Cellule() for _ in range(GRID_H)] for _ in range(GRID_W)]
-        # Joueur : centre en bas
-        self.x = GRID_W // 2
-        self.y = GRID_H - 1
-        # Curseur VISITE (flèches)
-        self.vx = self.x
-        self.vy = self.y
-        # Cellule de départ
-        start = self.grid[self.x][self.y]
-        start.decouverte = True
-        start.piece = Piece("Entrée", C_BLEU, 1, 0, ["Départ"], {"Divers": 100})
-        self._init_portes()
-        # Entrée : 3 portes N/E/W
-        start.portes_existent = {"N": True, "E": True, "S": False, "W": True}
-        self.dirs = ["N", "E", "S", "W"]
-        self.dir_idx = 0
-
-    def _init_portes(self):
-        for gx in range(GRID_W):
-            for gy in range(GRID_H):
-                c = self.grid[gx][gy]
-                c.portes = {d: niveau_verrou_pour_ligne(gy) for d in ["N", "E", "S", "W"]}
-                c.portes_existent = {"N": False, "E": False, "S": False, "W": False}
-        # Limites hors-grille
-        for gx in range(GRID_W):
-            self.grid[gx][0].portes["N"] = 0
-            self.grid[gx][GRID_H - 1].portes["S"] = 2
-        for gy in range(GRID_H):
-            self.grid[0][gy].portes["W"] = 0
-            self.grid[GRID_W - 1][gy].portes["E"] = 0
-
-    def changer_direction(self, dx: int):
-        self.dir_idx = (self.dir_idx + dx) % 4
-
-    def direction(self) -> str:
-        return self.dirs[self.dir_idx]
-
-    def deplacement_possible(self, d: str) -> bool:
-        nx, ny = self.x, self.y
-        if d == "N": ny -= 1
-        if d == "S": ny += 1
-        if d == "W": nx -= 1
-        if d == "E": nx += 1
-        if nx < 0 or nx >= GRID_W or ny < 0 or ny >= GRID_H:
-            return False
-        if not self.grid[self.x][self.y].portes_existent.get(d, False):
-            return False
-        return True
-
-    def niveau_verrou_direction(self, d: str) -> int:
-        return self.grid[self.x][self.y].portes[d]
-
-    def dessiner(self, surf: pygame.Surface):
-        pygame.draw.rect(surf, (12, 12, 18), self.rect)
-        pygame.draw.rect(surf, (50, 50, 70), self.rect, 2)
+        self.etat = etat
+        # Couche statique pré-rendue + sprites (curseurs, onglets)
+        self._statique: Optional[pygame.Surface] = None
+        self._cle_statique = None
+        self._sprites = Atlas((512, 512))
+        self._taille_sprites: Optional[Tuple[int, int]] = None
+        # Caméra : coin haut-gauche de la vue en pixels « monde »
+        self.zoom: Optional[int] = None
+        self.cam = [0, 0]
+        self._suivi = None
+        self._glisse = False
+        # Voyage rapide (touche T) : case visée, None hors de ce mode
+        self.cible_voyage: Optional[Tuple[int, int]] = None
+        if min(self._taille_ajustee()) < TAILLE_AJUSTEE_MIN:
+            self.zoom = ZOOM_DEFAUT
+
+    def signature(self):
+        self._suivre_joueur()
+        e = self.etat
+        return (e.revision, e.x, e.y, e.vx, e.vy, e.dir_idx, self.zoom, tuple(self.cam), self.cible_voyage,
+                chargeur_images.generation)
+
+    # ---------- caméra ----------
+    def _vue(self) -> pygame.Rect:
+        """Zone de la grille, en coordonnées locales au plateau (sous elle : l'aide)."""
         margin = 30
-        gw = self.rect.w - 2 * margin
-        gh = self.rect.h - 2 * margin - 80
-        cw = gw // GRID_W
-        ch = gh // GRID_H
-        origin = (self.rect.x + margin, self.rect.y + margin)
-
-        # cellules
-        for gx in range(GRID_W):
-            for gy in range(GRID_H):
-                r = pygame.Rect(origin[0] + gx * cw + 4, origin[1] + gy * ch + 4, cw - 8, ch - 8)
-                cell = self.grid[gx][gy]
+        return pygame.Rect(margin, margin, self.rect.w - 2 * margin, self.rect.h - 2 * margin - 80)
+
+    def _taille_ajustee(self) -> Tuple[int, int]:
+        vue = self._vue()
+        g = self.etat.grille
+        return vue.w // g.largeur, vue.h // g.hauteur
+
+    def _geometrie(self) -> Tuple[int, int, Tuple[int, int]]:
+        """Taille d'une case et origine de la grille, en coordonnées locales au plateau."""
+        vue = self._vue()
+        if self.zoom is None:
+            cw, ch = self._taille_ajustee()
+        else:
+            cw = ch = self.zoom
+        return cw, ch, (vue.x - self.cam[0], vue.y - self.cam[1])
+
+    def _borner_camera(self):
+        vue = self._vue()
+        cw, ch, _ = self._geometrie()
+        g = self.etat.grille
+        self.cam[0] = max(0, min(self.cam[0], g.largeur * cw - vue.w))
+        self.cam[1] = max(0, min(self.cam[1], g.hauteur * ch - vue.h))
+
+    def centrer(self, x: int, y: int):
+        vue = self._vue()
+        cw, ch, _ = self._geometrie()
+        self.cam = [x * cw + cw // 2 - vue.w // 2, y * ch + ch // 2 - vue.h // 2]
+        self._borner_camera()
+
+    def _suivre_joueur(self):
+        """Recentre la vue quand le joueur (ou le curseur de visite) sort du champ."""
+        e = self.etat
+        pos = (e.x, e.y, e.vx, e.vy, self.cible_voyage)
+        if pos == self._suivi:
+            return
+        self._suivi = pos
+        vue = self._vue()
+        cw, ch, (ox, oy) = self._geometrie()
+        for x, y in ((e.x, e.y), (e.vx, e.vy)) + ((self.cible_voyage,) if self.cible_voyage else ()):
+            r = pygame.Rect(ox + x * cw, oy + y * ch, cw, ch)
+            if not vue.contains(r):
+                self.centrer(x, y)
+
+    def zoomer(self, facteur: float, centre: Optional[Tuple[int, int]] = None):
+        """Change la taille des cases en gardant fixe le point `centre` (local à la vue)."""
+        vue = self._vue()
+        cw, ch, _ = self._geometrie()
+        if centre is None:
+            centre = (vue.w // 2, vue.h // 2)
+        mx, my = (self.cam[0] + centre[0]) / cw, (self.cam[1] + centre[1]) / ch
+        taille = max(ZOOM_MIN, min(ZOOM_MAX, int(round(min(cw, ch) * facteur))))
+        if taille == min(cw, ch) and self.zoom is not None:
+            return
+        self.zoom = taille
+        self.cam = [int(mx * taille) - centre[0], int(my * taille) - centre[1]]
+        self._borner_camera()
+
+    def vue_ajustee(self):
+        if min(self._taille_ajustee()) >= TAILLE_AJUSTEE_MIN:
+            self.zoom = None
+            self.cam = [0, 0]
+        else:
+            self.centrer(self.etat.x, self.etat.y)
+
+    def gerer_voyage(self, e: pygame.event.Event) -> Optional[Tuple]:
+        """
+        Mode voyage rapide : flèches / ZQSD déplacent la case visée, OK renvoie
+        l'action ("voyager", x, y), Échap ou T quittent le mode.
+        """
+        if e.type != pygame.KEYDOWN:
+            return None
+        tx, ty = self.cible_voyage
+        g = self.etat.grille
+        if e.key in TOUCHE_OKS:
+            self.cible_voyage = None
+            return ("voyager", tx, ty)
+        if e.key in (pygame.K_ESCAPE, pygame.K_t):
+            self.cible_voyage = None
+            return None
+        d = FLECHES.get(e.key)
+        if d is None:
+            d = "N" if e.key in KEY_UPS else "S" if e.key in KEY_DOWNS else \
+                "W" if e.key in KEY_LEFTS else "E" if e.key in KEY_RIGHTS else None
+        if d is not None:
+            nx, ny = tx + DELTAS[d][0], ty + DELTAS[d][1]
+            if 0 <= nx < g.largeur and 0 <= ny < g.hauteur:
+                self.cible_voyage = (nx, ny)
+        return None
+
+    def gerer_evenement(self, e: pygame.event.Event) -> bool:
+        """Zoom / défilement ; renvoie True si l'événement est consommé."""
+        vue = self._vue().move(self.rect.topleft)
+        if e.type == pygame.MOUSEWHEEL:
+            mx, my = pygame.mouse.get_pos()
+            if vue.collidepoint(mx, my):
+                self.zoomer(1.25 ** e.y, (mx - vue.x, my - vue.y))
+                return True
+        elif e.type == pygame.MOUSEBUTTONDOWN and e.button == 1 and vue.collidepoint(e.pos):
+            self._glisse = True
+            return True
+        elif e.type == pygame.MOUSEBUTTONUP and e.button == 1 and self._glisse:
+            self._glisse = False
+            return True
+        elif e.type == pygame.MOUSEMOTION and self._glisse:
+            if self.zoom is not None:
+                self.cam[0] -= e.rel[0]
+                self.cam[1] -= e.rel[1]
+                self._borner_camera()
+            return True
+        elif e.type == pygame.KEYDOWN:
+            if e.key in (pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_EQUALS):
+                self.zoomer(1.25)
+                return True
+            if e.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.zoomer(0.8)
+                return True
+            if e.key in (pygame.K_0, pygame.K_KP0):
+                self.vue_ajustee()
+                return True
+        return False
+
+    # ---------- rendu ----------
+    def _cases_visibles(self) -> Tuple[range, range]:
+        vue = self._vue()
+        cw, ch, _ = self._geometrie()
+        g = self.etat.grille
+        x0, y0 = self.cam[0] // cw, self.cam[1] // ch
+        x1 = min(g.largeur, (self.cam[0] + vue.w) // cw + 1)
+        y1 = min(g.hauteur, (self.cam[1] + vue.h) // ch + 1)
+        return range(max(0, x0), x1), range(max(0, y0), y1)
+
+    def _couche_statique(self) -> pygame.Surface:
+        """
+        Fond, cases visibles et textes d'aide pré-rendus hors écran.
+        Reconstruit seulement quand la grille change (revision), la caméra, la taille du
+        plateau ou qu'une icône arrive.
+        """
+        cw, ch, origin = self._geometrie()
+        cle = (self.etat.revision, self.rect.size, cw, ch, tuple(self.cam), chargeur_images.generation)
+        if self._statique is not None and self._cle_statique == cle:
+            return self._statique
+        if self._statique is None or self._statique.get_size() != self.rect.size:
+            self._statique = pygame.Surface(self.rect.size)
+        surf = self._statique
+        local = surf.get_rect()
+        pygame.draw.rect(surf, (12, 12, 18), local)
+        pygame.draw.rect(surf, (50, 50, 70), local, 2)
+        grille = self.etat.grille
+
+        # petites cases : marges et arrondis réduits
+        marge = 4 if min(cw, ch) >= 48 else max(1, min(cw, ch) // 12)
+        rayon = 10 if min(cw, ch) >= 48 else min(cw, ch) // 5
+        surf.set_clip(self._vue())
+        xs, ys = self._cases_visibles()
+        icones = []
+        for gy in ys:
+            for gx in xs:
+                i = grille.indice(gx, gy)
+                r = pygame.Rect(origin[0] + gx * cw + marge, origin[1] + gy * ch + marge,
+                                cw - 2 * marge, ch - 2 * marge)
+                piece = grille.pieces[i]
                 col = (28, 28, 40)
-                if cell.decouverte and cell.piece:
-                    base = cell.piece.couleur
+                if grille.a(i, DECOUVERTE) and piece:
+                    base = piece.couleur
                     col = (max(0, base[0] - 40), max(0, base[1] - 40), max(0, base[2] - 40))
-                    pygame.draw.rect(surf, col, r, border_radius=10)
-                    pygame.draw.rect(surf, cell.piece.couleur, r, 3, border_radius=10)
+                    icone = cache_icones.icone(piece.nom, r.size)
+                    if icone is not None:
+                        icones.append((icone, r.topleft))
+                    else:
+                        pygame.draw.rect(surf, col, r, border_radius=rayon)
+                    pygame.draw.rect(surf, piece.couleur, r, 3 if marge >= 4 else 1, border_radius=rayon)
                 else:
-                    pygame.draw.rect(surf, col, r, border_radius=10)
-                    pygame.draw.rect(surf, (60, 60, 80), r, 1, border_radius=10)
+                    pygame.draw.rect(surf, col, r, border_radius=rayon)
+                    pygame.draw.rect(surf, (60, 60, 80), r, 1, border_radius=rayon)
+        # icônes : un seul Surface.blits depuis l'atlas de cette taille de case
+        dessiner_lot(surf, icones)
+        surf.set_clip(None)
+
+        aide1 = "ZQSD/WASD = choisir porte  |  Espace/Entrée = OK  |  R = relancer (dé)"
+        aide2 = "Flèches = visiter rooms découvertes  |  T voyage  |  C creuser  O coffre  L casier  B boutique"
+        texte(surf, aide1, (local.centerx, local.bottom - 50), 18, COULEUR_MUTE, centre=True)
+        texte(surf, aide2, (local.centerx, local.bottom - 28), 18, COULEUR_MUTE, centre=True)
+
+        self._cle_statique = cle
+        return surf
+
+    def _sprite(self, cle: Tuple) -> Poignee:
+        """Curseurs et onglets de portes, rendus une fois par taille de case et rangés dans l'atlas."""
+        s = self._sprites.get(cle)
+        if s is not None:
+            return s
+        genre = cle[0]
+        if genre == "joueur":
+            _, w, h = cle
+            s = pygame.Surface((w, h), pygame.SRCALPHA)
+            pygame.draw.rect(s, COULEUR_ACCENT, s.get_rect(), 4 if min(w, h) >= 24 else 2,
+                             border_radius=min(12, min(w, h) // 4))
+            if h >= 30:
+                texte(s, "Vous", (w // 2, h // 2), 18, COULEUR_TEXTE, centre=True)
+        elif genre == "visite":
+            # pointillés : les segments dépassent de 5 px comme les lignes d'origine
+            _, w, h = cle
+            s = pygame.Surface((w + 6, h + 6), pygame.SRCALPHA)
+            for i in range(0, w, 10):
+                pygame.draw.line(s, (200, 200, 200), (i, 0), (i + 5, 0), 1)
+                pygame.draw.line(s, (200, 200, 200), (i, h), (i + 5, h), 1)
+            for j in range(0, h, 10):
+                pygame.draw.line(s, (200, 200, 200), (0, j), (0, j + 5), 1)
+                pygame.draw.line(s, (200, 200, 200), (w, j), (w, j + 5), 1)
+        else:
+            # onglet : ("onglet", w, h, couleur, selectionne), marge de 3 px pour le contour
+            _, w, h, couleur, sel = cle
+            s = pygame.Surface((w + 6, h + 6), pygame.SRCALPHA)
+            pygame.draw.rect(s, couleur, pygame.Rect(3, 3, w, h))
+            if sel:
+                pygame.draw.rect(s, COULEUR_ACCENT, s.get_rect(), 2)
+        return self._sprites.ajouter(cle, s)
+
+    def dessiner(self, surf: pygame.Surface):
+        e = self.etat
+        surf.blit(self._couche_statique(), self.rect.topleft)
+        cw, ch, (ox, oy) = self._geometrie()
+        if (cw, ch) != self._taille_sprites:
+            # nouvelle taille de case (zoom) : les sprites de l'ancienne ne resserviront pas
+            self._sprites.vider()
+            self._taille_sprites = (cw, ch)
+        ox += self.rect.x
+        oy += self.rect.y
+        clip_avant = surf.get_clip()
+        surf.set_clip(clip_avant.clip(self._vue().move(self.rect.topleft).inflate(12, 12)))
+
+        # sprites tirés de l'atlas, dessinés en un lot
+        lot = []
 
         # curseur joueur
-        rcur = pygame.Rect(origin[0] + self.x * cw + 4, origin[1] + self.y * ch + 4, cw - 8, ch - 8)
-        pygame.draw.rect(surf, COULEUR_ACCENT, rcur, 4, border_radius=12)
-        texte(surf, "Vous", (rcur.centerx, rcur.centery), 18, COULEUR_TEXTE, centre=True)
+        m = 4 if min(cw, ch) >= 48 else max(1, min(cw, ch) // 12)
+        rcur = pygame.Rect(ox + e.x * cw + m, oy + e.y * ch + m, cw - 2 * m, ch - 2 * m)
+        lot.append((self._sprite(("joueur", rcur.w, rcur.h)), rcur.topleft))
 
         # curseur VISITE
-        if not (self.vx == self.x and self.vy == self.y):
-            rview = pygame.Rect(origin[0] + self.vx * cw + 6, origin[1] + self.vy * ch + 6, cw - 12, ch - 12)
-            for i in range(rview.x, rview.x + rview.w, 10):
-                pygame.draw.line(surf, (200, 200, 200), (i, rview.y), (i + 5, rview.y), 1)
-                pygame.draw.line(surf, (200, 200, 200), (i, rview.bottom), (i + 5, rview.bottom), 1)
-            for j in range(rview.y, rview.y + rview.h, 10):
-                pygame.draw.line(surf, (200, 200, 200), (rview.x, j), (rview.x, j + 5), 1)
-                pygame.draw.line(surf, (200, 200, 200), (rview.right, j), (rview.right, j + 5), 1)
+        if not (e.vx == e.x and e.vy == e.y):
+            rview = pygame.Rect(ox + e.vx * cw + 6, oy + e.vy * ch + 6, cw - 12, ch - 12)
+            lot.append((self._sprite(("visite", rview.w, rview.h)), rview.topleft))
 
         # onglets de portes
+        lg = min(40, rcur.w // 2, rcur.h // 2)
+        ep = min(6, max(2, min(cw, ch) // 10))
         tabs = {
-            "N": pygame.Rect(rcur.centerx - 20, rcur.y - 6, 40, 6),
-            "S": pygame.Rect(rcur.centerx - 20, rcur.bottom, 40, 6),
-            "W": pygame.Rect(rcur.x - 6, rcur.centery - 20, 6, 40),
-            "E": pygame.Rect(rcur.right, rcur.centery - 20, 6, 40),
+            "N": pygame.Rect(rcur.centerx - lg // 2, rcur.y - ep, lg, ep),
+            "S": pygame.Rect(rcur.centerx - lg // 2, rcur.bottom, lg, ep),
+            "W": pygame.Rect(rcur.x - ep, rcur.centery - lg // 2, ep, lg),
+            "E": pygame.Rect(rcur.right, rcur.centery - lg // 2, ep, lg),
         }
         for d, rr in tabs.items():
-            nx, ny = self.x, self.y
-            if d == "N": ny -= 1
-            if d == "S": ny += 1
-            if d == "W": nx -= 1
-            if d == "E": nx += 1
-            if nx < 0 or nx >= GRID_W or ny < 0 or ny >= GRID_H:
+            if not e.deplacement_possible(d):
                 continue
-            if not self.grid[self.x][self.y].portes_existent.get(d, False):
-                continue
-            ouverte = self.grid[nx][ny].decouverte and self.grid[nx][ny].piece is not None
+            j = e.grille.voisins[e.ici()][d]
+            ouverte = e.grille.a(j, DECOUVERTE) and e.grille.pieces[j] is not None
             if ouverte:
                 base = (255, 255, 255)
             else:
-                lvl = self.niveau_verrou_direction(d)
+                lvl = e.niveau_verrou_direction(d)
                 base = (120, 200, 140) if lvl == 0 else (230, 180, 90) if lvl == 1 else (220, 100, 100)
-            pygame.draw.rect(surf, base, rr)
-            if d == self.direction():
-                pygame.draw.rect(surf, COULEUR_ACCENT, rr.inflate(6, 6), 2)
-
-        aide1 = "ZQSD/WASD = choisir porte  |  Espace/Entrée = OK  |  R = relancer (dé)"
-        aide2 = "Flèches = visiter rooms découvertes  |  C creuser  O coffre  L casier  B boutique"
-        texte(surf, aide1, (self.rect.centerx, self.rect.bottom - 50), 18, COULEUR_MUTE, centre=True)
-        texte(surf, aide2, (self.rect.centerx, self.rect.bottom - 28), 18, COULEUR_MUTE, centre=True)
+            lot.append((self._sprite(("onglet", rr.w, rr.h, base, d == e.direction())), (rr.x - 3, rr.y - 3)))
+
+        # voyage rapide : case visée et coût en pas
+        if self.cible_voyage is not None:
+            tx, ty = self.cible_voyage
+            rc = pygame.Rect(ox + tx * cw + 6, oy + ty * ch + 6, cw - 12, ch - 12)
+            lot.append((self._sprite(("visite", rc.w, rc.h)), rc.topleft))
+        dessiner_lot(surf, lot)
+        if self.cible_voyage is not None:
+            d = e.distance_vers(tx, ty)
+            info = "inaccessible" if d is None else f"{d} pas"
+            texte(surf, info, (rc.centerx, rc.bottom - 12), 18, COULEUR_TEXTE, centre=True)
+        surf.set_clip(clip_avant)
 
 # ------------------ Overlay tirage de pièces ------------------
 class TiragePieces:
-    def __init__(self, rect: pygame.Rect, inv: Inventaire):
+    """Overlay du tirage : sélection d'une des 3 cartes de GameState.choix."""
+    def __init__(self, rect: pygame.Rect, etat: GameState):
         self.rect = rect
-        self.inv = inv
+        self.etat = etat
+        self.inv = etat.inv
         self.visible = False
-        self.choix: List[Piece] = []
         self.idx = 0
-        self.nb_dirs_max = 4
-
-    def _pondere(self, p: Piece) -> int:
-        base = {1: 60, 2: 30, 3: 10}[p.rarete]
-        if self.inv.patte_lapin:
-            base += 5
-        return max(1, base)
-
-    def generer(self):
-        pool = PIECES_MODELES
-        self.choix = random.choices(pool, weights=[self._pondere(p) for p in pool], k=3)
-        if all(p.cout_gemmes > 0 for p in self.choix):
-            zero = [p for p in pool if p.cout_gemmes == 0]
-            if zero:
-                self.choix[0] = random.choice(zero)
+
+    @property
+    def choix(self) -> List[Piece]:
+        return self.etat.choix
+
+    @property
+    def nb_dirs_max(self) -> int:
+        return self.etat.nb_dirs_max
+
+    def signature(self):
+        if not self.visible:
+            return None
+        return (self.idx, tuple(p.nom for p in self.choix), self.nb_dirs_max, self.inv.gemmes, self.inv.des,
+                chargeur_images.generation)
+
+    def ouvrir(self):
         self.idx = 0
         self.visible = True
 
@@ -644,16 +622,14 @@ class TiragePieces:
             elif e.key in TOUCHE_OKS or e.key == TOUCHE_RETOUR:
                 self.visible = False
             elif e.key == pygame.K_r and self.inv.des > 0:
-                self.inv.des -= 1
-                self.generer()
+                self.etat.step(("relancer",))
+                self.idx = 0
 
     def dessiner(self, surf: pygame.Surface):
         if not self.visible:
             return
 
-        dim = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
-        dim.fill((0, 0, 0, 180))
-        surf.blit(dim, (0, 0))
+        voiles.assombrir(surf, 180)
 
         zone = pygame.Rect(GAUCHE_W, 40, CENTRE_W, int(HAUTEUR * 0.6))
         texte(
@@ -684,11 +660,18 @@ class TiragePieces:
                 y += 22
 
             y_info = card.bottom - 96
+            # icône entre les effets et les informations
+            cote = min(card.w - 36, y_info - 12 - (card.y + 126))
+            icone = cache_icones.icone(p.nom, (cote, cote))
+            if icone is not None:
+                page, zone_icone = icone
+                dest = pygame.Rect((0, 0), zone_icone.size)
+                dest.center = (card.centerx, (card.y + 120 + y_info - 6) // 2)
+                surf.blit(page, dest, zone_icone)
             rect_info = pygame.Rect(card.x, y_info - 6, card.w, 90)
             pygame.draw.rect(surf, (20, 20, 30), rect_info)
 
-            n_portes_theo = nb_portes_theoriques(p)
-            n_portes = min(n_portes_theo, self.nb_dirs_max)
+            n_portes = min(p.nb_portes, self.nb_dirs_max)
             texte(
                 surf,
                 f"Portes disponibles : {n_portes}",
@@ -747,23 +730,19 @@ class ShopOverlay:
     - On la ferme avec Echap / TOUCHE_RETOUR / B.
     """
 
-    def __init__(self, rect: pygame.Rect, inv: Inventaire, messages: "MessageBar"):
+    def __init__(self, rect: pygame.Rect, etat: GameState, messages: "MessageBar"):
         self.rect = rect
-        self.inv = inv
+        self.etat = etat
+        self.inv = etat.inv
         self.messages = messages
         self.visible = False
         self.idx = 0
+        self.items = BOUTIQUE_ARTICLES
 
-        # Prix en or, objets consommables et permanents
-        self.items = [
-            {"nom": "Petit repas (+10 pas)",  "prix": 5,  "objet": "Repas"},
-            {"nom": "Grand repas (+25 pas)",  "prix": 10, "objet": "Repas"},
-            {"nom": "Dé supplémentaire",      "prix": 8,  "gain_de": 1},
-            {"nom": "Clé supplémentaire",     "prix": 6,  "gain_cle": 1},
-            {"nom": "Gemmes (+1)",            "prix": 7,  "gain_gemme": 1},
-            {"nom": "Pelle (objet permanent)",        "prix": 15, "permanent": "Pelle"},
-            {"nom": "Patte de lapin (objet permanent)", "prix": 20, "permanent": "Patte de lapin"},
-        ]
+    def signature(self):
+        if not self.visible:
+            return None
+        return (self.idx, self.inv.or_, self.inv.gemmes)
 
     def ouvrir(self):
         self.visible = True
@@ -785,32 +764,7 @@ class ShopOverlay:
                 self.idx = (self.idx + 1) % len(self.items)
 
             elif e.key in TOUCHE_OKS:
-                item = self.items[self.idx]
-                prix = item["prix"]
-
-                if self.inv.or_ < prix:
-                    self.messages.show("Pas assez d'or pour acheter cet objet.")
-                    return
-
-                self.inv.or_ -= prix
-
-                # Effets directs
-                if "gain_de" in item:
-                    self.inv.des += item["gain_de"]
-                if "gain_cle" in item:
-                    self.inv.cles += item["gain_cle"]
-                if "gain_gemme" in item:
-                    self.inv.gemmes += item["gain_gemme"]
-
-                # Objet consommable : stocké, pas consommé
-                if "objet" in item:
-                    self.inv.ajouter_autre_objet(item["objet"])
-
-                # Objet permanent
-                if "permanent" in item:
-                    self.inv.ajouter_objet_permanent(item["permanent"])
-
-                self.messages.show(f"Acheté : {item['nom']}")
+                self.messages.show_many(self.etat.step(("acheter", self.idx)))
 
             elif e.key == TOUCHE_RETOUR or e.key == pygame.K_ESCAPE or e.key == pygame.K_b:
                 self.fermer()
@@ -819,9 +773,7 @@ class ShopOverlay:
         if not self.visible:
             return
 
-        dim = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
-        dim.fill((0, 0, 0, 180))
-        surf.blit(dim, (0, 0))
+        voiles.assombrir(surf, 180)
 
         zone = pygame.Rect(
             self.rect.x + 40,
@@ -904,13 +856,19 @@ class UseItemOverlay:
     - Visible quand self.visible == True
     - Contrôles : ↑/↓ pour choisir, Entrée pour consommer, Échap pour fermer.
     """
-    def __init__(self, rect: pygame.Rect, inv: Inventaire, messages: "MessageBar"):
+    def __init__(self, rect: pygame.Rect, etat: GameState, messages: "MessageBar"):
         self.rect = rect
-        self.inv = inv
+        self.etat = etat
+        self.inv = etat.inv
         self.messages = messages
         self.visible = False
         self.selection = 0
 
+    def signature(self):
+        if not self.visible:
+            return None
+        return (self.selection, tuple(self.inv.autres_objets.items()))
+
     def toggle(self):
         if self.visible:
             self.visible = False
@@ -928,16 +886,15 @@ class UseItemOverlay:
                 self.messages.show("Aucun objet à consommer.")
                 self.visible = False
                 return
+            # la liste raccourcit quand le dernier exemplaire d'un objet est consommé
+            self.selection = min(self.selection, len(noms) - 1)
 
             if e.key in KEY_UPS:
                 self.selection = (self.selection - 1) % len(noms)
             elif e.key in KEY_DOWNS:
                 self.selection = (self.selection + 1) % len(noms)
             elif e.key in TOUCHE_OKS:
-                nom = noms[self.selection]
-                self.inv.consommer_autre_objet(nom, self.messages)
-                if self.inv.autres_objets.get(nom, 0) <= 0:
-                    self.inv.autres_objets.pop(nom, None)
+                self.messages.show_many(self.etat.step(("consommer", noms[self.selection])))
                 if not self.inv.autres_objets:
                     self.visible = False
             elif e.key == pygame.K_ESCAPE:
@@ -947,9 +904,7 @@ class UseItemOverlay:
         if not self.visible:
             return
 
-        dim = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
-        dim.fill((0, 0, 0, 160))
-        surf.blit(dim, (0, 0))
+        voiles.assombrir(surf, 160)
 
         pygame.draw.rect(surf, (25, 25, 40), self.rect)
         pygame.draw.rect(surf, (120, 120, 200), self.rect, 2)
@@ -976,515 +931,600 @@ class UseItemOverlay:
             centre=True,
         )
 
+# ------------------ Rendu retenu (rectangles sales) ------------------
+class Calque:
+    """
+    Un élément de l'écran : la zone qu'il occupe, une fonction qui résume son état
+    (signature) et sa fonction de dessin. Le calque est sale quand la signature change.
+    """
+    _JAMAIS = object()
 
-def run_blue_prince_loop(w, h, fullscreen, scene_jeu=None):
+    def __init__(self, nom: str, zone, signature, dessiner):
+        self.nom = nom
+        self.zone = zone            # pygame.Rect, ou None = plein écran
+        self.signature = signature
+        self.dessiner = dessiner
+        self.derniere = Calque._JAMAIS
 
-    # 1) Charger les images une fois
-    charger_images_pieces()
+class RenduRetenu:
+    """
+    Ne redessine que les zones dont un calque a changé d'état.
+    Chaque zone sale est redessinée (avec clipping) par tous les calques qui la
+    recouvrent, dans l'ordre d'empilement ; dessiner() renvoie les rectangles à
+    passer à pygame.display.update().
+    """
+    def __init__(self, calques: List[Calque]):
+        self.calques = calques
+        self._taille = None
+        self.chrono: Optional["ChronoImages"] = None   # temps par calque si renseigné
+
+    def tout_invalider(self):
+        for c in self.calques:
+            c.derniere = Calque._JAMAIS
+
+    def dessiner(self, surf: pygame.Surface) -> List[pygame.Rect]:
+        ecran = surf.get_rect()
+        if self._taille != ecran.size:
+            self._taille = ecran.size
+            self.tout_invalider()
+
+        sales: List[pygame.Rect] = []
+        for c in self.calques:
+            sig = c.signature()
+            if sig != c.derniere:
+                c.derniere = sig
+                zone = ecran if c.zone is None else c.zone.clip(ecran)
+                if zone.size == ecran.size:
+                    sales = [ecran]
+                    break
+                sales.append(zone)
+        if not sales:
+            return []
+
+        # fusion des zones qui se chevauchent
+        fusion: List[pygame.Rect] = []
+        for r in sales:
+            for i, f in enumerate(fusion):
+                if f.colliderect(r):
+                    fusion[i] = f.union(r)
+                    break
+            else:
+                fusion.append(r)
+
+        if fusion[0].size == ecran.size:
+            # état à jour pour les calques non encore consultés
+            for c in self.calques:
+                c.derniere = c.signature()
+
+        clip_avant = surf.get_clip()
+        chrono = self.chrono
+        for r in fusion:
+            surf.set_clip(r)
+            for c in self.calques:
+                if c.zone is None or c.zone.colliderect(r):
+                    if chrono is None:
+                        c.dessiner(surf)
+                    else:
+                        t = time.perf_counter()
+                        c.dessiner(surf)
+                        chrono.ajouter(c.nom, time.perf_counter() - t)
+        surf.set_clip(clip_avant)
+        return fusion
+
+
+# ------------------ Temps par image (F3 : graphe, F4 : export CSV) ------------------
+PHASES_BOUCLE = ("evenements", "update", "dessiner", "affichage")
+COULEURS_PHASES = {
+    "evenements": (120, 200, 255),
+    "update": (140, 220, 140),
+    "dessiner": (240, 190, 90),
+    "affichage": (220, 120, 200),
+}
 
-    # 2) Créer la scène si pas existante
-    if scene_jeu is None:
-        scene_jeu = SceneJeu(w, h, fullscreen)
+class ChronoImages:
+    """
+    Temps passés dans chaque phase de la boucle et dans chaque calque, pour les
+    `capacite` dernières images. Tampons circulaires préalloués (array 'd') : une
+    image ne coûte qu'une écriture par colonne, sans allocation.
+    """
+    def __init__(self, colonnes, capacite: int = 600):
+        self.colonnes = list(colonnes)
+        self.capacite = capacite
+        self.tampons = {c: array("d", bytes(8 * capacite)) for c in self.colonnes}
+        self.courante = dict.fromkeys(self.colonnes, 0.0)
+        self.n = 0          # images enregistrées depuis le début
+        self.visible = False
+        self._medianes: Dict[str, float] = {}
+        self._medianes_n = -1
+
+    def ajouter(self, colonne: str, duree: float):
+        self.courante[colonne] += duree
+
+    def fin_image(self):
+        i = self.n % self.capacite
+        for c, v in self.courante.items():
+            self.tampons[c][i] = v
+            self.courante[c] = 0.0
+        self.n += 1
+
+    def indices(self, nb: Optional[int] = None) -> List[int]:
+        """Indices des `nb` dernières images, de la plus ancienne à la plus récente."""
+        nb = min(self.n, self.capacite if nb is None else nb)
+        return [(self.n - nb + k) % self.capacite for k in range(nb)]
+
+    def mediane_ms(self, colonne: str) -> float:
+        vals = sorted(self.tampons[colonne][i] for i in self.indices())
+        return 1000 * vals[len(vals) // 2] if vals else 0.0
+
+    def exporter_csv(self, chemin: str) -> int:
+        """Écrit une ligne par image (durées en ms) ; renvoie le nombre d'images écrites."""
+        import csv
+        idx = self.indices()
+        with open(chemin, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["image"] + self.colonnes)
+            for k, i in enumerate(idx, start=self.n - len(idx)):
+                w.writerow([k] + [f"{1000 * self.tampons[c][i]:.3f}" for c in self.colonnes])
+        return len(idx)
+
+    # ---------- graphe à l'écran ----------
+    def zone(self) -> pygame.Rect:
+        return pygame.Rect(LARGEUR - DROITE_W + 10, HAUTEUR - 330, DROITE_W - 20, 320)
+
+    def signature(self):
+        return self.n if self.visible else None
+
+    def dessiner(self, surf: pygame.Surface):
+        if not self.visible:
+            return
+        zone = self.zone()
+        pygame.draw.rect(surf, (12, 12, 18), zone)
+        pygame.draw.rect(surf, (60, 60, 80), zone, 1)
+
+        graphe = pygame.Rect(zone.x + 8, zone.y + 8, zone.w - 16, 120)
+        echelle = graphe.h / 33.3          # 2 images à 60 FPS en pleine hauteur
+        budget = graphe.bottom - int(1000 / FPS * echelle)
+        pygame.draw.line(surf, (90, 60, 60), (graphe.x, budget), (graphe.right, budget))
+        for x, i in enumerate(self.indices(graphe.w), start=graphe.x):
+            y = graphe.bottom
+            for p in PHASES_BOUCLE:
+                h = int(1000 * self.tampons[p][i] * echelle)
+                if h:
+                    haut = max(graphe.y, y - h)
+                    pygame.draw.line(surf, COULEURS_PHASES[p], (x, y), (x, haut))
+                    y = haut
+
+        # médianes recalculées toutes les 30 images : texte lisible, cache de texte épargné
+        if self._medianes_n < 0 or self.n - self._medianes_n >= 30:
+            self._medianes = {c: self.mediane_ms(c) for c in self.colonnes}
+            self._medianes_n = self.n
+        y = graphe.bottom + 8
+        for p in PHASES_BOUCLE:
+            texte(surf, f"{p} {self._medianes[p]:.2f} ms", (zone.x + 10, y), 18, COULEURS_PHASES[p])
+            y += 18
+        texte(surf, f"icônes {len(cache_icones)} : {cache_icones.octets // 1024} Ko",
+              (zone.x + 10, y + 6), 16, COULEUR_MUTE)
+        y = graphe.bottom + 8
+        for c in self.colonnes:
+            if c not in PHASES_BOUCLE:
+                texte(surf, f"{c} {self._medianes[c]:.2f} ms", (zone.centerx + 10, y), 16, COULEUR_MUTE)
+                y += 15
+        texte(surf, "F3 : masquer   F4 : export CSV", (zone.x + 10, zone.bottom - 18), 16, COULEUR_MUTE)
 
 
 # ------------------ Scène de jeu ------------------
 class SceneJeu:
-    def __init__(self):
-        self.inv = Inventaire()
+    """Vue pygame d'une partie : traduit les touches en actions GameState.step()."""
+    def __init__(self, etat: Optional[GameState] = None):
+        self.etat = etat if etat is not None else GameState()
+        self.etat.activer_historique()
+        self.inv = self.etat.inv
         self.zone_gauche = pygame.Rect(0, 0, GAUCHE_W, HAUTEUR)
         self.zone_droite = pygame.Rect(LARGEUR - DROITE_W, 0, DROITE_W, HAUTEUR)
         self.zone_centre = pygame.Rect(GAUCHE_W, 0, CENTRE_W, HAUTEUR)
 
         self.panel_perm = PanneauPermanents(self.zone_gauche, self.inv)
         self.panel_inv  = PanneauInventaire(self.zone_droite, self.inv)
-        self.plateau    = Plateau(self.zone_centre, self.inv)
-        self.tirage     = TiragePieces(self.zone_centre, self.inv)
+        self.plateau    = Plateau(self.zone_centre, self.etat)
+        self.tirage     = TiragePieces(self.zone_centre, self.etat)
         self.messages   = MessageBar()
-        self.shop       = ShopOverlay(self.zone_centre, self.inv, self.messages)
-
-        # Menu de consommation (touche M)
-        rect_conso = pygame.Rect(0, 0, 520, 260)
-        rect_conso.center = (LARGEUR // 2, HAUTEUR // 2)
-        self.conso = UseItemOverlay(rect_conso, self.inv, self.messages)
-
-        self.ouverture_en_cours = False
-        self.menu_actions: List[Dict] = []
-
-        self.plateau.vx, self.plateau.vy = self.plateau.x, self.plateau.y
+        # boutique et menu de consommation : créés à la première ouverture
+        self._shop: Optional[ShopOverlay] = None
+        self._conso: Optional[UseItemOverlay] = None
+
+        self.zone_menu = pygame.Rect(12, HAUTEUR - 220, GAUCHE_W - 24, 208)
+
+        # Ordre d'empilement = ordre de dessin
+        self.rendu = RenduRetenu([
+            Calque("permanents", self.zone_gauche, self.panel_perm.signature, self.panel_perm.dessiner),
+            Calque("inventaire", self.zone_droite, self.panel_inv.signature, self.panel_inv.dessiner),
+            Calque("plateau", self.zone_centre, self.plateau.signature, self.plateau.dessiner),
+            Calque("actions", self.zone_menu, self._signature_menu_bas_gauche, self._dessiner_menu_bas_gauche),
+            Calque("tirage", None, self.tirage.signature, self.tirage.dessiner),
+            Calque("boutique", None, self._signature_boutique, self._dessiner_boutique),
+            Calque("conso", None, self._signature_conso, self._dessiner_conso),
+            Calque("messages", self.messages.zone(), self.messages.signature, self.messages.draw),
+            Calque("fin", None, self._etat_fin, self._dessiner_fin),
+        ])
+        self.chrono = ChronoImages(PHASES_BOUCLE + tuple(c.nom for c in self.rendu.calques) + ("chrono",))
+        self.rendu.calques.append(Calque("chrono", self.chrono.zone(), self.chrono.signature, self.chrono.dessiner))
+        self.rendu.chrono = self.chrono
+
+        # Partie automatique (touche I)
+        self.ia = None
+        self._attente_ia = 0.0
+
+        if self.etat.ouverture_en_cours:     # partie rechargée pendant un tirage
+            self.tirage.ouvrir()
+
+    # ---------- overlays (chargés à la demande) ----------
+    @property
+    def shop(self) -> "ShopOverlay":
+        if self._shop is None:
+            self._shop = ShopOverlay(self.zone_centre, self.etat, self.messages)
+        return self._shop
+
+    @property
+    def conso(self) -> "UseItemOverlay":
+        """Menu de consommation (touche M)."""
+        if self._conso is None:
+            rect_conso = pygame.Rect(0, 0, 520, 260)
+            rect_conso.center = (LARGEUR // 2, HAUTEUR // 2)
+            self._conso = UseItemOverlay(rect_conso, self.etat, self.messages)
+        return self._conso
+
+    def _signature_boutique(self):
+        return self._shop.signature() if self._shop is not None else None
+
+    def _dessiner_boutique(self, surf: pygame.Surface):
+        if self._shop is not None:
+            self._shop.draw(surf)
+
+    def _signature_conso(self):
+        return self._conso.signature() if self._conso is not None else None
+
+    def _dessiner_conso(self, surf: pygame.Surface):
+        if self._conso is not None:
+            self._conso.draw(surf)
+
+    def _overlay_visible(self) -> bool:
+        return (self.tirage.visible or (self._shop is not None and self._shop.visible)
+                or (self._conso is not None and self._conso.visible))
 
     # ---------- utilitaires ----------
     def current_cell(self) -> Cellule:
-        return self.plateau.grid[self.plateau.x][self.plateau.y]
-
-    def _rebuild_actions_bas_gauche(self):
-        self.menu_actions = []
-        cell = self.current_cell()
-        for pk in cell.pickables:
-            if pk.get("type") == "item":
-                nom = pk["nom"]
-                label = f"Ramasser {nom}"
-                self.menu_actions.append({"label": label, "kind": "pickup", "data": pk})
-        if cell.has_trou:
-            self.menu_actions.append({"label": "Creuser", "kind": "action", "req": "pelle"})
-        if cell.has_coffre:
-            self.menu_actions.append({"label": "Ouvrir coffre", "kind": "action", "req": "coffre"})
-        if cell.has_casier:
-            self.menu_actions.append({"label": "Ouvrir casier", "kind": "action", "req": "casier"})
-        if cell.is_shop:
-            self.menu_actions.append({"label": "Ouvrir boutique", "kind": "action", "req": None})
-
-    # ---------- tirage / ouverture ----------
-    def tenter_ouvrir_porte(self, direction: str):
-        if not self.plateau.deplacement_possible(direction):
-            self.messages.show("Impossible : mur ou pas de porte.")
-            return
+        return self.etat.current_cell()
 
-        lvl = self.plateau.niveau_verrou_direction(direction)
-        if lvl == 1:
-            if self.inv.kit_crochetage:
-                pass
-            elif self.inv.cles > 0:
-                self.inv.cles -= 1
-            else:
-                self.messages.show("Porte verrouillée (clé ou kit requis).")
-                return
-        elif lvl == 2:
-            if self.inv.cles > 0:
-                self.inv.cles -= 1
-            else:
-                self.messages.show("Double tour : clé requise.")
-                return
+    @property
+    def menu_actions(self) -> List[Dict]:
+        return self.etat.menu_actions
 
-        cx, cy = self.plateau.x, self.plateau.y
-        nx, ny = cx, cy
-        if direction == "N": ny -= 1
-        if direction == "S": ny += 1
-        if direction == "W": nx -= 1
-        if direction == "E": nx += 1
-
-        possibles = []
-        for d in ["N", "E", "S", "W"]:
-            tx, ty = nx, ny
-            if d == "N": ty -= 1
-            if d == "S": ty += 1
-            if d == "W": tx -= 1
-            if d == "E": tx += 1
-            if 0 <= tx < GRID_W and 0 <= ty < GRID_H:
-                possibles.append(d)
-
-        self.tirage.nb_dirs_max = len(possibles)
-        self.tirage.generer()
-        self.ouverture_en_cours = True
-
-    def valider_tirage(self) -> Optional[Piece]:
-        if not self.tirage.choix:
-            return None
-        p = self.tirage.choix[self.tirage.idx]
-        if p.cout_gemmes > 0:
-            if self.inv.gemmes < p.cout_gemmes:
-                self.messages.show("Pas assez de gemmes.")
-                return None
-            self.inv.gemmes -= p.cout_gemmes
-        self.ouverture_en_cours = False
-        return p
-
-    # ---------- génération loot ----------
-    def _generer_loot_si_premiere_fois(self, p: Piece, cell: Cellule):
-        if cell.loot_genere:
-            return
+    def jouer(self, action: Tuple):
+        self.messages.show_many(self.etat.step(action))
 
-        cell.is_shop    = (p.couleur == C_JAUNE)
-        cell.has_casier = (p.nom.lower().strip() == "locker room")
-
-        if "Creuser" in p.actions and isinstance(p.actions["Creuser"], int):
-            proba_trou = p.actions["Creuser"] / 100.0
-        else:
-            proba_trou = 0.5 if p.couleur == C_VERT else 0.0
-        cell.has_trou = (random.random() < proba_trou)
-
-        proba_coffre = p.actions.get("Coffre", 0) / 100.0
-        cell.has_coffre = (random.random() < proba_coffre)
-
-        bonus_keys = 10 if self.inv.detecteur_metaux else 0
-        bonus_any  = 5  if self.inv.patte_lapin else 0
-
-        val_cle = p.actions.get("Clé", 0)
-        if isinstance(val_cle, int) and random.random() < (val_cle + bonus_keys + bonus_any) / 100.0:
-            cell.pickables.append({"type": "item", "nom": "Clé"})
-
-        val_gem = p.actions.get("Gemmes", 0)
-        if isinstance(val_gem, int) and random.random() < (val_gem + bonus_any) / 100.0:
-            cell.pickables.append({"type": "item", "nom": "Gemme"})
-
-        if p.couleur == C_BLEU and random.random() < 0.25:
-            cell.pickables.append({"type": "item", "nom": "Or", "quant": random.randint(1, 4)})
-
-        total_actions = sum(v for v in p.actions.values() if isinstance(v, int))
-        if total_actions > 0 and not cell.pickables and not cell.has_trou and not cell.has_coffre and not cell.is_shop:
-            if random.random() < 0.5:
-                cell.pickables.append({"type": "item", "nom": "Clé"})
-            else:
-                cell.pickables.append({"type": "item", "nom": "Gemme"})
-
-        cell.loot_genere = True
-
-    def appliquer_entree_dans_piece(self, p: Piece):
-        if "+Pas" in p.actions:
-            self.inv.pas += 5
-        if "-Pas" in p.actions and self.inv.pas > 0:
-            self.inv.pas = max(0, self.inv.pas - 3)
-
-        cell = self.current_cell()
-        self._generer_loot_si_premiere_fois(p, cell)
-        self._rebuild_actions_bas_gauche()
-        self.messages.show(f"Entrée dans {p.nom}")
-
-        if p.nom.lower().strip() == "antechamber" and self.plateau.x == GRID_W // 2 and self.plateau.y == 0:
-            self.messages.show("Victoire ! Vous avez atteint l'Antichambre.", 4.0)
-
-    # ---------- actions locales ----------
-    def action_creuser(self):
-        cell = self.current_cell()
-        if not cell.has_trou:
-            self.messages.show("Rien à creuser ici."); return
-        if not self.inv.pelle:
-            self.messages.show("Il faut une pelle."); return
-
-        if random.random() < 0.25:
-            self.messages.show("Tu n'as rien trouvé en creusant.")
-        else:
-            lot = random.choice(list(AUTRES_CATALOGUE.keys()))
-            self.inv.ajouter_autre_objet(lot)
-            self.messages.show(f"Tu trouves {lot} (ajouté à Autres objets)")
-        cell.has_trou = False
-        self._rebuild_actions_bas_gauche()
-
-    def action_coffre(self):
-        cell = self.current_cell()
-        if not cell.has_coffre:
-            self.messages.show("Pas de coffre ici."); return
-        if not (self.inv.marteau or self.inv.cles > 0):
-            self.messages.show("Coffre verrouillé (clé ou marteau)."); return
-        if not self.inv.marteau:
-            self.inv.cles -= 1
-        lot = random.choice(list(AUTRES_CATALOGUE.keys()))
-        self.inv.ajouter_autre_objet(lot)
-        self.messages.show(f"Coffre : {lot} (ajouté à Autres objets)")
-        cell.has_coffre = False
-        self._rebuild_actions_bas_gauche()
-
-    def action_casier(self):
-        cell = self.current_cell()
-        if not cell.has_casier:
-            self.messages.show("Pas de casier ici."); return
-        if self.inv.cles <= 0:
-            self.messages.show("Casier verrouillé (clé requise)."); return
-        self.inv.cles -= 1
-        lot = random.choice(list(AUTRES_CATALOGUE.keys()))
-        self.inv.ajouter_autre_objet(lot)
-        self.messages.show(f"Casier : {lot} (ajouté à Autres objets)")
-        cell.has_casier = False
-        self._rebuild_actions_bas_gauche()
+    def statut(self) -> Optional[str]:
+        return self.etat.statut()
 
     # ---------- menu 1..9 ----------
     def valider_num(self, idx: int):
-        if idx < 0 or idx >= len(self.menu_actions):
+        if 0 <= idx < len(self.menu_actions) and self.menu_actions[idx]["label"] == "Ouvrir boutique":
+            self.shop.ouvrir()
             return
-        entry = self.menu_actions[idx]
-        kind = entry.get("kind")
-        if kind == "pickup":
-            pk = entry["data"]; nom = pk["nom"]
-            if nom == "Clé":
-                self.inv.cles += 1
-            elif nom == "Gemme":
-                self.inv.gemmes += 1
-            elif nom == "Or":
-                self.inv.or_ += pk.get("quant", 1)
-            else:
-                self.inv.ajouter_autre_objet(nom)
-            try:
-                self.current_cell().pickables.remove(pk)
-            except ValueError:
-                pass
-            self._rebuild_actions_bas_gauche()
-            self.messages.show(f"Ramassé : {nom}")
-        elif kind == "action":
-            label = entry["label"]; req = entry.get("req")
-            if label == "Ouvrir boutique":
-                self.shop.ouvrir(); return
-            if req == "pelle":
-                self.action_creuser(); return
-            if req == "coffre":
-                self.action_coffre(); return
-            if req == "casier":
-                self.action_casier(); return
+        self.jouer(("menu", idx))
 
     # ---------- événements ----------
     def gerer_evenement(self, e: pygame.event.Event):
+        # F3 / F4 : graphe des temps par image, export CSV (quel que soit l'overlay)
+        if e.type == pygame.KEYDOWN and e.key == pygame.K_F3:
+            self.chrono.visible = not self.chrono.visible
+            return
+        if e.type == pygame.KEYDOWN and e.key == pygame.K_F4:
+            chemin = time.strftime("chrono_images_%Y%m%d_%H%M%S.csv")
+            n = self.chrono.exporter_csv(chemin)
+            self.messages.show(f"{n} images exportées dans {chemin}")
+            return
+
+        # F5 : sauvegarde ; F9 : chargement (la scène est recréée par la boucle principale)
+        if e.type == pygame.KEYDOWN and e.key == pygame.K_F5:
+            from sauvegarde import ecrire      # chargé au premier F5
+            try:
+                ecrire(self.etat, FICHIER_SAUVEGARDE)
+                self.messages.show(f"Partie sauvegardée dans {FICHIER_SAUVEGARDE}.")
+            except OSError as err:
+                self.messages.show(f"Sauvegarde impossible : {err}")
+            return
+        if e.type == pygame.KEYDOWN and e.key == pygame.K_F9:
+            return "charger"
+
         # 0) menu de consommation
-        if self.conso.visible:
-            self.conso.handle(e)
+        if self._conso is not None and self._conso.visible:
+            self._conso.handle(e)
             return
 
-        # 1) tirage
+        # 1) tirage : fermer l'overlay valide la carte sélectionnée
         if self.tirage.visible:
-            prev_visible = self.tirage.visible
             self.tirage.gerer_evenement(e)
-
-            if prev_visible and not self.tirage.visible and self.ouverture_en_cours:
-                piece = self.valider_tirage()
-                if piece is None:
-                    self.ouverture_en_cours = False
-                    return
-
-                d = self.plateau.direction()
-                px, py = self.plateau.x, self.plateau.y
-                nx, ny = px, py
-                if d == "N": ny -= 1
-                if d == "S": ny += 1
-                if d == "W": nx -= 1
-                if d == "E": nx += 1
-
-                cell = self.plateau.grid[nx][ny]
-                cell.piece = piece
-                cell.decouverte = True
-
-                cible = nb_portes_theoriques(piece)
-
-                possibles = []
-                for dd in ["N", "E", "S", "W"]:
-                    tx, ty = nx, ny
-                    if dd == "N": ty -= 1
-                    if dd == "S": ty += 1
-                    if dd == "W": tx -= 1
-                    if dd == "E": tx += 1
-                    if 0 <= tx < GRID_W and 0 <= ty < GRID_H:
-                        possibles.append(dd)
-
-                cell.portes_existent = {k: False for k in ["N", "E", "S", "W"]}
-
-                opp = {"N": "S", "S": "N", "E": "W", "W": "E"}[d]
-                if opp in possibles:
-                    cell.portes_existent[opp] = True
-
-                nb_voulues = min(cible, len(possibles))
-                deja_ouvertes = 1 if cell.portes_existent[opp] else 0
-                restant = max(0, nb_voulues - deja_ouvertes)
-
-                autres = [dd for dd in possibles if dd != opp]
-                random.shuffle(autres)
-                for dd in autres[:restant]:
-                    cell.portes_existent[dd] = True
-
-                prev_cell = self.plateau.grid[px][py]
-                prev_cell.portes_existent[d] = True
-
-                self.plateau.x, self.plateau.y = nx, ny
-                self.inv.consommer_pas(1)
-
-                self._generer_loot_si_premiere_fois(piece, cell)
-                self._rebuild_actions_bas_gauche()
-                self.messages.show(f"Entrée dans {piece.nom}")
-                self.plateau.vx, self.plateau.vy = self.plateau.x, self.plateau.y
-
-                if piece.nom.lower().strip() == "antechamber" and self.plateau.x == GRID_W // 2 and self.plateau.y == 0:
-                    self.messages.show("Victoire ! Vous avez atteint l'Antichambre.", 4.0)
-
-                self.ouverture_en_cours = False
+            if not self.tirage.visible and self.etat.ouverture_en_cours:
+                self.jouer(("choisir", self.tirage.idx))
             return
 
         # 2) boutique
-        if self.shop.visible:
-            self.shop.handle(e)
+        if self._shop is not None and self._shop.visible:
+            self._shop.handle(e)
             return
 
-        # 3) ESC pour retour menu (gestion par le main via la valeur de retour)
+        # 3) caméra du plateau (zoom, défilement), voyage rapide (T)
+        if self.plateau.gerer_evenement(e):
+            return
+        if self.plateau.cible_voyage is not None:
+            action = self.plateau.gerer_voyage(e)
+            if action is not None:
+                self.jouer(action)
+            return
+        if e.type == pygame.KEYDOWN and e.key == pygame.K_t:
+            self.plateau.cible_voyage = (self.etat.x, self.etat.y)
+            self.messages.show("Voyage rapide : choisir une pièce, Entrée pour y aller, Échap pour annuler.")
+            return
+
+        # 4) ESC pour retour menu (gestion par le main via la valeur de retour)
         if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
-            if not self.tirage.visible and not self.shop.visible:
-                return "menu"
+            return "menu"
 
         if e.type == pygame.KEYDOWN:
             # touche M = menu de consommation
             if e.key == pygame.K_m:
                 self.conso.toggle()
                 return
-
-            cell = self.current_cell()
+            if e.key == pygame.K_i:
+                self.basculer_ia()
+                return
+            if e.key == pygame.K_BACKSPACE:
+                self.annuler()
+                return
 
             # ZQSD : choisir porte (seulement si elle existe)
-            if e.key in (pygame.K_z, pygame.K_w):
-                if cell.portes_existent.get("N", False):
-                    self.plateau.dir_idx = 0
-            elif e.key in (pygame.K_s,):
-                if cell.portes_existent.get("S", False):
-                    self.plateau.dir_idx = 2
-            elif e.key in (pygame.K_q, pygame.K_a):
-                if cell.portes_existent.get("W", False):
-                    self.plateau.dir_idx = 3
-            elif e.key in (pygame.K_d,):
-                if cell.portes_existent.get("E", False):
-                    self.plateau.dir_idx = 1
+            if e.key in KEY_UPS:
+                self.jouer(("porte", "N"))
+            elif e.key in KEY_DOWNS:
+                self.jouer(("porte", "S"))
+            elif e.key in KEY_LEFTS:
+                self.jouer(("porte", "W"))
+            elif e.key in KEY_RIGHTS:
+                self.jouer(("porte", "E"))
 
             # Flèches : déplacement dans rooms déjà posées
-            elif e.key in (ARROW_LEFT, ARROW_RIGHT, ARROW_UP, ARROW_DOWN):
-                d = None
-                if e.key == ARROW_LEFT:  d = "W"
-                if e.key == ARROW_RIGHT: d = "E"
-                if e.key == ARROW_UP:    d = "N"
-                if e.key == ARROW_DOWN:  d = "S"
-
-                nx, ny = self.plateau.x, self.plateau.y
-                if d == "N": ny -= 1
-                if d == "S": ny += 1
-                if d == "W": nx -= 1
-                if d == "E": nx += 1
-
-                if 0 <= nx < GRID_W and 0 <= ny < GRID_H:
-                    cur = self.current_cell()
-                    if cur.portes_existent.get(d, False):
-                        neigh = self.plateau.grid[nx][ny]
-                        if neigh.decouverte and neigh.piece is not None:
-                            opp = {"N": "S", "S": "N", "E": "W", "W": "E"}[d]
-                            if neigh.portes_existent.get(opp, False):
-                                self.plateau.x, self.plateau.y = nx, ny
-                                self.inv.consommer_pas(1)
-                                self.appliquer_entree_dans_piece(neigh.piece)
-                                self.plateau.vx, self.plateau.vy = nx, ny
+            elif e.key in FLECHES:
+                self.jouer(("aller", FLECHES[e.key]))
 
             # OK : entrer / ouvrir nouvelle pièce
             elif e.key in TOUCHE_OKS:
-                d = self.plateau.direction()
-                nx, ny = self.plateau.x, self.plateau.y
-                if d == "N": ny -= 1
-                if d == "S": ny += 1
-                if d == "W": nx -= 1
-                if d == "E": nx += 1
-
-                if 0 <= nx < GRID_W and 0 <= ny < GRID_H:
-                    neigh = self.plateau.grid[nx][ny]
-                    if cell.portes_existent.get(d, False) and neigh.decouverte and neigh.piece is not None:
-                        self.plateau.x, self.plateau.y = nx, ny
-                        self.inv.consommer_pas(1)
-                        self.appliquer_entree_dans_piece(neigh.piece)
-                        self.plateau.vx, self.plateau.vy = nx, ny
-                        return
-
-                if not self.plateau.deplacement_possible(d):
-                    self.messages.show("Impossible d'aller là.")
-                    return
-                self.tenter_ouvrir_porte(d)
+                self.jouer(("ok",))
+                if self.etat.ouverture_en_cours:
+                    self.tirage.ouvrir()
 
             elif e.key == pygame.K_c:
-                self.action_creuser()
+                self.jouer(("creuser",))
             elif e.key == pygame.K_o:
-                self.action_coffre()
+                self.jouer(("coffre",))
             elif e.key == pygame.K_l:
-                self.action_casier()
+                self.jouer(("casier",))
             elif e.key == pygame.K_b:
-                if cell.is_shop:
+                if self.current_cell().is_shop:
                     self.shop.ouvrir()
                 else:
                     self.messages.show("Pas de boutique ici.")
             elif pygame.K_1 <= e.key <= pygame.K_9:
-                idx = e.key - pygame.K_1
-                self.valider_num(idx)
+                self.valider_num(e.key - pygame.K_1)
 
     # ---------- rendu / fin ----------
+    def _signature_menu_bas_gauche(self):
+        return tuple((e["label"], self.etat.action_faisable(e)) for e in self.menu_actions[:9])
+
     def _dessiner_menu_bas_gauche(self, surf: pygame.Surface):
-        zone = pygame.Rect(12, HAUTEUR - 220, GAUCHE_W - 24, 208)
+        zone = self.zone_menu
         pygame.draw.rect(surf, (18, 18, 26), zone)
         pygame.draw.rect(surf, (60, 60, 80), zone, 1)
         texte(surf, "Actions (1..9)", (zone.x + 10, zone.y + 8), 20, COULEUR_ACCENT)
         y = zone.y + 34
         for i, entry in enumerate(self.menu_actions[:9], start=1):
-            label = entry["label"]
-            ok = True
-            if entry.get("kind") == "action":
-                req = entry.get("req")
-                if req == "pelle":    ok = self.inv.pelle
-                elif req == "coffre": ok = (self.inv.marteau or self.inv.cles > 0)
-                elif req == "casier": ok = (self.inv.cles > 0)
-            col = (120, 220, 160) if ok else (220, 120, 120)
-            texte(surf, f"{i}. {label}", (zone.x + 12, y), 20, col)
+            col = (120, 220, 160) if self.etat.action_faisable(entry) else (220, 120, 120)
+            texte(surf, f"{i}. {entry['label']}", (zone.x + 12, y), 20, col)
             y += 22
 
-    def _bloque_sans_progression(self) -> bool:
-        dirs = ["N", "E", "S", "W"]
-        for d in dirs:
-            nx, ny = self.plateau.x, self.plateau.y
-            if d == "N": ny -= 1
-            if d == "S": ny += 1
-            if d == "W": nx -= 1
-            if d == "E": nx += 1
-            if nx < 0 or nx >= GRID_W or ny < 0 or ny >= GRID_H:
-                continue
-            if not self.current_cell().portes_existent.get(d, False):
-                continue
-            voisin = self.plateau.grid[nx][ny]
-            if voisin.decouverte and voisin.piece is not None:
-                return False
-            lvl = self.plateau.niveau_verrou_direction(d)
-            if lvl == 0: return False
-            if lvl == 1 and (self.inv.kit_crochetage or self.inv.cles > 0): return False
-            if lvl == 2 and (self.inv.cles > 0): return False
-        return True
+    def _etat_fin(self) -> Optional[str]:
+        etat = self.statut()
+        return None if etat == "victoire" else etat
 
-    def dessiner(self, surf: pygame.Surface):
-        self.panel_perm.dessiner(surf)
-        self.panel_inv.dessiner(surf)
-        self.plateau.dessiner(surf)
-        self._dessiner_menu_bas_gauche(surf)
-        if self.tirage.visible: self.tirage.dessiner(surf)
-        if self.shop.visible:   self.shop.draw(surf)
-        self.conso.draw(surf)
-        self.messages.draw(surf)
-
-        if self.inv.pas == 0:
-            dim = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
-            dim.fill((0, 0, 0, 200))
-            surf.blit(dim, (0, 0))
+    def _dessiner_fin(self, surf: pygame.Surface):
+        etat = self._etat_fin()
+        if etat == "defaite":
+            voiles.assombrir(surf, 200)
             texte(surf, "Défaite : vous n'avez plus de pas.",
                   (LARGEUR // 2, HAUTEUR // 2), 36, (240, 120, 120), centre=True)
-        elif self._bloque_sans_progression():
-            dim = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
-            dim.fill((0, 0, 0, 160))
-            surf.blit(dim, (0, 0))
+        elif etat == "bloque":
+            voiles.assombrir(surf, 160)
             texte(surf, "Bloqué : aucune progression possible (portes inaccessibles).",
                   (LARGEUR // 2, HAUTEUR // 2), 32, (240, 120, 120), centre=True)
 
+    def dessiner(self, surf: pygame.Surface) -> List[pygame.Rect]:
+        """Redessine uniquement ce qui a changé ; renvoie les rectangles modifiés."""
+        g = self.etat.grille
+        cache_icones.contexte(surf.get_size(), g.largeur, g.hauteur)
+        return self.rendu.dessiner(surf)
+
+    def annuler(self):
+        if not self.etat.annuler():
+            self.messages.show("Rien à annuler.")
+            return
+        self.messages.show("Action annulée.")
+        if self.etat.ouverture_en_cours:     # retour au choix des pièces
+            self.tirage.ouvrir()
+
+    # ---------- partie automatique ----------
+    def basculer_ia(self):
+        if self.ia is not None:
+            self.ia = None
+            self.messages.show("Partie automatique arrêtée.")
+            return
+        from ia import IA      # la recherche n'est chargée qu'à la demande
+        self.ia = IA()
+        self._attente_ia = 0.0
+        self.messages.show("Partie automatique (I pour reprendre la main).")
+
+    def _jouer_ia(self, dt: float):
+        if self._overlay_visible() or self.statut() is not None:
+            return
+        self._attente_ia += dt
+        if self._attente_ia < DELAI_IA:
+            return
+        self._attente_ia = 0.0
+        from ia import appliquer
+        m = self.ia.decider(self.etat)
+        if m is None:
+            self.ia = None
+            self.messages.show("Partie automatique : plus aucune action utile.")
+            return
+        self.messages.show_many(appliquer(self.etat, m))
+
     def update(self, dt: float):
         self.messages.update(dt)
+        if not chargeur_images.termine:
+            chargeur_images.recuperer()
+        if self.ia is not None:
+            self._jouer_ia(dt)
 
 
 
 # ------------------ Boucle principale locale ------------------
-def main():
+def main(graine: Optional[int] = None, largeur: int = GRID_W, hauteur: int = GRID_H,
+         enregistrer: Optional[str] = None):
+    """enregistrer : fichier où écrire les touches jouées (scénario rejouable par pilote.py)."""
     pygame.init()
     ecran = pygame.display.set_mode((LARGEUR, HAUTEUR))
-    pygame.display.set_caption("Manoir 5x9 — Blue Prince")
+    charger_images_pieces()
+    scene = SceneJeu(GameState(graine, largeur=largeur, hauteur=hauteur))
+    graine_depart = scene.etat.alea.graine
+    pygame.display.set_caption(f"Manoir {largeur}x{hauteur} — Blue Prince (graine {scene.etat.alea.graine})")
     clock = pygame.time.Clock()
-    scene = SceneJeu()
+    chrono = scene.chrono
+    horloge = time.perf_counter
+    touches: List[int] = []
     run = True
     while run:
         dt = clock.tick(FPS) / 1000.0
+        t0 = horloge()
         for e in pygame.event.get():
+            if e.type == pygame.KEYDOWN:
+                touches.append(e.key)
             if e.type == pygame.QUIT:
                 run = False
-            else:
-                scene.gerer_evenement(e)
+            elif scene.gerer_evenement(e) == "charger":
+                from sauvegarde import lire
+                try:
+                    etat = lire(FICHIER_SAUVEGARDE)
+                except (OSError, ValueError) as err:
+                    scene.messages.show(f"Chargement impossible : {err}")
+                    continue
+                scene = SceneJeu(etat)
+                chrono = scene.chrono
+                scene.messages.show(f"Partie chargée depuis {FICHIER_SAUVEGARDE}.")
+        t1 = horloge()
         scene.update(dt)
-        scene.dessiner(ecran)
-        pygame.display.flip()
+        t2 = horloge()
+        rects = scene.dessiner(ecran)
+        t3 = horloge()
+        if rects:
+            pygame.display.update(rects)
+        t4 = horloge()
+        chrono.ajouter("evenements", t1 - t0)
+        chrono.ajouter("update", t2 - t1)
+        chrono.ajouter("dessiner", t3 - t2)
+        chrono.ajouter("affichage", t4 - t3)
+        chrono.fin_image()
     pygame.quit()
-
-if __name__ == "__main__":
-    main()
-
-
-
+    if enregistrer:
+        from pilote import Scenario, ecrire_scenario
+        ecrire_scenario(enregistrer, Scenario(touches, graine_depart, largeur, hauteur))
 
 
+# ------------------ Rapport de démarrage ------------------
+DEMARRAGE_CIBLE = 0.300     # secondes, du lancement de l'interpréteur à la première image
 
+def premiere_image(graine: Optional[int] = None):
+    """Démarre comme main() jusqu'à la première image affichée, en chronométrant chaque étape."""
+    horloge = time.perf_counter
+    etapes = []
+    t = horloge()
+    pygame.init()
+    etapes.append(("pygame.init", horloge() - t)); t = horloge()
+    ecran = pygame.display.set_mode((LARGEUR, HAUTEUR))
+    etapes.append(("fenêtre", horloge() - t)); t = horloge()
+    charger_images_pieces()
+    scene = SceneJeu(GameState(graine))
+    etapes.append(("scène", horloge() - t)); t = horloge()
+    pygame.display.update(scene.dessiner(ecran))
+    etapes.append(("première image", horloge() - t))
+    for nom, duree in etapes:
+        print(f"{nom}\t{duree}")
+    print("pret", flush=True)
+    pygame.quit()
 
+def rapport_demarrage(graine: Optional[int] = None, nb_modules: int = 12):
+    """
+    Lance `python -X importtime jeu.py --premiere-image` dans un nouveau processus :
+    temps total jusqu'à la première image, modules les plus lents à importer
+    (temps cumulé, sous-imports compris) et étapes d'initialisation.
+    """
+    import os
+    import subprocess
+    cmd = [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--premiere-image"]
+    if graine is not None:
+        cmd.append(str(graine))
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    t = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    etapes = []
+    for ligne in proc.stdout:
+        if ligne.strip() == "pret":
+            break
+        nom, duree = ligne.rstrip("\n").split("\t")
+        etapes.append((nom, float(duree)))
+    total = time.perf_counter() - t
+    _, erreurs = proc.communicate()
+    if proc.returncode:
+        raise SystemExit(erreurs)
+
+    # lignes "import time: propre | cumulé | [indentation]module" (microsecondes)
+    modules = []
+    for ligne in erreurs.splitlines():
+        if not ligne.startswith("import time:") or "cumulative" in ligne:
+            continue
+        propre, cumul, nom = ligne[len("import time:"):].split("|")
+        profondeur = (len(nom) - len(nom.lstrip())) // 2
+        modules.append((nom.strip(), int(propre), int(cumul), profondeur))
+    haut = min(m[3] for m in modules)
+    racines = [m for m in modules if m[3] == haut]
+    imports = sum(m[2] for m in racines) / 1e6
+
+    print(f"Démarrage jusqu'à la première image : {total * 1000:6.1f} ms "
+          f"(cible {DEMARRAGE_CIBLE * 1000:.0f} ms : {'OK' if total <= DEMARRAGE_CIBLE else 'dépassée'})")
+    print(f"  imports          {imports * 1000:6.1f} ms")
+    for nom, _, cumul, _ in sorted(racines, key=lambda m: m[2], reverse=True)[:nb_modules]:
+        print(f"    {nom:<28} {cumul / 1000:6.1f} ms")
+    for nom, duree in etapes:
+        print(f"  {nom:<16} {duree * 1000:6.1f} ms")
+    print(f"  reste (interpréteur, processus) {(total - imports - sum(d for _, d in etapes)) * 1000:6.1f} ms")
 
 
+if __name__ == "__main__":
+    # python jeu.py [graine] [largeur hauteur] [--enregistrer=partie.scn]
+    # python jeu.py --demarrage [graine]      (rapport du temps de démarrage)
+    options = dict((a.split("=", 1) + [""])[:2] for a in sys.argv[1:] if a.startswith("--"))
+    args = [int(a) for a in sys.argv[1:] if not a.startswith("--")]
+    if "--demarrage" in options:
+        rapport_demarrage(args[0] if args else None)
+    elif "--premiere-image" in options:
+        premiere_image(args[0] if args else None)
+    else:
+        main(args[0] if args else None, *(args[1:3] if len(args) >= 3 else ()),
+             enregistrer=options.get("--enregistrer"))
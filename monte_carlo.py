@@ -0,0 +1,219 @@
+"""
+Estimation Monte Carlo du taux de victoire
+------------------------------------------
+Joue des parties complètes avec le moteur (moteur.GameState : inventaire de départ,
+PIECES_MODELES, courbe de verrous niveau_verrou_pour_ligne) et une politique au
+choix, réparties sur plusieurs processus (ProcessPoolExecutor).
+
+Chaque processus reçoit un bloc de parties et ne renvoie que des totaux, si bien que
+les échanges entre processus restent petits devant le coût des parties ; le gain réel
+dépend des cœurs disponibles. Compter une centaine de parties/s par processus avec la
+politique gloutonne. La partie i utilise la graine (graine << 32) + i : un résultat
+est reproductible quel que soit le nombre de processus.
+
+Usage : python monte_carlo.py -n 10000 -j 4 --politique glouton --graine 1
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from moteur import (
+    GameState, DELTAS, BOUTIQUE, BOUTIQUE_ARTICLES, PRIX_CLE_BOUTIQUE,
+    AUTRES_CATALOGUE, ID_ANTICHAMBRE,
+)
+
+ISSUES = ("victoire", "defaite", "bloque", "abandon")
+
+# ------------------ Politiques ------------------
+def politique_aleatoire(etat: GameState, rng: random.Random) -> Optional[Tuple]:
+    acts = etat.actions_possibles()
+    return rng.choice(acts) if acts else None
+
+def _prochain_pas(etat: GameState, cibles) -> Optional[str]:
+    """
+    Première direction d'un plus court chemin (pièces découvertes) vers une case cible.
+    Les cartes de distances sont celles du moteur (etat.distances, relaxées à chaque
+    pièce posée) : depuis le joueur, puis depuis les cibles les plus proches.
+    """
+    g = etat.grille
+    ici = etat.ici()
+    depuis = etat.distances.distances(ici)
+    dist = {c: depuis[c] for c in (g.indice(x, y) for x, y in cibles) if c in depuis}
+    if not dist:
+        return None
+    proche = min(dist.values())
+    if proche == 0:
+        return None
+    cartes = [etat.distances.distances(c) for c, v in dist.items() if v == proche]
+    for d in g.voisins[ici]:
+        j = g.relie(ici, d)
+        if j >= 0 and any(m.get(j) == proche - 1 for m in cartes):
+            return d
+    return None
+
+def _cases_ouvrables(etat: GameState):
+    cles = etat.inv.cles > 0
+    kit = etat.inv.kit_crochetage
+    cibles = set()
+    for (x, y, d), lvl in etat.frontiere.portes.items():
+        if lvl == 0 or (lvl == 1 and (kit or cles)) or (lvl == 2 and cles):
+            cibles.add((x, y))
+    return cibles
+
+def _score_carte(etat: GameState, p) -> float:
+    if p.id == ID_ANTICHAMBRE:
+        d = etat.direction()
+        if (etat.x + DELTAS[d][0], etat.y + DELTAS[d][1]) == etat.case_victoire():
+            return 1e9
+    a = p.actions
+    return (p.nb_portes + a.get("Clé", 0) / 10 + a.get("+Pas", 0) / 20
+            - a.get("-Pas", 0) / 10 - p.cout_gemmes)
+
+def politique_gloutonne(etat: GameState, rng: random.Random) -> Optional[Tuple]:
+    """
+    Ramasse tout, consomme la nourriture quand les pas manquent, ouvre en priorité les
+    portes vers le nord, sinon rejoint la porte ouvrable la plus proche, sinon va
+    acheter une clé en boutique.
+    """
+    inv = etat.inv
+    if etat.ouverture_en_cours:
+        abordables = [i for i, p in enumerate(etat.choix) if p.cout_gemmes <= inv.gemmes]
+        if not abordables and inv.des > 0:
+            return ("relancer",)
+        if not abordables:
+            return ("choisir", 0)
+        return ("choisir", max(abordables, key=lambda i: _score_carte(etat, etat.choix[i])))
+
+    for i, entry in enumerate(etat.menu_actions):
+        if entry["kind"] == "pickup" or (entry.get("req") == "pelle" and inv.pelle) \
+                or (entry.get("req") == "coffre" and inv.marteau):
+            return ("menu", i)
+    if inv.pas <= 5 and inv.autres_objets:
+        return ("consommer", max(inv.autres_objets, key=lambda n: AUTRES_CATALOGUE.get(n, ("", 0))[1]))
+
+    for d in ("N", "E", "W", "S"):
+        if etat.porte_ouvrable(d):
+            return ("ouvrir", d)
+
+    d = _prochain_pas(etat, _cases_ouvrables(etat))
+    if d is not None:
+        return ("aller", d)
+
+    if inv.cles == 0 and inv.or_ >= PRIX_CLE_BOUTIQUE:
+        if etat.grille.a(etat.ici(), BOUTIQUE):
+            i = next(i for i, a in enumerate(BOUTIQUE_ARTICLES) if "gain_cle" in a)
+            return ("acheter", i)
+        boutiques = {etat.grille.xy(i) for i in range(etat.grille.n) if etat.grille.a(i, BOUTIQUE)}
+        d = _prochain_pas(etat, boutiques)
+        if d is not None:
+            return ("aller", d)
+    return None
+
+POLITIQUES: Dict[str, Callable[[GameState, random.Random], Optional[Tuple]]] = {
+    "aleatoire": politique_aleatoire,
+    "glouton": politique_gloutonne,
+}
+
+# ------------------ Parties ------------------
+def jouer_partie(graine: int, politique: str = "glouton", max_actions: int = 5000) -> Tuple[str, int]:
+    """Joue une partie complète ; renvoie (issue, pas utilisés)."""
+    etat = GameState(graine)
+    choisir = POLITIQUES[politique]
+    rng = random.Random(f"{graine}:politique")
+    for _ in range(max_actions):
+        st = etat.statut()
+        if st is not None:
+            return st, etat.pas_utilises
+        action = choisir(etat, rng)
+        if action is None:
+            break
+        etat.step(action)
+    return etat.statut() or "abandon", etat.pas_utilises
+
+def jouer_bloc(graine: int, debut: int, nb: int, politique: str, max_actions: int) -> Dict[str, float]:
+    """Joue les parties debut..debut+nb-1 et renvoie les totaux (exécuté dans un processus)."""
+    res: Dict[str, float] = {k: 0 for k in ISSUES}
+    res["pas"] = 0
+    res["pas2"] = 0
+    for i in range(debut, debut + nb):
+        issue, pas = jouer_partie((graine << 32) + i, politique, max_actions)
+        res[issue] += 1
+        res["pas"] += pas
+        res["pas2"] += pas * pas
+    return res
+
+# ------------------ Statistiques ------------------
+def intervalle_wilson(k: float, n: int, z: float = 1.96) -> Tuple[float, float]:
+    if n == 0:
+        return 0.0, 0.0
+    p = k / n
+    den = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / den
+    demi = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / den
+    return max(0.0, centre - demi), min(1.0, centre + demi)
+
+def _cumuler(total: Dict[str, float], resultats: Iterable[Dict[str, float]]):
+    for r in resultats:
+        for k in total:
+            total[k] += r[k]
+
+def estimer(n: int, jobs: int, politique: str = "glouton", graine: int = 0,
+            max_actions: int = 5000, taille_bloc: Optional[int] = None) -> Dict:
+    if taille_bloc is None:
+        taille_bloc = max(1, min(5000, n // (jobs * 8) or 1))
+    blocs = [(graine, d, min(taille_bloc, n - d), politique, max_actions) for d in range(0, n, taille_bloc)]
+    total: Dict[str, float] = {k: 0 for k in ISSUES}
+    total["pas"] = total["pas2"] = 0
+    t = time.perf_counter()
+    if jobs == 1:
+        _cumuler(total, (jouer_bloc(*b) for b in blocs))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            _cumuler(total, ex.map(jouer_bloc, *zip(*blocs)))
+    duree = time.perf_counter() - t
+
+    rapport: Dict = {"parties": n, "politique": politique, "graine": graine, "processus": jobs,
+                     "duree_s": round(duree, 3), "parties_par_s": round(n / duree, 1) if duree else None}
+    for k in ISSUES:
+        bas, haut = intervalle_wilson(total[k], n)
+        rapport[k] = {"nombre": int(total[k]), "taux": total[k] / n, "ic95": [bas, haut]}
+    moy = total["pas"] / n
+    var = max(0.0, total["pas2"] / n - moy * moy)
+    demi = 1.96 * math.sqrt(var / n)
+    rapport["pas_utilises"] = {"moyenne": moy, "ecart_type": math.sqrt(var), "ic95": [moy - demi, moy + demi]}
+    return rapport
+
+def afficher(r: Dict):
+    print(f"{r['parties']} parties, politique {r['politique']}, graine {r['graine']}, "
+          f"{r['processus']} processus : {r['duree_s']} s ({r['parties_par_s']} parties/s)")
+    for k in ISSUES:
+        e = r[k]
+        print(f"  {k:<9} {e['nombre']:>9}  {100 * e['taux']:6.2f} %  "
+              f"IC95 [{100 * e['ic95'][0]:.2f} ; {100 * e['ic95'][1]:.2f}]")
+    p = r["pas_utilises"]
+    print(f"  pas utilisés : {p['moyenne']:.2f} ± {p['ecart_type']:.2f}  "
+          f"IC95 [{p['ic95'][0]:.2f} ; {p['ic95'][1]:.2f}]")
+
+def main():
+    ap = argparse.ArgumentParser(description="Estimation Monte Carlo du taux de victoire.")
+    ap.add_argument("-n", type=int, default=10_000, help="nombre de parties")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="nombre de processus")
+    ap.add_argument("--politique", choices=sorted(POLITIQUES), default="glouton")
+    ap.add_argument("--graine", type=int, default=0)
+    ap.add_argument("--max-actions", type=int, default=5000, help="au-delà, la partie est abandonnée")
+    ap.add_argument("--json", action="store_true", help="sortie JSON")
+    args = ap.parse_args()
+    r = estimer(args.n, args.jobs, args.politique, args.graine, args.max_actions)
+    if args.json:
+        print(json.dumps(r, indent=2, ensure_ascii=False))
+    else:
+        afficher(r)
+
+
+if __name__ == "__main__":
+    main()
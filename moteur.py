@@ -0,0 +1,1630 @@
+"""
+Moteur du jeu (sans pygame)
+---------------------------
+Toutes les règles du manoir : portes et verrous, tirage des pièces, coût en gemmes,
+loot, creuser, coffres, casiers, boutique et consommables.
+GameState.step(action) applique une action et renvoie les messages à afficher ;
+jeu.py n'est qu'une vue pygame sur cet état.
+
+Actions (tuples) :
+    ("porte", d)        choisir la porte d de la pièce courante (ZQSD)
+    ("aller", d)        aller dans la pièce découverte voisine (flèches)
+    ("ok",)             entrer dans la pièce visée, ou ouvrir la porte (tirage)
+    ("ouvrir", d)       ("porte", d) puis ("ok",) en une action
+    ("voyager", x, y)   aller à une pièce découverte reliée, au coût du plus court chemin
+    ("choisir", i)      valider la carte i du tirage en cours
+    ("relancer",)       relancer le tirage (consomme 1 dé)
+                        (tirage en cours : seules ces deux actions sont acceptées)
+    ("creuser",) ("coffre",) ("casier",)
+    ("menu", i)         entrée i du menu d'actions 1..9
+    ("acheter", i)      article i de BOUTIQUE_ARTICLES (dans une boutique)
+    ("consommer", nom)  consommer un objet de 'Autres objets'
+"""
+import random
+from array import array
+from bisect import bisect
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from operator import attrgetter
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Tuple, Optional
+
+# Couleurs des rooms (PDF)
+C_JAUNE  = (230, 200, 80)    # shop
+C_VERT   = (100, 200, 120)   # jardins
+C_VIOLET = (160, 120, 220)   # chambres (rend des pas)
+C_ORANGE = (240, 150, 60)    # couloirs
+C_ROUGE  = (210, 70, 70)     # indésirables
+C_BLEU   = (90, 140, 240)    # communes
+
+# ------------------ Inventaire & objets ------------------
+@dataclass
+class Inventaire:
+    pas: int = 70
+    or_: int = 500
+    gemmes: int = 2
+    cles: int = 0
+    des: int = 0
+
+    # dictionnaire des autres objets : nom -> quantité
+    autres_objets: Dict[str, int] = field(default_factory=dict)
+
+    # Objets permanents
+    pelle: bool = False
+    marteau: bool = False
+    kit_crochetage: bool = False
+    detecteur_metaux: bool = False
+    patte_lapin: bool = False
+
+    def consommer_pas(self, n: int = 1):
+        self.pas = max(0, self.pas - n)
+
+    def ajouter_autre_objet(self, nom: str, nb: int = 1):
+        """Ajoute un objet consommable dans la section 'Autres objets'."""
+        self.autres_objets[nom] = self.autres_objets.get(nom, 0) + nb
+
+    def consommer_autre_objet(self, nom: str, messages: "MessageBar"):
+        """Consomme un objet (Pomme, Repas, ...) et applique son effet."""
+        q = self.autres_objets.get(nom, 0)
+        if q <= 0:
+            messages.show(f"Tu n'as plus de {nom}.")
+            return
+        self.autres_objets[nom] = q - 1
+
+        if nom in AUTRES_CATALOGUE:
+            _, gain = AUTRES_CATALOGUE[nom]
+            self.pas += gain
+            messages.show(f"{nom} consommé : +{gain} pas.")
+        else:
+            messages.show(f"{nom} consommé.")
+
+    def ajouter_objet_permanent(self, nom: str):
+        """Débloque un objet permanent (pelle, marteau, etc.)."""
+        n = nom.lower()
+        if "pelle" in n:
+            self.pelle = True
+        elif "marteau" in n:
+            self.marteau = True
+        elif "crochet" in n or "crochetage" in n:
+            self.kit_crochetage = True
+        elif "détecteur" in n or "detecteur" in n:
+            self.detecteur_metaux = True
+        elif "patte" in n:
+            self.patte_lapin = True
+
+# Consommables
+AUTRES_CATALOGUE = {
+    "Pomme":    ("+2 pas", 2),
+    "Banane":   ("+3 pas", 3),
+    "Gâteau":   ("+10 pas", 10),
+    "Sandwich": ("+15 pas", 15),
+    "Repas":    ("+25 pas", 25),
+}
+
+# ------------------ Rooms ------------------
+# Nombre de portes selon la couleur (3 par défaut)
+PORTES_PAR_COULEUR = {
+    C_ORANGE: 4,   # couloirs
+    C_BLEU: 3,     # communes
+    C_VIOLET: 2,   # chambres
+    C_VERT: 3,     # jardins
+    C_ROUGE: 1,    # indésirables
+    C_JAUNE: 2,    # shops
+}
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Piece:
+    """
+    Modèle de pièce, immuable. id = indice dans CATALOGUE (-1 hors catalogue).
+    casier est déclaré dans le catalogue ; nb_portes et boutique sont calculés une fois
+    à la création.
+    """
+    nom: str
+    couleur: Tuple[int, int, int]
+    rarete: int        # 1 commun, 2 un peu rare, 3 rare
+    cout_gemmes: int   # 0 / 1 / 2...
+    effets: Tuple[str, ...]     # texte court
+    actions: Mapping[str, int]  # ex: {"Gemmes":30, "Creuser":25, "Coffre":10}
+    id: int = -1
+    casier: bool = False        # casier verrouillé à ouvrir avec une clé
+    nb_portes: int = field(init=False)
+    boutique: bool = field(init=False)
+
+    def __post_init__(self):
+        fixer = object.__setattr__
+        fixer(self, "effets", tuple(self.effets))
+        fixer(self, "actions", MappingProxyType(dict(self.actions)))
+        fixer(self, "nb_portes", PORTES_PAR_COULEUR.get(self.couleur, 3))
+        fixer(self, "boutique", self.couleur == C_JAUNE)
+
+
+# ======================= Catalogue de pièces =======================
+_MODELES = [
+    # ----- Rooms "fondation" / communes (bleues) -----
+    Piece("Entrance Hall", C_BLEU, 1, 0,
+          ["Pièce de départ", "Quelques ressources"],
+          {"Clé": 10, "Gemmes": 5, "+Pas": 10}),
+    Piece("Foundation", C_BLEU, 1, 0,
+          ["Basique", "Peu d'effets"],
+          {"Clé": 5, "Gemmes": 5}),
+    Piece("Spare Room", C_BLEU, 1, 0,
+          ["Petite salle", "Chance légère de ressources"],
+          {"Clé": 10, "Gemmes": 10}),
+    Piece("Rotunda", C_ORANGE, 1, 0,
+          ["Couloir circulaire", "Plusieurs portes"],
+          {"Clé": 5}),
+    Piece("Parlor", C_BLEU, 1, 0,
+          ["Salon", "Un peu de tout"],
+          {"Clé": 10, "Gemmes": 15}),
+    Piece("Billiard Room", C_BLEU, 1, 0,
+          ["Salle de billard", "Quelques pièces"],
+          {"Gemmes": 15, "Clé": 5}),
+    Piece("Gallery", C_BLEU, 1, 0,
+          ["Galerie", "Chance d'or"],
+          {"Gemmes": 10}),
+    Piece("Closet", C_BLEU, 1, 0,
+          ["Placard", "Petits objets"],
+          {"Clé": 10}),
+    Piece("Walk-in Closet", C_BLEU, 1, 0,
+          ["Grand placard", "Ressources variées"],
+          {"Clé": 15, "Gemmes": 10}),
+    Piece("Attic", C_BLEU, 1, 0,
+          ["Grenier", "Objet caché"],
+          {"Clé": 15, "Gemmes": 10, "Coffre": 20}),
+    Piece("Storeroom", C_BLEU, 1, 0,
+          ["Réserve", "Beaucoup d'objets"],
+          {"Clé": 10, "Gemmes": 15, "Coffre": 25}),
+
+    # ----- Rooms "milieu" ----- 
+    Piece("Nook", C_BLEU, 2, 0,
+          ["Coin tranquille", "Quelques ressources"],
+          {"Clé": 10, "Gemmes": 10}),
+    Piece("Garage", C_BLEU, 2, 0,
+          ["Garage", "Objets métalliques"],
+          {"Clé": 15, "Gemmes": 10}),
+    Piece("Music Room", C_BLEU, 2, 0,
+          ["Salle de musique", "Parfois des gemmes"],
+          {"Gemmes": 20}),
+    Piece("Locker Room", C_BLEU, 2, 0,
+          ["Vestiaire", "Casiers verrouillés"],
+          {"Clé": 20, "Coffre": 10}, casier=True),
+    Piece("Den", C_VERT, 2, 0,
+          ["Foyer", "Souvent une gemme"],
+          {"Gemmes": 60, "Coffre": 20}),
+    Piece("Wine Cellar", C_BLEU, 2, 0,
+          ["Cave à vin", "Coffres et gemmes"],
+          {"Gemmes": 30, "Coffre": 35}),
+    Piece("Trophy Room", C_BLEU, 2, 0,
+          ["Salle des trophées", "Objets rares"],
+          {"Clé": 20, "Gemmes": 20, "Coffre": 30}),
+    Piece("Ballroom", C_ORANGE, 2, 0,
+          ["Grande salle de bal", "Beaucoup de portes"],
+          {"Clé": 10}),
+    Piece("Pantry", C_JAUNE, 2, 1,
+          ["Garde-manger", "Beaucoup de nourriture"],
+          {"+Pas": 60, "Gemmes": 10}),
+    Piece("Rumpus Room", C_BLEU, 2, 0,
+          ["Salle de jeux", "Ressources variées"],
+          {"Gemmes": 20, "+Pas": 20}),
+    Piece("Vault", C_JAUNE, 2, 2,
+          ["Coffre-fort", "Beaucoup de coffres"],
+          {"Clé": 15, "Gemmes": 25, "Coffre": 60}),
+    Piece("Office", C_BLEU, 2, 0,
+          ["Bureau", "Clés et gemmes"],
+          {"Clé": 20, "Gemmes": 15}),
+
+    # ----- Bibliothèque / étude (niveau 3) -----
+    Piece("Drawing Room", C_BLEU, 2, 1,
+          ["Salon élégant", "Petits bonus"],
+          {"Gemmes": 20, "+Pas": 20}),
+    Piece("Study", C_BLEU, 2, 1,
+          ["Étude", "Clés cachées"],
+          {"Clé": 25, "Gemmes": 10}),
+    Piece("Library", C_BLEU, 2, 1,
+          ["Bibliothèque", "Quelques gemmes"],
+          {"Gemmes": 25}),
+    Piece("Chamber of Mirrors", C_ROUGE, 3, 2,
+          ["Salle dangereuse", "Peut faire perdre des pas"],
+          {"Gemmes": 30, "-Pas": 40}),
+    Piece("The Pool", C_VERT, 3, 1,
+          ["Piscine", "Objets sous l'eau"],
+          {"Gemmes": 25, "Clé": 15, "Creuser": 40}),
+    Piece("Drafting Studio", C_BLEU, 3, 1,
+          ["Atelier de plans", "Bonus variés"],
+          {"Clé": 15, "Gemmes": 20, "+Pas": 10}),
+
+    # ----- Jardins (vertes) -----
+    Piece("Garden", C_VERT, 2, 0,
+          ["Jardin d'intérieur", "Gemmes et endroits à creuser"],
+          {"Gemmes": 35, "Creuser": 60, "Clé": 10}),
+    Piece("Greenhouse", C_VERT, 3, 1,
+          ["Serre", "Beaucoup d'endroits à creuser"],
+          {"Gemmes": 40, "Creuser": 80, "Clé": 15, "Coffre": 20}),
+    Piece("Solarium", C_VERT, 3, 1,
+          ["Solarium", "Bonus de pas et gemmes"],
+          {"Gemmes": 30, "Creuser": 50, "+Pas": 40}),
+    Piece("Veranda", C_VERT, 2, 0,
+          ["Véranda", "Endroits à creuser"],
+          {"Creuser": 60, "Gemmes": 20}),
+
+    # ----- Chambres (violettes) -----
+    Piece("Bedroom", C_VIOLET, 2, 0,
+          ["Chambre", "Redonne des pas"],
+          {"+Pas": 70}),
+    Piece("Boudoir", C_VIOLET, 2, 1,
+          ["Boudoir", "Beaucoup de repos"],
+          {"+Pas": 90, "Gemmes": 10}),
+    Piece("Guest Room", C_VIOLET, 2, 0,
+          ["Chambre d'amis", "Redonne quelques pas"],
+          {"+Pas": 60}),
+    Piece("Nursery", C_VIOLET, 2, 0,
+          ["Chambre d'enfant", "Rend des pas"],
+          {"+Pas": 55}),
+    Piece("Maid's Chamber", C_VIOLET, 2, 0,
+          ["Chambre de bonne", "Petits bonus"],
+          {"+Pas": 40, "Gemmes": 10}),
+
+    # ----- Couloirs (oranges) -----
+    Piece("Corridor", C_ORANGE, 1, 0,
+          ["Couloir", "Beaucoup de portes"],
+          {"Clé": 5}),
+    Piece("Long Corridor", C_ORANGE, 2, 0,
+          ["Long couloir", "Encore plus de portes"],
+          {"Clé": 10}),
+    Piece("Grand Staircase", C_ORANGE, 2, 1,
+          ["Grand escalier", "Bonne connectivité"],
+          {"Clé": 10}),
+    Piece("Cloister", C_ORANGE, 3, 1,
+          ["Cloître", "Couloirs multiples"],
+          {"Clé": 10, "Gemmes": 10}),
+
+    # ----- Salles rouges -----
+    Piece("Furnace", C_ROUGE, 3, 1,
+          ["Fournaise", "Peut retirer des pas"],
+          {"-Pas": 60, "Gemmes": 20}),
+    Piece("Boiler Room", C_ROUGE, 3, 1,
+          ["Chaufferie", "Dangereuse mais rentable"],
+          {"-Pas": 40, "Gemmes": 30, "Clé": 15}),
+    Piece("Closed Exhibit", C_ROUGE, 3, 2,
+          ["Exposition fermée", "Souvent mauvais plan"],
+          {"-Pas": 50, "Gemmes": 20}),
+    Piece("Darkroom", C_ROUGE, 2, 1,
+          ["Chambre noire", "Peut faire perdre des pas"],
+          {"-Pas": 50, "Gemmes": 20}),
+
+    # ----- Shops (jaunes) -----
+    Piece("Bookshop", C_JAUNE, 3, 2,
+          ["Librairie", "Échange or contre objets"],
+          {"Gemmes": 25, "+Pas": 30}),
+    Piece("Casino", C_JAUNE, 3, 3,
+          ["Casino", "Très risqué"],
+          {"Gemmes": 40, "-Pas": 40, "+Pas": 40}),
+    Piece("Dining Room", C_JAUNE, 2, 1,
+          ["Salle à manger", "Nourriture (pas)"],
+          {"+Pas": 70}),
+    Piece("Cafeteria", C_JAUNE, 2, 1,
+          ["Cafétéria", "Beaucoup de nourriture"],
+          {"+Pas": 80, "Gemmes": 10}),
+
+    # ----- Autres bleues -----
+    Piece("Archives", C_BLEU, 2, 1,
+          ["Archives", "Clés et gemmes"],
+          {"Clé": 25, "Gemmes": 20}),
+    Piece("Aquarium", C_BLEU, 2, 1,
+          ["Aquarium", "Objets sous l'eau"],
+          {"Gemmes": 25, "Clé": 10}),
+    Piece("Observatory", C_BLEU, 3, 2,
+          ["Observatoire", "Bonus variés"],
+          {"Gemmes": 30, "Clé": 15, "+Pas": 20}),
+    Piece("Chapel", C_BLEU, 2, 1,
+          ["Chapelle", "Petit bonus de pas"],
+          {"+Pas": 30, "Gemmes": 10}),
+
+    # ----- Objectif -----
+    Piece("Antechamber", C_BLEU, 3, 0,
+          ["Dernière pièce", "But du jeu"],
+          {"Gemmes": 0}),
+]
+
+# Modèles du tirage, id = position ; l'Entrée (pièce de départ) prend l'id suivant
+PIECES_MODELES: Tuple[Piece, ...] = tuple(replace(p, id=k) for k, p in enumerate(_MODELES))
+ENTREE = Piece("Entrée", C_BLEU, 1, 0, ("Départ",), {"Divers": 100}, id=len(PIECES_MODELES))
+del _MODELES
+
+ID_ENTREE = ENTREE.id
+ID_ANTICHAMBRE = next(p.id for p in PIECES_MODELES if p.nom == "Antechamber")
+
+# ------------------ Aléa ------------------
+class AleaJeu:
+    """
+    Générateurs indépendants par sous-système, tous dérivés d'une seule graine :
+    plan (verrous, portes des pièces posées), tirage, loot, actions (creuser, coffres,
+    casiers). Une même graine redonne le même manoir et les mêmes tirages, et consommer
+    un flux (ex. relancer le tirage) ne décale pas les autres.
+    """
+    FLUX = ("plan", "tirage", "loot", "actions")
+
+    def __init__(self, graine: Optional[int] = None):
+        if graine is None:
+            graine = random.randrange(2 ** 63)
+        self.graine = graine
+        # une graine str est hachée en SHA-512 : stable d'une exécution à l'autre
+        self.plan = random.Random(f"{graine}:plan")
+        self.tirage = random.Random(f"{graine}:tirage")
+        self.loot = random.Random(f"{graine}:loot")
+        self.actions = random.Random(f"{graine}:actions")
+
+    @classmethod
+    def commun(cls, rng: random.Random) -> "AleaJeu":
+        """Tous les flux tirés dans un même générateur (copies explorées par une IA)."""
+        a = cls.__new__(cls)
+        a.graine = None
+        for nom in cls.FLUX:
+            setattr(a, nom, rng)
+        return a
+
+    def copie(self) -> "AleaJeu":
+        return AleaJeu.depuis_etat(self.graine, self.getstate())
+
+    @classmethod
+    def depuis_etat(cls, graine, etat: Tuple) -> "AleaJeu":
+        """Générateurs recréés dans l'état donné (sans les ensemencer au préalable)."""
+        a = cls.__new__(cls)
+        a.graine = graine
+        for nom, e in zip(cls.FLUX, etat):
+            r = random.Random.__new__(random.Random)   # Random() lirait os.urandom pour rien
+            r.setstate(e)
+            setattr(a, nom, r)
+        return a
+
+    def getstate(self) -> Tuple:
+        return tuple(getattr(self, nom).getstate() for nom in self.FLUX)
+
+    def setstate(self, etat: Tuple):
+        for nom, e in zip(self.FLUX, etat):
+            getattr(self, nom).setstate(e)
+
+# ------------------ Grille & Portes ------------------
+GRID_W, GRID_H = 5, 9  # 5 colonnes, 9 rangées (0 = haut)
+
+DIRECTIONS = ("N", "E", "S", "W")
+DELTAS = {"N": (0, -1), "E": (1, 0), "S": (0, 1), "W": (-1, 0)}
+OPPOSEE = {"N": "S", "S": "N", "E": "W", "W": "E"}
+
+@lru_cache(maxsize=None)
+def poids_verrou_pour_ligne(y: int, hauteur: int = GRID_H):
+    """Niveau fixe (rangées du bas et du haut) ou poids cumulés des niveaux 0/1/2."""
+    if y == hauteur - 1:
+        return 0
+    if y == 0:
+        return 2
+    dist_top = ((hauteur - 1 - y) * (GRID_H - 1)) // (hauteur - 1)
+    w0 = max(1, 5 - dist_top)
+    w1 = max(1, 1 + dist_top)
+    w2 = max(1, dist_top // 2 + 1)
+    return (w0, w0 + w1, w0 + w1 + w2)
+
+def niveau_verrou_pour_ligne(y: int, rng=random, hauteur: int = GRID_H) -> int:
+    """
+    - dernière rangée (bas, y==hauteur-1) : niveau 0 uniquement
+    - première rangée (haut, y==0)        : niveau 2 uniquement
+    - autres : probas intermédiaires (plus on monte, plus 1/2 apparaissent)
+    La courbe est celle du manoir 5x9, étirée sur la hauteur du manoir.
+    Même tirage que rng.choices([0, 1, 2], weights) : un appel à rng.random().
+    """
+    cumul = poids_verrou_pour_ligne(y, hauteur)
+    if isinstance(cumul, int):
+        return cumul
+    return bisect(cumul, rng.random() * cumul[2], 0, 2)
+
+# ------------------ Grille compacte ------------------
+# Porte dans la direction DIRECTIONS[k] : bit k du masque, verrou sur les bits 2k..2k+1
+BIT_DIR = {d: 1 << k for k, d in enumerate(DIRECTIONS)}
+DECALAGE_VERROU = {d: 2 * k for k, d in enumerate(DIRECTIONS)}
+
+# Drapeaux d'une case
+DECOUVERTE, COFFRE, TROU, CASIER, BOUTIQUE, LOOT_GENERE = 1, 2, 4, 8, 16, 32
+
+@lru_cache(maxsize=None)
+def voisins_grille(largeur: int, hauteur: int) -> Tuple[Dict[str, int], ...]:
+    """Pour chaque case i = y * largeur + x : {direction: indice du voisin} (voisins dans la grille)."""
+    res = []
+    for i in range(largeur * hauteur):
+        x, y = i % largeur, i // largeur
+        v = {}
+        for d in DIRECTIONS:
+            nx, ny = x + DELTAS[d][0], y + DELTAS[d][1]
+            if 0 <= nx < largeur and 0 <= ny < hauteur:
+                v[d] = ny * largeur + nx
+        res.append(v)
+    return tuple(res)
+
+class Grille:
+    """
+    Manoir en tableaux plats, case i = y * largeur + x :
+    - portes   : array('B'), masque 4 bits des portes existantes (BIT_DIR)
+    - verrous  : array('B'), niveau 0..2 de chaque porte sur 2 bits (DECALAGE_VERROU)
+    - drapeaux : array('B'), DECOUVERTE | COFFRE | TROU | CASIER | BOUTIQUE | LOOT_GENERE
+    - pieces, objets : Piece posée et objets à ramasser (tuple) par case
+    Les voisins sont précalculés ; copie() et empreinte() ne touchent que ces tableaux.
+    Toute modification passe par _ecrire(i) : copie() partage les tableaux jusqu'à la
+    première écriture (copie-sur-écriture), et si un journal est ouvert, les anciennes
+    valeurs de la case y sont notées (annulation en O(cases modifiées)).
+    """
+    def __init__(self, largeur: int = GRID_W, hauteur: int = GRID_H):
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.n = n = largeur * hauteur
+        self.portes = array("B", bytes(n))
+        self.verrous = array("B", bytes(n))
+        self.drapeaux = array("B", bytes(n))
+        self.pieces: List[Optional[Piece]] = [None] * n
+        self.objets: List[Tuple[Dict, ...]] = [()] * n
+        self.voisins = voisins_grille(largeur, hauteur)
+        self.partagee = False
+        self.journal: Optional[List[Tuple]] = None
+
+    def _ecrire(self, i: int):
+        """À appeler avant de modifier la case i."""
+        if self.partagee:
+            self.portes = array("B", self.portes)
+            self.verrous = array("B", self.verrous)
+            self.drapeaux = array("B", self.drapeaux)
+            self.pieces = self.pieces[:]
+            self.objets = self.objets[:]     # tuples : partagés sans risque
+            self.partagee = False
+        if self.journal is not None:
+            self.journal.append((i, self.portes[i], self.verrous[i], self.drapeaux[i],
+                                 self.pieces[i], self.objets[i]))
+
+    def restaurer(self, journal: List[Tuple]):
+        """Remet les cases notées dans un journal à leurs anciennes valeurs."""
+        ouvert, self.journal = self.journal, None
+        for i, porte, verrou, drapeau, piece, objets in reversed(journal):
+            self._ecrire(i)
+            self.portes[i], self.verrous[i], self.drapeaux[i] = porte, verrou, drapeau
+            self.pieces[i], self.objets[i] = piece, objets
+        self.journal = ouvert
+
+    def indice(self, x: int, y: int) -> int:
+        return y * self.largeur + x
+
+    def xy(self, i: int) -> Tuple[int, int]:
+        return i % self.largeur, i // self.largeur
+
+    def cellule(self, x: int, y: int) -> "Cellule":
+        return Cellule(self, y * self.largeur + x)
+
+    # ---------- portes ----------
+    def a_porte(self, i: int, d: str) -> bool:
+        return bool(self.portes[i] & BIT_DIR[d])
+
+    def ajouter_porte(self, i: int, d: str):
+        self._ecrire(i)
+        self.portes[i] |= BIT_DIR[d]
+
+    def definir_portes(self, i: int, masque: int):
+        self._ecrire(i)
+        self.portes[i] = masque
+
+    def verrou(self, i: int, d: str) -> int:
+        return (self.verrous[i] >> DECALAGE_VERROU[d]) & 3
+
+    def definir_verrou(self, i: int, d: str, niveau: int):
+        k = DECALAGE_VERROU[d]
+        self._ecrire(i)
+        self.verrous[i] = (self.verrous[i] & ~(3 << k) & 0xFF) | (niveau << k)
+
+    def relie(self, i: int, d: str) -> int:
+        """Indice de la pièce découverte atteinte par la porte d (des deux côtés), sinon -1."""
+        j = self.voisins[i].get(d, -1)
+        if j < 0 or not self.portes[i] & BIT_DIR[d]:
+            return -1
+        if self.drapeaux[j] & DECOUVERTE and self.portes[j] & BIT_DIR[OPPOSEE[d]]:
+            return j
+        return -1
+
+    # ---------- drapeaux / objets ----------
+    def a(self, i: int, drapeau: int) -> bool:
+        return bool(self.drapeaux[i] & drapeau)
+
+    def marquer(self, i: int, drapeau: int, valeur: bool = True):
+        self._ecrire(i)
+        if valeur:
+            self.drapeaux[i] |= drapeau
+        else:
+            self.drapeaux[i] &= ~drapeau & 0xFF
+
+    def poser_piece(self, i: int, p: Optional[Piece]):
+        self._ecrire(i)
+        self.pieces[i] = p
+
+    def ajouter_objet(self, i: int, pk: Dict):
+        self._ecrire(i)
+        self.objets[i] = self.objets[i] + (pk,)
+
+    def definir_objets(self, i: int, objets: Tuple[Dict, ...]):
+        self._ecrire(i)
+        self.objets[i] = objets
+
+    def retirer_objet(self, i: int, pk: Dict):
+        objs = list(self.objets[i])
+        objs.remove(pk)
+        self._ecrire(i)
+        self.objets[i] = tuple(objs)
+
+    # ---------- copie / hachage ----------
+    def copie(self) -> "Grille":
+        """Copie en O(1) : les tableaux restent partagés jusqu'à la première écriture de l'une ou l'autre."""
+        g = Grille.__new__(Grille)
+        g.__dict__.update(self.__dict__)
+        g.journal = None
+        self.partagee = g.partagee = True
+        return g
+
+    def empreinte(self) -> Tuple:
+        """Valeur hachable décrivant tout le contenu de la grille."""
+        return (self.largeur, self.hauteur, self.portes.tobytes(), self.verrous.tobytes(),
+                self.drapeaux.tobytes(), tuple(p.nom if p else None for p in self.pieces),
+                tuple(tuple(tuple(sorted(pk.items())) for pk in objs) for objs in self.objets))
+
+def _drapeau(bit: int) -> property:
+    def lire(self) -> bool:
+        return bool(self.grille.drapeaux[self.i] & bit)
+    def ecrire(self, valeur: bool):
+        self.grille.marquer(self.i, bit, valeur)
+    return property(lire, ecrire)
+
+class Cellule:
+    """Vue sur la case i d'une Grille (rien n'est stocké dans la vue)."""
+    __slots__ = ("grille", "i")
+
+    def __init__(self, grille: Grille, i: int):
+        self.grille = grille
+        self.i = i
+
+    decouverte = _drapeau(DECOUVERTE)
+    has_coffre = _drapeau(COFFRE)
+    has_trou = _drapeau(TROU)
+    has_casier = _drapeau(CASIER)
+    is_shop = _drapeau(BOUTIQUE)
+    loot_genere = _drapeau(LOOT_GENERE)
+
+    @property
+    def piece(self) -> Optional[Piece]:
+        return self.grille.pieces[self.i]
+
+    @piece.setter
+    def piece(self, p: Optional[Piece]):
+        self.grille.poser_piece(self.i, p)
+
+    @property
+    def pickables(self) -> Tuple[Dict, ...]:
+        return self.grille.objets[self.i]
+
+    def porte(self, d: str) -> bool:
+        return self.grille.a_porte(self.i, d)
+
+    def verrou(self, d: str) -> int:
+        return self.grille.verrou(self.i, d)
+
+# ------------------ Frontière d'exploration ------------------
+class Frontiere:
+    """
+    Portes existantes des pièces découvertes qui mènent vers une case encore vide.
+    Tenue à jour à chaque pièce posée ; les compteurs par niveau de verrou (et les
+    clés encore récupérables) disent en O(1) si le manoir peut encore progresser.
+    """
+    def __init__(self, grille: Grille):
+        self.grille = grille
+        self.portes: Dict[Tuple[int, int, str], int] = {}   # (x, y, dir) -> niveau
+        self.par_niveau = [0, 0, 0]
+        self.cles_au_sol = 0
+        self.boutiques = 0
+        self.partagee = False
+        portes, drapeaux, par_niveau = grille.portes, grille.drapeaux, self.par_niveau
+        for i in range(grille.n):
+            if not drapeaux[i] & DECOUVERTE:
+                continue
+            x, y = grille.xy(i)
+            for d, j in grille.voisins[i].items():
+                if portes[i] & BIT_DIR[d] and not drapeaux[j] & DECOUVERTE:
+                    lvl = grille.verrou(i, d)
+                    self.portes[(x, y, d)] = lvl
+                    par_niveau[lvl] += 1
+
+    def _detacher(self):
+        if self.partagee:
+            self.portes = dict(self.portes)
+            self.par_niveau = self.par_niveau[:]
+            self.partagee = False
+
+    def _retirer(self, cle: Tuple[int, int, str]):
+        lvl = self.portes.pop(cle, None)
+        if lvl is not None:
+            self.par_niveau[lvl] -= 1
+
+    def piece_posee(self, x: int, y: int):
+        """À appeler une fois la pièce (x, y) posée et ses portes fixées."""
+        self._detacher()
+        g = self.grille
+        i = g.indice(x, y)
+        for d, j in g.voisins[i].items():
+            nx, ny = g.xy(j)
+            # la porte du voisin vers (x, y) ne mène plus vers l'inconnu
+            self._retirer((nx, ny, OPPOSEE[d]))
+            if g.portes[i] & BIT_DIR[d] and not g.drapeaux[j] & DECOUVERTE:
+                lvl = g.verrou(i, d)
+                self.portes[(x, y, d)] = lvl
+                self.par_niveau[lvl] += 1
+
+    def loot_genere(self, cell: Cellule):
+        self.cles_au_sol += sum(1 for pk in cell.pickables if pk.get("nom") == "Clé")
+        if cell.is_shop:
+            self.boutiques += 1
+
+    def copie(self, grille: Grille) -> "Frontiere":
+        """Copie liée à grille ; les portes restent partagées jusqu'à la prochaine pièce posée."""
+        f = Frontiere.__new__(Frontiere)
+        f.__dict__.update(self.__dict__)
+        f.grille = grille
+        self.partagee = f.partagee = True
+        return f
+
+    def cle_ramassee(self):
+        self.cles_au_sol = max(0, self.cles_au_sol - 1)
+
+    def progression_possible(self, cles: int, kit: bool) -> bool:
+        n0, n1, n2 = self.par_niveau
+        return n0 > 0 or (n1 > 0 and (kit or cles > 0)) or (n2 > 0 and cles > 0)
+
+
+# ------------------ Distances entre pièces (voyage rapide) ------------------
+class CacheDistances:
+    """
+    Plus courts chemins (en pas) entre pièces découvertes reliées par des portes
+    des deux côtés. Un BFS par source demandée, gardé en LRU ; poser une pièce ne
+    peut que raccourcir des distances, chaque carte est donc relaxée depuis la
+    nouvelle pièce au lieu d'être recalculée. Une copie partage les cartes ; chacune
+    n'est dupliquée qu'au moment d'être relaxée (_propres : cartes non partagées).
+    """
+    def __init__(self, grille: Grille, capacite: int = 16):
+        self.grille = grille
+        self.capacite = capacite
+        self._sources: "OrderedDict[int, Dict[int, int]]" = OrderedDict()
+        self._propres = set()
+        self.bfs = 0           # cartes calculées de zéro
+        self.relaxees = 0      # cases mises à jour incrémentalement
+
+    def _liees(self, i: int):
+        g = self.grille
+        for d in g.voisins[i]:
+            j = g.relie(i, d)
+            if j >= 0:
+                yield j
+
+    def _propager(self, dist: Dict[int, int], file: deque):
+        while file:
+            i = file.popleft()
+            di = dist[i] + 1
+            for j in self._liees(i):
+                if dist.get(j, di + 1) > di:
+                    dist[j] = di
+                    self.relaxees += 1
+                    file.append(j)
+
+    def distances(self, source: int) -> Dict[int, int]:
+        """{indice de pièce: distance} pour toutes les pièces atteignables depuis source."""
+        dist = self._sources.get(source)
+        if dist is not None:
+            self._sources.move_to_end(source)
+            return dist
+        self.bfs += 1
+        dist = {source: 0}
+        self._propager(dist, deque([source]))
+        self._sources[source] = dist
+        self._propres.add(source)
+        if len(self._sources) > self.capacite:
+            self._sources.popitem(last=False)
+        return dist
+
+    def distance(self, a: int, b: int) -> Optional[int]:
+        return self.distances(a).get(b)
+
+    def piece_posee(self, i: int):
+        """À appeler une fois la pièce i posée et les portes fixées."""
+        for source, dist in self._sources.items():
+            proche = min((dist[j] for j in self._liees(i) if j in dist), default=None)
+            if proche is None or dist.get(i, proche + 2) <= proche + 1:
+                continue
+            if source not in self._propres:
+                dist = self._sources[source] = dict(dist)
+                self._propres.add(source)
+            dist[i] = proche + 1
+            self.relaxees += 1
+            self._propager(dist, deque([i]))
+
+    def copie(self, grille: Grille) -> "CacheDistances":
+        c = CacheDistances(grille, self.capacite)
+        c._sources = OrderedDict(self._sources)
+        self._propres = set()
+        return c
+
+    def vider(self):
+        self._sources.clear()
+        self._propres.clear()
+
+# ------------------ Pioche de pièces ------------------
+POIDS_RARETE = {1: 60, 2: 30, 3: 10}
+BONUS_PATTE_LAPIN = 5
+# Nombre d'exemplaires de chaque pièce dans la pioche, selon la rareté
+EXEMPLAIRES = {1: 4, 2: 3, 3: 2}
+
+def exemplaires_pour(nb_cases: int) -> Dict[int, int]:
+    """Exemplaires par rareté pour un manoir de nb_cases : ceux du 5x9, multipliés à la surface."""
+    facteur = -(-nb_cases // (GRID_W * GRID_H))
+    return {r: k * facteur for r, k in EXEMPLAIRES.items()}
+
+class ArbreFenwick:
+    """Sommes préfixes d'entiers : mise à jour d'un élément et préfixe en O(log n)."""
+    def __init__(self, valeurs: List[int]):
+        self.n = len(valeurs)
+        self.t = [0] * (self.n + 1)
+        for i, v in enumerate(valeurs, 1):
+            self.t[i] += v
+            j = i + (i & -i)
+            if j <= self.n:
+                self.t[j] += self.t[i]
+        self.total = sum(valeurs)
+
+    def ajouter(self, i: int, delta: int):
+        self.total += delta
+        i += 1
+        while i <= self.n:
+            self.t[i] += delta
+            i += i & -i
+
+    def copie(self) -> "ArbreFenwick":
+        a = ArbreFenwick.__new__(ArbreFenwick)
+        a.n, a.t, a.total = self.n, self.t[:], self.total
+        return a
+
+    def chercher(self, cible: int) -> int:
+        """Plus petit index i (0-based) tel que somme(0..i) > cible."""
+        pos = 0
+        pas = 1 << self.n.bit_length()
+        while pas:
+            j = pos + pas
+            if j <= self.n and self.t[j] <= cible:
+                pos = j
+                cible -= self.t[j]
+            pas >>= 1
+        return pos
+
+class PoolTirage:
+    """
+    Pioche pondérée des pièces, tirée en O(log n).
+    Le poids d'une pièce est exemplaires_restants * (poids de rareté + bonus) ; deux
+    arbres de Fenwick (poids de base et exemplaires) permettent de changer le bonus
+    de la patte de lapin en O(1). Une pièce posée retire un exemplaire de la pioche.
+    """
+    def __init__(self, modeles: Tuple[Piece, ...], exemplaires: Optional[Dict[int, int]] = None):
+        """modeles : pièces du catalogue, dans l'ordre de leurs id (modeles[p.id] is p)."""
+        exemplaires = EXEMPLAIRES if exemplaires is None else exemplaires
+        self.modeles = modeles
+        self._construire([exemplaires[p.rarete] for p in modeles])
+        self.bonus = 0
+
+    @classmethod
+    def depuis_restants(cls, modeles: Tuple[Piece, ...], restants: List[int], bonus: int = 0) -> "PoolTirage":
+        """Pioche reconstruite à partir des exemplaires restants (chargement d'une sauvegarde)."""
+        p = cls.__new__(cls)
+        p.modeles = modeles
+        p._construire(list(restants))
+        p.bonus = bonus
+        return p
+
+    def _construire(self, restants: List[int]):
+        modeles = self.modeles
+        if any(p.id != k for k, p in enumerate(modeles)):
+            raise ValueError("PoolTirage : les id doivent suivre l'ordre des pièces.")
+        self.restants = restants
+        # par id : poids de rareté, pièce sans coût en gemmes (partagés entre les copies)
+        self._poids = tuple(POIDS_RARETE[p.rarete] for p in modeles)
+        self._gratuite = tuple(p.cout_gemmes == 0 for p in modeles)
+        self._base = ArbreFenwick([w * k for w, k in zip(self._poids, restants)])
+        self._copies = ArbreFenwick(restants)
+        self._gratuites = ArbreFenwick([1 if g and k > 0 else 0 for g, k in zip(self._gratuite, restants)])
+        self.partagee = False
+
+    def copie(self) -> "PoolTirage":
+        """Copie en O(1) : exemplaires et arbres partagés jusqu'au prochain retrait."""
+        p = PoolTirage.__new__(PoolTirage)
+        p.__dict__.update(self.__dict__)
+        self.partagee = p.partagee = True
+        return p
+
+    def definir_bonus(self, bonus: int):
+        self.bonus = bonus
+
+    def total(self) -> int:
+        return self._base.total + self.bonus * self._copies.total
+
+    def _chercher(self, cible: int) -> int:
+        """Recherche dans la somme des deux arbres : poids = base + bonus * exemplaires."""
+        tb, tc, b, n = self._base.t, self._copies.t, self.bonus, self._base.n
+        pos = 0
+        pas = 1 << n.bit_length()
+        while pas:
+            j = pos + pas
+            if j <= n:
+                v = tb[j] + b * tc[j]
+                if v <= cible:
+                    pos = j
+                    cible -= v
+            pas >>= 1
+        return pos
+
+    def tirer(self, rng) -> Optional[Piece]:
+        total = self.total()
+        if total <= 0:
+            return None
+        return self.modeles[self._chercher(rng.randrange(total))]
+
+    def tirer_gratuite(self, rng) -> Optional[Piece]:
+        """Pièce sans coût en gemmes, uniforme parmi celles qui restent."""
+        if self._gratuites.total <= 0:
+            return None
+        return self.modeles[self._gratuites.chercher(rng.randrange(self._gratuites.total))]
+
+    def retirer(self, p: Piece):
+        i = p.id
+        if not 0 <= i < len(self.restants) or self.restants[i] <= 0:
+            return      # hors pioche (Entrée)
+        if self.partagee:
+            self.restants = self.restants[:]
+            self._base, self._copies, self._gratuites = \
+                self._base.copie(), self._copies.copie(), self._gratuites.copie()
+            self.partagee = False
+        self.restants[i] -= 1
+        self._base.ajouter(i, -self._poids[i])
+        self._copies.ajouter(i, -1)
+        if self.restants[i] == 0 and self._gratuite[i]:
+            self._gratuites.ajouter(i, -1)
+
+# ------------------ Boutique ------------------
+# Prix en or, objets consommables et permanents
+BOUTIQUE_ARTICLES: List[Dict] = [
+    {"nom": "Petit repas (+10 pas)",  "prix": 5,  "objet": "Repas"},
+    {"nom": "Grand repas (+25 pas)",  "prix": 10, "objet": "Repas"},
+    {"nom": "Dé supplémentaire",      "prix": 8,  "gain_de": 1},
+    {"nom": "Clé supplémentaire",     "prix": 6,  "gain_cle": 1},
+    {"nom": "Gemmes (+1)",            "prix": 7,  "gain_gemme": 1},
+    {"nom": "Pelle (objet permanent)",        "prix": 15, "permanent": "Pelle"},
+    {"nom": "Patte de lapin (objet permanent)", "prix": 20, "permanent": "Patte de lapin"},
+]
+PRIX_CLE_BOUTIQUE = min(a["prix"] for a in BOUTIQUE_ARTICLES if "gain_cle" in a)
+
+def piece_entree() -> Piece:
+    return ENTREE
+
+# ------------------ Tables de loot ------------------
+# Un seul tirage rng.getrandbits(BITS_LOOT) par première entrée, découpé en champs fixes :
+#   bits  0-15 trou   16-31 coffre   32-47 clé   48-63 gemme   64-79 or
+#   bits 80-81 quantité d'or - 1     bit 82 repli (clé ou gemme si la pièce est restée vide)
+# Une probabilité p devient le seuil entier round(p * 65536) : le champ de 16 bits est tiré sous le seuil.
+ECHELLE_LOOT = 1 << 16
+BITS_LOOT = 83
+MASQUE_16 = ECHELLE_LOOT - 1
+
+def _seuil(pourcent: float) -> int:
+    return int(pourcent * ECHELLE_LOOT / 100 + 0.5)
+
+class TableLoot:
+    """
+    Actions d'une pièce (Piece.actions) compilées en seuils entiers.
+    cle[k] / gemme[k] : seuils pour k = détecteur de métaux (bit 0) | patte de lapin (bit 1).
+    drapeaux : BOUTIQUE / CASIER posés sur la case quoi qu'on tire.
+    """
+    __slots__ = ("trou", "coffre", "cle", "gemme", "or_", "repli", "drapeaux")
+
+    def __init__(self, p: Piece):
+        a = p.actions
+        creuser = a.get("Creuser")
+        self.trou = _seuil(creuser if isinstance(creuser, int) else 50 if p.couleur == C_VERT else 0)
+        self.coffre = _seuil(a.get("Coffre", 0))
+        # une valeur non entière (texte) ne donne jamais l'objet, même avec les bonus
+        cle = a.get("Clé", 0)
+        gem = a.get("Gemmes", 0)
+        self.cle = tuple(_seuil(cle + 10 * (k & 1) + 5 * (k >> 1)) if isinstance(cle, int) else 0
+                         for k in range(4))
+        self.gemme = tuple(_seuil(gem + 5 * (k >> 1)) if isinstance(gem, int) else 0 for k in range(4))
+        self.or_ = _seuil(25) if p.couleur == C_BLEU else 0
+        self.repli = sum(v for v in a.values() if isinstance(v, int)) > 0
+        self.drapeaux = (BOUTIQUE if p.boutique else 0) | (CASIER if p.casier else 0)
+
+# ------------------ Catalogue indexé ------------------
+@dataclass(frozen=True, slots=True, eq=False)
+class Catalogue:
+    """Toutes les pièces, rangées par id (pieces[p.id] is p), et leur table de loot compilée par id."""
+    pieces: Tuple[Piece, ...]
+    loot: Tuple[TableLoot, ...] = field(init=False)
+
+    def __post_init__(self):
+        pieces = self.pieces
+        if any(p.id != k for k, p in enumerate(pieces)):
+            raise ValueError("Catalogue : les id doivent suivre l'ordre des pièces.")
+        object.__setattr__(self, "loot", tuple(TableLoot(p) for p in pieces))
+
+    def __len__(self) -> int:
+        return len(self.pieces)
+
+    def __getitem__(self, id_piece: int) -> Piece:
+        return self.pieces[id_piece]
+
+    def table_loot(self, p: Piece) -> TableLoot:
+        """Table de loot de p ; compilée à la demande pour une pièce hors catalogue (id -1)."""
+        if 0 <= p.id < len(self.loot):
+            return self.loot[p.id]
+        return TableLoot(p)
+
+CATALOGUE = Catalogue(PIECES_MODELES + (ENTREE,))
+
+
+# ------------------ Historique (annulation) ------------------
+HISTORIQUE_MAX = 200
+
+# Attributs de GameState remis tels quels par une annulation (jamais modifiés en place)
+CHAMPS_ANNULABLES = ("x", "y", "vx", "vy", "dir_idx", "nb_dirs_max", "ouverture_en_cours",
+                     "porte_tirage", "choix", "menu_actions", "victoire", "pas_utilises")
+_lire_champs = attrgetter(*CHAMPS_ANNULABLES)
+
+class Instantane:
+    """
+    De quoi défaire une action : attributs simples, inventaire, pioche et frontière
+    (copies partagées), journal des cases modifiées, et état des seuls générateurs
+    dans lesquels l'action a tiré (GameState._rng les note avant le premier tirage).
+    """
+    __slots__ = ("champs", "inv", "pool", "frontiere", "alea", "cases")
+
+    def __init__(self, e: "GameState"):
+        self.champs = _lire_champs(e)
+        # copie de l'inventaire à chaque step : sans dataclasses.replace, plus lent
+        inv = self.inv = Inventaire.__new__(Inventaire)
+        inv.__dict__.update(e.inv.__dict__)
+        inv.autres_objets = dict(inv.autres_objets)
+        self.pool = e.pool.copie()
+        self.frontiere = e.frontiere.copie(e.grille)
+        self.alea: Dict[str, Tuple] = {}
+        self.cases: List[Tuple] = []
+
+    def noter_flux(self, nom: str, rng: random.Random):
+        if nom not in self.alea:
+            # 625 entiers : rangés en array pour ne garder que 2,5 Ko par flux
+            v, interne, g = rng.getstate()
+            self.alea[nom] = (v, array("I", interne), g)
+
+    def inchange(self, e: "GameState") -> bool:
+        """Vrai si l'action n'a rien modifié (refusée) : inutile de la garder dans l'historique."""
+        return (not self.cases and not self.alea
+                and _lire_champs(e) == self.champs
+                and e.inv.__dict__ == self.inv.__dict__
+                and e.pool.restants is self.pool.restants and e.pool.bonus == self.pool.bonus
+                and e.frontiere.portes is self.frontiere.portes
+                and e.frontiere.cles_au_sol == self.frontiere.cles_au_sol
+                and e.frontiere.boutiques == self.frontiere.boutiques)
+
+    def restaurer(self, e: "GameState"):
+        e.grille.restaurer(self.cases)
+        for c, v in zip(CHAMPS_ANNULABLES, self.champs):
+            setattr(e, c, v)
+        e.inv.__dict__.update(self.inv.__dict__)    # l'interface garde une référence à e.inv
+        e.pool = self.pool
+        e.frontiere = self.frontiere
+        # à rebours : si des flux partagent un générateur, le premier état noté l'emporte
+        for nom, (v, interne, g) in reversed(list(self.alea.items())):
+            getattr(e.alea, nom).setstate((v, tuple(interne), g))
+
+
+# ------------------ État de partie ------------------
+# Seules actions acceptées pendant un tirage
+VERBES_TIRAGE = ("choisir", "relancer")
+
+class GameState:
+    """
+    État complet d'une partie et règles associées, sans affichage.
+    step(action) renvoie la liste des messages (texte, durée) produits par l'action.
+    """
+    _instantane: Optional[Instantane] = None     # pendant un step() annulable
+
+    def __init__(self, graine: Optional[int] = None, alea: Optional[AleaJeu] = None,
+                 largeur: int = GRID_W, hauteur: int = GRID_H):
+        self.alea = alea if alea is not None else AleaJeu(graine)
+        self.inv = Inventaire()
+        self.grille = Grille(largeur, hauteur)
+        # Joueur : centre en bas
+        self.x = largeur // 2
+        self.y = hauteur - 1
+        # Curseur VISITE (flèches)
+        self.vx = self.x
+        self.vy = self.y
+        # Cellule de départ
+        depart = self.grille.indice(self.x, self.y)
+        self.grille.marquer(depart, DECOUVERTE)
+        self.grille.pieces[depart] = piece_entree()
+        self._init_portes()
+        # Entrée : 3 portes N/E/W
+        self.grille.portes[depart] = BIT_DIR["N"] | BIT_DIR["E"] | BIT_DIR["W"]
+        self.dir_idx = 0
+        # Incrémenté à chaque modification de la grille (pièce posée, portes ouvertes)
+        self.revision = 0
+
+        # Tirage en cours
+        self.pool = PoolTirage(PIECES_MODELES, exemplaires_pour(self.grille.n))
+        self.choix: List[Piece] = []
+        self.nb_dirs_max = 4
+        self.ouverture_en_cours = False
+        # Pendant un tirage : case à remplir et direction de la porte ouverte
+        self.porte_tirage: Optional[Tuple[int, int, str]] = None
+
+        self.menu_actions: List[Dict] = []
+        self.frontiere = Frontiere(self.grille)
+        self.distances = CacheDistances(self.grille)
+        self.victoire = False
+        self.pas_utilises = 0
+        self.messages: List[Tuple[str, float]] = []
+        # Annulation (activer_historique) : une pile bornée d'Instantane
+        self.historique: Optional[deque] = None
+
+    def copie(self, alea: Optional[AleaJeu] = None) -> "GameState":
+        """
+        Copie indépendante de la partie. Par défaut les générateurs sont copiés
+        (même suite de tirages) ; une IA passe son propre AleaJeu pour ne pas
+        connaître les tirages à venir.
+        """
+        e = GameState.__new__(GameState)
+        e.__dict__.update(self.__dict__)
+        e.alea = alea if alea is not None else self.alea.copie()
+        e.inv = replace(self.inv, autres_objets=dict(self.inv.autres_objets))
+        e.grille = self.grille.copie()
+        e.pool = self.pool.copie()
+        e.choix = self.choix[:]
+        e.menu_actions = self.menu_actions[:]
+        e.frontiere = self.frontiere.copie(e.grille)
+        e.distances = self.distances.copie(e.grille)
+        e.messages = []
+        e.historique = None
+        return e
+
+    # ---------- annulation ----------
+    def activer_historique(self, capacite: int = HISTORIQUE_MAX):
+        """Chaque step() garde de quoi être annulé ; au-delà de capacite, les plus anciens sont oubliés."""
+        self.historique = deque(maxlen=capacite)
+
+    def annuler(self) -> bool:
+        """Défait la dernière action jouée ; False si rien à annuler."""
+        if not self.historique:
+            return False
+        self.historique.pop().restaurer(self)
+        # nouvelle révision : les caches indexés par révision ne confondent pas les deux plans
+        self.revision += 1
+        self.distances.vider()
+        return True
+
+    def _init_portes(self):
+        g = self.grille
+        w, h = g.largeur, g.hauteur
+        alea = self._rng("plan").random
+        verrous = g.verrous
+        for gx in range(w):
+            for gy in range(h):
+                # 4 niveaux de 2 bits, tirés dans l'ordre de DIRECTIONS
+                cumul = poids_verrou_pour_ligne(gy, h)
+                if isinstance(cumul, int):
+                    octet = cumul * 0b01010101
+                else:
+                    total = cumul[2]
+                    octet = 0
+                    for k in range(0, 8, 2):
+                        octet |= bisect(cumul, alea() * total, 0, 2) << k
+                verrous[gy * w + gx] = octet
+                g.portes[gy * w + gx] = 0
+        # Limites hors-grille
+        for gx in range(w):
+            g.definir_verrou(g.indice(gx, 0), "N", 0)
+            g.definir_verrou(g.indice(gx, h - 1), "S", 2)
+        for gy in range(h):
+            g.definir_verrou(g.indice(0, gy), "W", 0)
+            g.definir_verrou(g.indice(w - 1, gy), "E", 0)
+
+    # ---------- lecture ----------
+    def show(self, txt: str, sec=2.0):
+        """Même signature que MessageBar.show : les messages sont collectés pour step()."""
+        self.messages.append((txt, sec))
+
+    def ici(self) -> int:
+        """Indice de la pièce courante dans la grille."""
+        return self.grille.indice(self.x, self.y)
+
+    def current_cell(self) -> Cellule:
+        return Cellule(self.grille, self.ici())
+
+    def direction(self) -> str:
+        return DIRECTIONS[self.dir_idx]
+
+    def dans_grille(self, x: int, y: int) -> bool:
+        return 0 <= x < self.grille.largeur and 0 <= y < self.grille.hauteur
+
+    def case_victoire(self) -> Tuple[int, int]:
+        """Case de l'Antichambre : milieu de la rangée du haut."""
+        return self.grille.largeur // 2, 0
+
+    def deplacement_possible(self, d: str) -> bool:
+        i = self.ici()
+        return d in self.grille.voisins[i] and self.grille.a_porte(i, d)
+
+    def niveau_verrou_direction(self, d: str) -> int:
+        return self.grille.verrou(self.ici(), d)
+
+    def action_faisable(self, entry: Dict) -> bool:
+        if entry.get("kind") == "action":
+            req = entry.get("req")
+            if req == "pelle":    return self.inv.pelle
+            if req == "coffre":   return self.inv.marteau or self.inv.cles > 0
+            if req == "casier":   return self.inv.cles > 0
+        return True
+
+    def cles_obtenables(self) -> int:
+        """Clés en poche, posées dans une pièce découverte ou achetables en boutique."""
+        n = self.inv.cles + self.frontiere.cles_au_sol
+        if self.frontiere.boutiques and self.inv.or_ >= PRIX_CLE_BOUTIQUE:
+            n += 1
+        return n
+
+    def consommer_pas(self):
+        if self.inv.pas > 0:
+            self.pas_utilises += 1
+        self.inv.consommer_pas(1)
+
+    def porte_ouvrable(self, d: str) -> bool:
+        """La porte d de la pièce courante mène vers une case vide et peut être ouverte."""
+        if not self.deplacement_possible(d):
+            return False
+        if self.grille.a(self.grille.voisins[self.ici()][d], DECOUVERTE):
+            return False
+        lvl = self.niveau_verrou_direction(d)
+        if lvl == 1:
+            return self.inv.kit_crochetage or self.inv.cles > 0
+        if lvl == 2:
+            return self.inv.cles > 0
+        return True
+
+    def actions_possibles(self) -> List[Tuple]:
+        """Actions qui ont un effet dans l'état courant (simulations, IA)."""
+        if self.ouverture_en_cours:
+            acts: List[Tuple] = [("choisir", i) for i in range(len(self.choix))]
+            if self.inv.des > 0:
+                acts.append(("relancer",))
+            return acts
+        acts = []
+        for d in DIRECTIONS:
+            if self.porte_ouvrable(d):
+                acts.append(("ouvrir", d))
+            elif self.grille.relie(self.ici(), d) >= 0:
+                acts.append(("aller", d))
+        for i, entry in enumerate(self.menu_actions):
+            if entry["label"] != "Ouvrir boutique" and self.action_faisable(entry):
+                acts.append(("menu", i))
+        if self.grille.a(self.ici(), BOUTIQUE):
+            acts.extend(("acheter", i) for i, a in enumerate(BOUTIQUE_ARTICLES) if a["prix"] <= self.inv.or_)
+        acts.extend(("consommer", nom) for nom in self.inv.autres_objets)
+        return acts
+
+    def statut(self) -> Optional[str]:
+        """
+        "victoire", "defaite", "bloque" ou None, lu en O(1) : la frontière est mise
+        à jour quand une pièce est posée, l'inventaire est consulté tel quel.
+        Pioche vide : plus aucune porte ne s'ouvre, la partie est bloquée.
+        """
+        if self.victoire:
+            return "victoire"
+        if self.inv.pas == 0:
+            return "defaite"
+        if self.ouverture_en_cours:
+            return None
+        if self.pool.total() <= 0:
+            return "bloque"
+        if not self.frontiere.progression_possible(self.cles_obtenables(), self.inv.kit_crochetage):
+            return "bloque"
+        return None
+
+    # ---------- actions ----------
+    def step(self, action: Tuple) -> List[Tuple[str, float]]:
+        if self.historique is None:
+            return self._jouer(action)
+        avant = self._instantane = Instantane(self)
+        self.grille.journal = avant.cases
+        try:
+            msgs = self._jouer(action)
+        finally:
+            self.grille.journal = None
+            self._instantane = None
+        # action refusée : annuler() doit défaire la dernière action réellement jouée
+        if not avant.inchange(self):
+            self.historique.append(avant)
+        return msgs
+
+    def _rng(self, nom: str) -> random.Random:
+        """Flux `nom` d'AleaJeu ; pendant un step annulable, son état est noté avant le premier tirage."""
+        rng = getattr(self.alea, nom)
+        if self._instantane is not None:
+            self._instantane.noter_flux(nom, rng)
+        return rng
+
+    def _jouer(self, action: Tuple) -> List[Tuple[str, float]]:
+        self.messages = []
+        verbe = action[0]
+        if self.ouverture_en_cours and verbe not in VERBES_TIRAGE:
+            self.show("Tirage en cours : choisis d'abord une pièce.")
+            return self.messages
+        if verbe == "porte":
+            if self.grille.a_porte(self.ici(), action[1]):
+                self.dir_idx = DIRECTIONS.index(action[1])
+        elif verbe == "aller":
+            self._aller(action[1])
+        elif verbe == "ok":
+            self._ok()
+        elif verbe == "ouvrir":
+            if self.grille.a_porte(self.ici(), action[1]):
+                self.dir_idx = DIRECTIONS.index(action[1])
+                self._ok()
+        elif verbe == "voyager":
+            self.voyager(action[1], action[2])
+        elif verbe == "choisir":
+            self._choisir(action[1])
+        elif verbe == "relancer":
+            if self.ouverture_en_cours and self.inv.des > 0:
+                self.inv.des -= 1
+                self._generer_tirage()
+        elif verbe == "creuser":
+            self.action_creuser()
+        elif verbe == "coffre":
+            self.action_coffre()
+        elif verbe == "casier":
+            self.action_casier()
+        elif verbe == "menu":
+            self.valider_num(action[1])
+        elif verbe == "acheter":
+            self.acheter(action[1])
+        elif verbe == "consommer":
+            self.consommer(action[1])
+        else:
+            raise ValueError(f"Action inconnue : {action!r}")
+        return self.messages
+
+    def _entrer_voisine(self, nx: int, ny: int):
+        self.x, self.y = nx, ny
+        self.consommer_pas()
+        self.appliquer_entree_dans_piece(self.grille.pieces[self.ici()])
+        self.vx, self.vy = nx, ny
+
+    def _aller(self, d: str):
+        j = self.grille.relie(self.ici(), d)
+        if j >= 0 and self.grille.pieces[j] is not None:
+            self._entrer_voisine(*self.grille.xy(j))
+
+    def distance_vers(self, x: int, y: int) -> Optional[int]:
+        """Pas nécessaires pour rejoindre (x, y) par des pièces découvertes, None si inaccessible."""
+        if not self.dans_grille(x, y):
+            return None
+        return self.distances.distance(self.ici(), self.grille.indice(x, y))
+
+    def voyager(self, x: int, y: int):
+        """Voyage rapide : un seul déplacement, payé au plus court chemin."""
+        if self.ouverture_en_cours:
+            self.show("Tirage en cours : choisis d'abord une pièce.")
+            return
+        d = self.distance_vers(x, y)
+        if d is None:
+            self.show("Pièce inaccessible.")
+            return
+        if d == 0:
+            return
+        if d > self.inv.pas:
+            self.show(f"Pas assez de pas ({d} nécessaires).")
+            return
+        self.pas_utilises += d
+        self.inv.consommer_pas(d)
+        self.x, self.y = x, y
+        self.appliquer_entree_dans_piece(self.grille.pieces[self.ici()])
+        self.vx, self.vy = x, y
+        self.show(f"Voyage : {d} pas")
+
+    def _ok(self):
+        d = self.direction()
+        g = self.grille
+        i = self.ici()
+        j = g.voisins[i].get(d, -1)
+        if j >= 0 and g.a_porte(i, d) and g.a(j, DECOUVERTE) and g.pieces[j] is not None:
+            self._entrer_voisine(*g.xy(j))
+            return
+        if not self.deplacement_possible(d):
+            self.show("Impossible d'aller là.")
+            return
+        self.tenter_ouvrir_porte(d)
+
+    # ---------- tirage / ouverture ----------
+    def _generer_tirage(self):
+        self.pool.definir_bonus(BONUS_PATTE_LAPIN if self.inv.patte_lapin else 0)
+        self.choix = [self.pool.tirer(self._rng("tirage")) for _ in range(3)]
+        if all(p.cout_gemmes > 0 for p in self.choix):
+            zero = self.pool.tirer_gratuite(self._rng("tirage"))
+            if zero is not None:
+                self.choix[0] = zero
+
+    def tenter_ouvrir_porte(self, direction: str):
+        if not self.deplacement_possible(direction):
+            self.show("Impossible : mur ou pas de porte.")
+            return
+        if self.pool.total() <= 0:
+            self.show("Plus aucune pièce dans la pioche.")
+            return
+
+        lvl = self.niveau_verrou_direction(direction)
+        if lvl == 1:
+            if self.inv.kit_crochetage:
+                pass
+            elif self.inv.cles > 0:
+                self.inv.cles -= 1
+            else:
+                self.show("Porte verrouillée (clé ou kit requis).")
+                return
+        elif lvl == 2:
+            if self.inv.cles > 0:
+                self.inv.cles -= 1
+            else:
+                self.show("Double tour : clé requise.")
+                return
+
+        cible = self.grille.voisins[self.ici()][direction]
+        self.nb_dirs_max = len(self.grille.voisins[cible])
+        self._generer_tirage()
+        self.ouverture_en_cours = True
+        self.porte_tirage = self.grille.xy(cible) + (direction,)
+
+    def valider_tirage(self, idx: int) -> Optional[Piece]:
+        if not self.choix:
+            return None
+        p = self.choix[idx]
+        if p.cout_gemmes > 0:
+            if self.inv.gemmes < p.cout_gemmes:
+                self.show("Pas assez de gemmes.")
+                return None
+            self.inv.gemmes -= p.cout_gemmes
+        return p
+
+    def _choisir(self, idx: int):
+        if not self.ouverture_en_cours:
+            return
+        piece = self.valider_tirage(idx)
+        nx, ny, d = self.porte_tirage
+        self.ouverture_en_cours = False
+        self.porte_tirage = None
+        self.choix = []
+        if piece is None:
+            return
+
+        px, py = nx - DELTAS[d][0], ny - DELTAS[d][1]
+
+        g = self.grille
+        i = g.indice(nx, ny)
+        g.poser_piece(i, piece)
+        g.marquer(i, DECOUVERTE)
+        self.pool.retirer(piece)
+
+        cible = piece.nb_portes
+        possibles = list(g.voisins[i])
+
+        opp = OPPOSEE[d]
+        masque = BIT_DIR[opp] if opp in possibles else 0
+
+        nb_voulues = min(cible, len(possibles))
+        deja_ouvertes = 1 if masque else 0
+        restant = max(0, nb_voulues - deja_ouvertes)
+
+        autres = [dd for dd in possibles if dd != opp]
+        self._rng("plan").shuffle(autres)
+        for dd in autres[:restant]:
+            masque |= BIT_DIR[dd]
+        g.definir_portes(i, masque)
+
+        g.ajouter_porte(g.indice(px, py), d)
+        self.revision += 1
+        self.frontiere.piece_posee(nx, ny)
+        self.distances.piece_posee(i)
+
+        self.x, self.y = nx, ny
+        self.consommer_pas()
+
+        self._generer_loot_si_premiere_fois(piece, Cellule(g, i))
+        self._rebuild_actions_bas_gauche()
+        self.show(f"Entrée dans {piece.nom}")
+        self.vx, self.vy = self.x, self.y
+        self._verifier_victoire(piece)
+
+    # ---------- génération loot ----------
+    def _generer_loot_si_premiere_fois(self, p: Piece, cell: Cellule):
+        g, i = self.grille, cell.i
+        if g.drapeaux[i] & LOOT_GENERE:
+            return
+        t = CATALOGUE.table_loot(p)
+        r = self._rng("loot").getrandbits(BITS_LOOT)     # un seul tirage, voir TableLoot
+        k = self.inv.detecteur_metaux | self.inv.patte_lapin << 1
+
+        drapeaux = t.drapeaux | LOOT_GENERE
+        if r & MASQUE_16 < t.trou:
+            drapeaux |= TROU
+        if r >> 16 & MASQUE_16 < t.coffre:
+            drapeaux |= COFFRE
+        objets = g.objets[i]
+        if r >> 32 & MASQUE_16 < t.cle[k]:
+            objets += ({"type": "item", "nom": "Clé"},)
+        if r >> 48 & MASQUE_16 < t.gemme[k]:
+            objets += ({"type": "item", "nom": "Gemme"},)
+        if r >> 64 & MASQUE_16 < t.or_:
+            objets += ({"type": "item", "nom": "Or", "quant": 1 + (r >> 80 & 3)},)
+        if t.repli and not objets and not drapeaux & (TROU | COFFRE | BOUTIQUE):
+            objets = ({"type": "item", "nom": "Clé" if r >> 82 & 1 else "Gemme"},)
+
+        g.marquer(i, drapeaux)
+        if objets is not g.objets[i]:
+            g.definir_objets(i, objets)
+        self.frontiere.loot_genere(cell)
+
+    def _verifier_victoire(self, p: Piece):
+        if p.id == ID_ANTICHAMBRE and (self.x, self.y) == self.case_victoire():
+            self.victoire = True
+            self.show("Victoire ! Vous avez atteint l'Antichambre.", 4.0)
+
+    def appliquer_entree_dans_piece(self, p: Piece):
+        if "+Pas" in p.actions:
+            self.inv.pas += 5
+        if "-Pas" in p.actions and self.inv.pas > 0:
+            self.inv.pas = max(0, self.inv.pas - 3)
+
+        cell = self.current_cell()
+        self._generer_loot_si_premiere_fois(p, cell)
+        self._rebuild_actions_bas_gauche()
+        self.show(f"Entrée dans {p.nom}")
+        self._verifier_victoire(p)
+
+    def _rebuild_actions_bas_gauche(self):
+        self.menu_actions = []
+        cell = self.current_cell()
+        for pk in cell.pickables:
+            if pk.get("type") == "item":
+                nom = pk["nom"]
+                label = f"Ramasser {nom}"
+                self.menu_actions.append({"label": label, "kind": "pickup", "data": pk})
+        if cell.has_trou:
+            self.menu_actions.append({"label": "Creuser", "kind": "action", "req": "pelle"})
+        if cell.has_coffre:
+            self.menu_actions.append({"label": "Ouvrir coffre", "kind": "action", "req": "coffre"})
+        if cell.has_casier:
+            self.menu_actions.append({"label": "Ouvrir casier", "kind": "action", "req": "casier"})
+        if cell.is_shop:
+            self.menu_actions.append({"label": "Ouvrir boutique", "kind": "action", "req": None})
+
+    # ---------- actions locales ----------
+    def action_creuser(self):
+        cell = self.current_cell()
+        if not cell.has_trou:
+            self.show("Rien à creuser ici."); return
+        if not self.inv.pelle:
+            self.show("Il faut une pelle."); return
+
+        if self._rng("actions").random() < 0.25:
+            self.show("Tu n'as rien trouvé en creusant.")
+        else:
+            lot = self._rng("actions").choice(list(AUTRES_CATALOGUE.keys()))
+            self.inv.ajouter_autre_objet(lot)
+            self.show(f"Tu trouves {lot} (ajouté à Autres objets)")
+        cell.has_trou = False
+        self._rebuild_actions_bas_gauche()
+
+    def action_coffre(self):
+        cell = self.current_cell()
+        if not cell.has_coffre:
+            self.show("Pas de coffre ici."); return
+        if not (self.inv.marteau or self.inv.cles > 0):
+            self.show("Coffre verrouillé (clé ou marteau)."); return
+        if not self.inv.marteau:
+            self.inv.cles -= 1
+        lot = self._rng("actions").choice(list(AUTRES_CATALOGUE.keys()))
+        self.inv.ajouter_autre_objet(lot)
+        self.show(f"Coffre : {lot} (ajouté à Autres objets)")
+        cell.has_coffre = False
+        self._rebuild_actions_bas_gauche()
+
+    def action_casier(self):
+        cell = self.current_cell()
+        if not cell.has_casier:
+            self.show("Pas de casier ici."); return
+        if self.inv.cles <= 0:
+            self.show("Casier verrouillé (clé requise)."); return
+        self.inv.cles -= 1
+        lot = self._rng("actions").choice(list(AUTRES_CATALOGUE.keys()))
+        self.inv.ajouter_autre_objet(lot)
+        self.show(f"Casier : {lot} (ajouté à Autres objets)")
+        cell.has_casier = False
+        self._rebuild_actions_bas_gauche()
+
+    def valider_num(self, idx: int):
+        """Entrée idx du menu 1..9 (l'ouverture de la boutique est laissée à l'interface)."""
+        if idx < 0 or idx >= len(self.menu_actions):
+            return
+        entry = self.menu_actions[idx]
+        kind = entry.get("kind")
+        if kind == "pickup":
+            pk = entry["data"]; nom = pk["nom"]
+            if nom == "Clé":
+                self.inv.cles += 1
+                self.frontiere.cle_ramassee()
+            elif nom == "Gemme":
+                self.inv.gemmes += 1
+            elif nom == "Or":
+                self.inv.or_ += pk.get("quant", 1)
+            else:
+                self.inv.ajouter_autre_objet(nom)
+            try:
+                self.grille.retirer_objet(self.ici(), pk)
+            except ValueError:
+                pass
+            self._rebuild_actions_bas_gauche()
+            self.show(f"Ramassé : {nom}")
+        elif kind == "action":
+            req = entry.get("req")
+            if req == "pelle":
+                self.action_creuser()
+            elif req == "coffre":
+                self.action_coffre()
+            elif req == "casier":
+                self.action_casier()
+
+    # ---------- boutique / consommables ----------
+    def acheter(self, idx: int):
+        if not self.current_cell().is_shop:
+            self.show("Pas de boutique ici.")
+            return
+        item = BOUTIQUE_ARTICLES[idx]
+        prix = item["prix"]
+
+        if self.inv.or_ < prix:
+            self.show("Pas assez d'or pour acheter cet objet.")
+            return
+
+        self.inv.or_ -= prix
+
+        # Effets directs
+        if "gain_de" in item:
+            self.inv.des += item["gain_de"]
+        if "gain_cle" in item:
+            self.inv.cles += item["gain_cle"]
+        if "gain_gemme" in item:
+            self.inv.gemmes += item["gain_gemme"]
+
+        # Objet consommable : stocké, pas consommé
+        if "objet" in item:
+            self.inv.ajouter_autre_objet(item["objet"])
+
+        # Objet permanent
+        if "permanent" in item:
+            self.inv.ajouter_objet_permanent(item["permanent"])
+
+        self.show(f"Acheté : {item['nom']}")
+
+    def consommer(self, nom: str):
+        self.inv.consommer_autre_objet(nom, self)
+        if self.inv.autres_objets.get(nom, 0) <= 0:
+            self.inv.autres_objets.pop(nom, None)
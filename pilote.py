@@ -0,0 +1,211 @@
+"""
+Pilote de scénarios (sans fenêtre, sans cadence d'images)
+---------------------------------------------------------
+Rejoue des suites de touches directement dans SceneJeu.gerer_evenement, sans
+passer par la boucle à 60 images/s de jeu.main : des milliers de scénarios de
+régression tournent en quelques secondes. Toute exception arrête le scénario et
+remonte en EchecScenario (numéro d'événement et touche en cause).
+
+Format d'un scénario (fichier texte, enregistré par `python jeu.py --enregistrer=f.scn`) :
+  - jetons séparés par des blancs, « # » commence un commentaire ;
+  - cle=valeur pour les paramètres de la partie : graine, largeur, hauteur ;
+  - sinon un nom de touche pygame sans le préfixe K_ : z, SPACE, RETURN, UP, F5, 1...
+
+Après chaque touche, SceneJeu.update(dt) est appelé avec un temps simulé (1/FPS).
+rejouer_tous travaille dans un dossier temporaire : les fichiers écrits par le jeu
+(F4, F5) n'atterrissent pas dans le dépôt et la sauvegarde est effacée entre deux
+scénarios (un F9 ne recharge que ce que le scénario a lui-même sauvegardé).
+
+Usage : python pilote.py [scenario.scn ...] [-n 1000] [--evenements 500] [--graine 1] [--dessiner 0]
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import random
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional
+
+import pygame
+
+from moteur import GameState, GRID_W, GRID_H
+from jeu import SceneJeu, FICHIER_SAUVEGARDE, FPS, LARGEUR, HAUTEUR
+from sauvegarde import lire      # importé ici : rejouer_tous change de dossier courant
+
+# ------------------ Touches ------------------
+# nom sans « K_ » -> code ; pour un code, le premier nom dans l'ordre alphabétique
+CODES_TOUCHES: Dict[str, int] = {n[2:]: getattr(pygame, n) for n in dir(pygame) if n.startswith("K_")}
+NOMS_TOUCHES: Dict[int, str] = {}
+for _nom, _code in sorted(CODES_TOUCHES.items()):
+    NOMS_TOUCHES.setdefault(_code, _nom)
+
+def nom_touche(code: int) -> str:
+    return NOMS_TOUCHES.get(code, str(code))
+
+# Touches tirées par generer() et leur poids. Ni I (partie automatique), ni F4 (export CSV).
+TOUCHES_GENEREES = {
+    "z": 6, "q": 6, "s": 6, "d": 6, "UP": 3, "DOWN": 3, "LEFT": 3, "RIGHT": 3,
+    "SPACE": 6, "RETURN": 3, "ESCAPE": 2, "r": 2, "t": 1, "c": 1, "o": 1, "l": 1, "b": 1, "m": 1,
+    "1": 2, "2": 1, "3": 1, "BACKSPACE": 2, "PLUS": 1, "MINUS": 1, "0": 1, "F3": 1, "F5": 1, "F9": 1,
+}
+
+# ------------------ Scénarios ------------------
+class EchecScenario(Exception):
+    """Exception levée pendant un scénario ; la cause d'origine est dans __cause__."""
+    def __init__(self, nom: str, indice: int, touche: str):
+        super().__init__(f"{nom} : événement {indice} ({touche})")
+        self.nom = nom
+        self.indice = indice
+        self.touche = touche
+
+class Scenario:
+    """Suite de codes de touches et paramètres de la partie."""
+    def __init__(self, touches: List[int], graine: Optional[int] = None,
+                 largeur: int = GRID_W, hauteur: int = GRID_H, nom: str = "scenario"):
+        self.touches = touches
+        self.graine = graine
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.nom = nom
+
+    def __len__(self) -> int:
+        return len(self.touches)
+
+def analyser(texte: str, nom: str = "scenario") -> Scenario:
+    """Lit un scénario au format texte ; ValueError sur une touche inconnue."""
+    touches: List[int] = []
+    params: Dict[str, int] = {}
+    for ligne in texte.splitlines():
+        for jeton in ligne.split("#", 1)[0].split():
+            if "=" in jeton:
+                cle, valeur = jeton.split("=", 1)
+                params[cle] = int(valeur)
+                continue
+            code = CODES_TOUCHES.get(jeton)
+            if code is None:
+                raise ValueError(f"{nom} : touche inconnue {jeton!r}")
+            touches.append(code)
+    return Scenario(touches, params.get("graine"), params.get("largeur", GRID_W),
+                    params.get("hauteur", GRID_H), nom)
+
+def formater(sc: Scenario, par_ligne: int = 32) -> str:
+    entete = [f"graine={sc.graine}"] if sc.graine is not None else []
+    if (sc.largeur, sc.hauteur) != (GRID_W, GRID_H):
+        entete += [f"largeur={sc.largeur}", f"hauteur={sc.hauteur}"]
+    noms = [nom_touche(k) for k in sc.touches]
+    lignes = [" ".join(entete)] if entete else []
+    lignes += [" ".join(noms[i:i + par_ligne]) for i in range(0, len(noms), par_ligne)]
+    return "\n".join(lignes) + "\n"
+
+def lire_scenario(chemin: str) -> Scenario:
+    with open(chemin, encoding="utf-8") as f:
+        return analyser(f.read(), os.path.basename(chemin))
+
+def ecrire_scenario(chemin: str, sc: Scenario):
+    with open(chemin, "w", encoding="utf-8") as f:
+        f.write(formater(sc))
+
+def generer(rng: random.Random, n: int, graine: Optional[int] = None, nom: str = "genere") -> Scenario:
+    """n touches tirées selon TOUCHES_GENEREES."""
+    noms = list(TOUCHES_GENEREES)
+    touches = [CODES_TOUCHES[t] for t in rng.choices(noms, weights=list(TOUCHES_GENEREES.values()), k=n)]
+    return Scenario(touches, graine, nom=nom)
+
+# ------------------ Exécution ------------------
+_EVENEMENTS: Dict[int, pygame.event.Event] = {}
+
+def _evenement(code: int) -> pygame.event.Event:
+    """KEYDOWN pour la touche `code`, construit une fois (gerer_evenement ne le modifie pas)."""
+    e = _EVENEMENTS.get(code)
+    if e is None:
+        e = _EVENEMENTS[code] = pygame.event.Event(pygame.KEYDOWN, key=code, mod=0, unicode="",
+                                                   scancode=0)
+    return e
+
+def rejouer(sc: Scenario, dessiner: int = 0, surface: Optional[pygame.Surface] = None) -> SceneJeu:
+    """
+    Joue le scénario sur une nouvelle partie et renvoie la scène finale.
+    dessiner = k > 0 : SceneJeu.dessiner sur `surface` toutes les k touches (et à la fin).
+    """
+    dt = 1.0 / FPS
+    indice = -1
+    try:
+        scene = SceneJeu(GameState(sc.graine, largeur=sc.largeur, hauteur=sc.hauteur))
+        for indice, code in enumerate(sc.touches):
+            if scene.gerer_evenement(_evenement(code)) == "charger":
+                # comme jeu.main : la scène est recréée à partir de la sauvegarde
+                try:
+                    etat = lire(FICHIER_SAUVEGARDE)
+                except (OSError, ValueError):
+                    etat = None         # rien de sauvegardé (ou illisible) : F9 sans effet
+                if etat is not None:
+                    scene = SceneJeu(etat)
+            scene.update(dt)
+            if dessiner and indice % dessiner == dessiner - 1:
+                scene.dessiner(surface)
+        if dessiner:
+            scene.dessiner(surface)
+    except Exception as err:
+        touche = nom_touche(sc.touches[indice]) if indice >= 0 else "création de la partie"
+        raise EchecScenario(sc.nom, indice, touche) from err
+    return scene
+
+def rejouer_tous(scenarios: Iterable[Scenario], dessiner: int = 0) -> Dict[str, int]:
+    """Rejoue chaque scénario ; renvoie le nombre de parties par statut final."""
+    surface = pygame.Surface((LARGEUR, HAUTEUR)) if dessiner else None
+    issues: Dict[str, int] = {}
+    dossier = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="pilote_") as tmp:
+        os.chdir(tmp)
+        try:
+            for sc in scenarios:
+                if os.path.exists(FICHIER_SAUVEGARDE):
+                    os.remove(FICHIER_SAUVEGARDE)
+                st = rejouer(sc, dessiner, surface).statut() or "en_cours"
+                issues[st] = issues.get(st, 0) + 1
+        finally:
+            os.chdir(dossier)
+    return issues
+
+# ------------------ Ligne de commande ------------------
+def main():
+    ap = argparse.ArgumentParser(description="Rejoue des scénarios de touches dans SceneJeu, sans fenêtre.")
+    ap.add_argument("fichiers", nargs="*", help="scénarios à rejouer (sinon : scénarios générés)")
+    ap.add_argument("-n", type=int, default=1000, help="nombre de scénarios générés")
+    ap.add_argument("--evenements", type=int, default=500, help="touches par scénario généré")
+    ap.add_argument("--graine", type=int, default=1)
+    ap.add_argument("--dessiner", type=int, default=0, metavar="K", help="dessiner la scène toutes les K touches")
+    ap.add_argument("--garder", metavar="DOSSIER", help="écrire les scénarios générés dans DOSSIER")
+    args = ap.parse_args()
+
+    if args.fichiers:
+        scenarios = [lire_scenario(f) for f in args.fichiers]
+    else:
+        rng = random.Random(args.graine)
+        scenarios = [generer(rng, args.evenements, (args.graine << 32) + i, nom=f"genere_{i:05d}")
+                     for i in range(args.n)]
+        if args.garder:
+            os.makedirs(args.garder, exist_ok=True)
+            for sc in scenarios:
+                ecrire_scenario(os.path.join(args.garder, sc.nom + ".scn"), sc)
+    if args.dessiner:
+        pygame.init()
+
+    total = sum(len(sc) for sc in scenarios)
+    t = time.perf_counter()
+    try:
+        issues = rejouer_tous(scenarios, args.dessiner)
+    except EchecScenario as err:
+        import traceback
+        traceback.print_exception(err.__cause__)
+        raise SystemExit(f"Échec : {err}")
+    duree = time.perf_counter() - t
+    print(f"{len(scenarios)} scénarios, {total} événements en {duree:.2f} s "
+          f"({total / duree:,.0f} événements/s)")
+    print("  " + "  ".join(f"{k} {v}" for k, v in sorted(issues.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Sauvegarde binaire d'une partie
+-------------------------------
+Format compact et versionné (struct, petit-boutiste), sans pickle ni JSON :
+
+  en-tête      "BPSV", version, largeur, hauteur
+  joueur       x, y, curseur de visite vx, vy, direction, nb_dirs_max, drapeaux, révision, pas utilisés
+  inventaire   pas, or, gemmes, clés, dés, objets permanents (bits), autres objets (nom, quantité)
+  grille       portes, verrous, drapeaux (1 octet par case), pièce par case (2 octets)
+  objets       cases non vides seulement : indice, puis (code, quantité) par objet
+  compteurs    clés au sol, boutiques (Frontiere)
+  pioche       bonus, exemplaires restants par modèle, tirage en cours
+  aléa         graine, puis l'état Mersenne Twister de chaque flux d'AleaJeu
+
+Les pièces sont codées par leur id (indice dans PIECES_MODELES). Les portes de la
+frontière, le menu d'actions et le cache de distances ne sont pas stockés : ils se
+déduisent de la grille au chargement ; la case visée par un tirage en cours, de la
+position et de la direction du joueur. L'état des générateurs (4 x 2,5 Ko) fait l'essentiel du poids.
+
+Usage : python sauvegarde.py [-n 200] [--graine 1]   (taille, temps de sauvegarde/chargement)
+"""
+import argparse
+import os
+import random
+import struct
+import time
+from array import array
+from typing import List
+
+from moteur import (
+    GameState, AleaJeu, Inventaire, Grille, Frontiere, CacheDistances, PoolTirage,
+    PIECES_MODELES, ENTREE, ID_ENTREE, DIRECTIONS, DELTAS,
+)
+
+MAGIQUE = b"BPSV"
+VERSION = 1
+
+ENTETE = struct.Struct("<4sHHH")
+JOUEUR = struct.Struct("<HHHHBBBII")
+INVENTAIRE = struct.Struct("<iiiiiBB")
+CASE_OBJETS = struct.Struct("<IB")
+OBJET_SOL = struct.Struct("<BH")
+MT = struct.Struct("<625IBd")          # état interne, gauss_next présent ?, gauss_next
+
+# Pièces : 0 = case vide, k + 1 = PIECES_MODELES[k] (id k)
+PIECE_ENTREE = 0xFFFF
+
+# Objets au sol (GameState._generer_loot_si_premiere_fois)
+OBJETS_SOL = ("Clé", "Gemme", "Or")
+CODE_OBJET = {nom: k for k, nom in enumerate(OBJETS_SOL)}
+
+PERMANENTS = ("pelle", "marteau", "kit_crochetage", "detecteur_metaux", "patte_lapin")
+
+# ------------------ Écriture ------------------
+def _chaine(s: str) -> bytes:
+    b = s.encode("utf-8")
+    return struct.pack("<B", len(b)) + b
+
+def _code_piece(p) -> int:
+    if p is None:
+        return 0
+    if 0 <= p.id < len(PIECES_MODELES):
+        return p.id + 1
+    if p.id == ID_ENTREE:
+        return PIECE_ENTREE
+    raise ValueError(f"Pièce hors catalogue : {p.nom}")
+
+def sauver(e: GameState) -> bytes:
+    """Sérialise la partie e."""
+    g, inv = e.grille, e.inv
+    morceaux: List[bytes] = [
+        ENTETE.pack(MAGIQUE, VERSION, g.largeur, g.hauteur),
+        JOUEUR.pack(e.x, e.y, e.vx, e.vy, e.dir_idx, e.nb_dirs_max,
+                    e.ouverture_en_cours | e.victoire << 1, e.revision, e.pas_utilises),
+        INVENTAIRE.pack(inv.pas, inv.or_, inv.gemmes, inv.cles, inv.des,
+                        sum(1 << k for k, nom in enumerate(PERMANENTS) if getattr(inv, nom)),
+                        len(inv.autres_objets)),
+    ]
+    for nom, q in inv.autres_objets.items():
+        morceaux.append(_chaine(nom) + struct.pack("<i", q))
+
+    morceaux += [g.portes.tobytes(), g.verrous.tobytes(), g.drapeaux.tobytes(),
+                 array("H", map(_code_piece, g.pieces)).tobytes()]
+
+    cases = [(i, objs) for i, objs in enumerate(g.objets) if objs]
+    morceaux.append(struct.pack("<I", len(cases)))
+    for i, objs in cases:
+        morceaux.append(CASE_OBJETS.pack(i, len(objs)))
+        for pk in objs:
+            morceaux.append(OBJET_SOL.pack(CODE_OBJET[pk["nom"]], pk.get("quant", 0)))
+
+    pool = e.pool
+    morceaux.append(struct.pack("<II", e.frontiere.cles_au_sol, e.frontiere.boutiques))
+    morceaux += [struct.pack("<HH", pool.bonus, len(pool.restants)), array("H", pool.restants).tobytes(),
+                 struct.pack("<B", len(e.choix)), array("H", [_code_piece(p) for p in e.choix]).tobytes()]
+
+    morceaux.append(_chaine("" if e.alea.graine is None else repr(e.alea.graine)))
+    for _, interne, gauss in e.alea.getstate():
+        morceaux.append(MT.pack(*interne, gauss is not None, gauss or 0.0))
+    return b"".join(morceaux)
+
+# ------------------ Lecture ------------------
+def _tableau(code: str, octets) -> array:
+    a = array(code)
+    a.frombytes(octets)
+    return a
+
+def _octets(mv: memoryview, o: int, n: int) -> memoryview:
+    """n octets à partir de o ; ValueError si le fichier s'arrête avant."""
+    if n < 0 or o + n > len(mv):
+        raise ValueError("Sauvegarde tronquée.")
+    return mv[o:o + n]
+
+def charger(data: bytes) -> GameState:
+    """
+    Reconstruit une partie à partir de sauver(e) ; ValueError si le format est inconnu,
+    le fichier tronqué ou corrompu.
+    """
+    try:
+        return _charger(memoryview(data))
+    except (struct.error, IndexError, UnicodeDecodeError) as err:
+        raise ValueError(f"Sauvegarde corrompue ({err}).") from err
+
+def _charger(mv: memoryview) -> GameState:
+    magique, version, largeur, hauteur = ENTETE.unpack_from(_octets(mv, 0, ENTETE.size))
+    if magique != MAGIQUE:
+        raise ValueError("Ce fichier n'est pas une sauvegarde de partie.")
+    if version != VERSION:
+        raise ValueError(f"Version de sauvegarde {version} non prise en charge (attendue : {VERSION}).")
+    if largeur == 0 or hauteur == 0:
+        raise ValueError("Sauvegarde corrompue (grille vide).")
+    o = ENTETE.size
+
+    e = GameState.__new__(GameState)
+    e.x, e.y, e.vx, e.vy, e.dir_idx, e.nb_dirs_max, drapeaux, e.revision, e.pas_utilises = \
+        JOUEUR.unpack_from(_octets(mv, o, JOUEUR.size))
+    if not (e.x < largeur and e.y < hauteur and e.vx < largeur and e.vy < hauteur
+            and e.dir_idx < len(DIRECTIONS)):
+        raise ValueError("Sauvegarde corrompue (position du joueur).")
+    e.ouverture_en_cours = bool(drapeaux & 1)
+    e.victoire = bool(drapeaux & 2)
+    o += JOUEUR.size
+    # pendant un tirage, ni la position ni la direction ne changent : la case visée s'en déduit
+    d = DIRECTIONS[e.dir_idx]
+    e.porte_tirage = (e.x + DELTAS[d][0], e.y + DELTAS[d][1], d) if e.ouverture_en_cours else None
+
+    pas, or_, gemmes, cles, des, perm, nb = INVENTAIRE.unpack_from(_octets(mv, o, INVENTAIRE.size))
+    o += INVENTAIRE.size
+    inv = Inventaire(pas, or_, gemmes, cles, des, {},
+                     *(bool(perm >> k & 1) for k in range(len(PERMANENTS))))
+    for _ in range(nb):
+        n = _octets(mv, o, 1)[0]
+        nom = bytes(_octets(mv, o + 1, n)).decode("utf-8")
+        o += 1 + n
+        inv.autres_objets[nom] = struct.unpack_from("<i", _octets(mv, o, 4))[0]
+        o += 4
+    e.inv = inv
+
+    g = Grille(largeur, hauteur)
+    n = g.n
+    g.portes = _tableau("B", _octets(mv, o, n)); o += n
+    g.verrous = _tableau("B", _octets(mv, o, n)); o += n
+    g.drapeaux = _tableau("B", _octets(mv, o, n)); o += n
+    codes = _tableau("H", _octets(mv, o, 2 * n)); o += 2 * n
+    modeles = (None,) + PIECES_MODELES
+    if any(c >= len(modeles) and c != PIECE_ENTREE for c in codes):
+        raise ValueError("Sauvegarde corrompue (code de pièce inconnu).")
+    g.pieces = [ENTREE if c == PIECE_ENTREE else modeles[c] for c in codes]
+
+    nb = struct.unpack_from("<I", _octets(mv, o, 4))[0]
+    o += 4
+    if nb > n:
+        raise ValueError("Sauvegarde corrompue (objets au sol).")
+    for _ in range(nb):
+        i, k = CASE_OBJETS.unpack_from(_octets(mv, o, CASE_OBJETS.size))
+        o += CASE_OBJETS.size
+        if i >= n:
+            raise ValueError("Sauvegarde corrompue (objets au sol).")
+        objs = []
+        for _ in range(k):
+            code, quant = OBJET_SOL.unpack_from(_octets(mv, o, OBJET_SOL.size))
+            o += OBJET_SOL.size
+            if code >= len(OBJETS_SOL):
+                raise ValueError("Sauvegarde corrompue (code d'objet inconnu).")
+            pk = {"type": "item", "nom": OBJETS_SOL[code]}
+            if quant:
+                pk["quant"] = quant
+            objs.append(pk)
+        g.objets[i] = tuple(objs)
+    e.grille = g
+
+    cles_au_sol, boutiques, bonus, nb = struct.unpack_from("<IIHH", _octets(mv, o, 12))
+    o += 12
+    if nb != len(PIECES_MODELES):
+        raise ValueError("Sauvegarde corrompue (pioche).")
+    restants = _tableau("H", _octets(mv, o, 2 * nb)).tolist(); o += 2 * nb
+    e.pool = PoolTirage.depuis_restants(PIECES_MODELES, restants, bonus)
+    nb = _octets(mv, o, 1)[0]; o += 1
+    choix = _tableau("H", _octets(mv, o, 2 * nb)); o += 2 * nb
+    if not all(0 < c < len(modeles) for c in choix):
+        raise ValueError("Sauvegarde corrompue (tirage en cours).")
+    e.choix = [modeles[c] for c in choix]
+
+    n = _octets(mv, o, 1)[0]
+    graine = bytes(_octets(mv, o + 1, n)).decode("utf-8")
+    o += 1 + n
+    etats = []
+    for _ in AleaJeu.FLUX:
+        *interne, a_gauss, gauss = MT.unpack_from(_octets(mv, o, MT.size))
+        o += MT.size
+        etats.append((3, tuple(interne), gauss if a_gauss else None))
+    if o != len(mv):
+        raise ValueError("Sauvegarde corrompue (octets en trop).")
+    alea = AleaJeu.depuis_etat(int(graine) if graine.lstrip("-").isdigit() else (graine or None), etats)
+    e.alea = alea
+
+    # état dérivé de la grille
+    e.frontiere = Frontiere(g)
+    e.frontiere.cles_au_sol, e.frontiere.boutiques = cles_au_sol, boutiques
+    e.distances = CacheDistances(g)
+    e.messages = []
+    e.historique = None
+    e._rebuild_actions_bas_gauche()
+    return e
+
+def ecrire(e: GameState, chemin: str):
+    """Écriture atomique : fichier temporaire à côté, puis remplacement (jamais de sauvegarde à moitié écrite)."""
+    tmp = chemin + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(sauver(e))
+        os.replace(tmp, chemin)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def lire(chemin: str) -> GameState:
+    with open(chemin, "rb") as f:
+        return charger(f.read())
+
+# ------------------ Mesure ------------------
+def empreinte(e: GameState):
+    """Tout l'état observable d'une partie (vérification de l'aller-retour)."""
+    return (e.grille.empreinte(), e.inv, e.x, e.y, e.vx, e.vy, e.dir_idx, e.nb_dirs_max,
+            e.ouverture_en_cours, e.victoire, e.revision, e.pas_utilises,
+            e.pool.restants, e.pool.bonus, [p.nom for p in e.choix], e.alea.getstate(),
+            sorted(e.frontiere.portes.items()), e.frontiere.par_niveau, e.frontiere.cles_au_sol,
+            e.frontiere.boutiques, [m["label"] for m in e.menu_actions], e.porte_tirage)
+
+def main():
+    from monte_carlo import politique_gloutonne
+
+    ap = argparse.ArgumentParser(description="Taille et vitesse de la sauvegarde binaire.")
+    ap.add_argument("-n", type=int, default=200, help="états sauvegardés (pris au fil de parties jouées)")
+    ap.add_argument("--graine", type=int, default=1)
+    args = ap.parse_args()
+
+    etats: List[GameState] = []
+    k = 0
+    while len(etats) < args.n:
+        e = GameState((args.graine << 32) + k)
+        rng = random.Random(k)
+        k += 1
+        while e.statut() is None and len(etats) < args.n:
+            a = politique_gloutonne(e, rng)
+            if a is None:
+                break
+            e.step(a)
+            etats.append(e.copie())
+
+    horloge = time.perf_counter
+    t_sauver, t_charger, tailles = [], [], []
+    for e in etats:
+        t = horloge(); data = sauver(e); t_sauver.append(horloge() - t)
+        t = horloge(); f = charger(data); t_charger.append(horloge() - t)
+        tailles.append(len(data))
+        if empreinte(f) != empreinte(e):
+            raise SystemExit("Aller-retour incorrect.")
+    med = lambda v: sorted(v)[len(v) // 2] * 1e6
+    print(f"{len(etats)} états ({k} parties) : aller-retour identique")
+    print(f"  taille     {min(tailles)}..{max(tailles)} octets")
+    print(f"  sauvegarde médiane {med(t_sauver):7.1f} µs")
+    print(f"  chargement médiane {med(t_charger):7.1f} µs  ({1 / (sum(t_charger) / len(t_charger)):,.0f} états/s)")
+
+
+if __name__ == "__main__":
+    main()
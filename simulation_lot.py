@@ -0,0 +1,413 @@
+"""
+Simulation vectorisée (NumPy) de N manoirs en parallèle
+--------------------------------------------------------
+L'état des N parties est stocké en tableaux (struct-of-arrays) : pièce posée
+et objets au sol par case, bitboards uint64 des cases découvertes, des portes
+et des verrous (un par direction N/E/S/W), compteurs d'inventaire.
+Le tirage des pièces (PoolTirage / GameState._generer_tirage) et le loot de
+première entrée (_generer_loot_si_premiere_fois) sont faits en une seule série
+d'opérations sur toutes les parties actives. Comme dans le moteur, chaque partie
+a sa pioche : exemplaires restants par modèle (exemplaires_pour), une pièce posée
+en retire un ; une partie dont la pioche est vide est bloquée.
+
+Politique jouée à chaque tour, pour chaque partie :
+- si une porte de la pièce courante mène vers une case vide et peut être ouverte,
+  on l'ouvre (au hasard parmi celles-ci), on pose une carte abordable du tirage ;
+- sinon on avance d'une pièce vers la porte ouvrable la plus proche ;
+- sans porte ouvrable, on va acheter une clé dans une boutique découverte si l'or suffit ;
+- le loot au sol est ramassé aussitôt (coffres et trous sont ignorés).
+
+Usage : python simulation_lot.py -n 100000 --graine 1
+"""
+import argparse
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from moteur import (
+    Inventaire, Piece, PIECES_MODELES, GRID_W, GRID_H, PRIX_CLE_BOUTIQUE,
+    POIDS_RARETE, BONUS_PATTE_LAPIN, ECHELLE_LOOT, ID_ANTICHAMBRE, TableLoot, exemplaires_pour,
+    poids_verrou_pour_ligne,
+)
+
+EN_COURS, VICTOIRE, DEFAITE, BLOQUE = 0, 1, 2, 3
+NOMS_STATUTS = {EN_COURS: "en_cours", VICTOIRE: "victoire", DEFAITE: "defaite", BLOQUE: "bloque"}
+
+# N, E, S, W
+OPP = (2, 3, 0, 1)
+UN = np.uint64(1)
+ZERO = np.uint64(0)
+TOUT = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+class CatalogueTableaux:
+    """Colonnes NumPy dérivées d'une liste de Piece (une ligne par modèle)."""
+    def __init__(self, pieces: List[Piece]):
+        self.pieces = pieces
+        a = lambda f, dt=np.int32: np.array([f(p) for p in pieces], dtype=dt)
+        self.cout = a(lambda p: p.cout_gemmes)
+        self.rarete = a(lambda p: p.rarete)
+        # Poids d'un exemplaire sans / avec patte de lapin
+        poids = a(lambda p: POIDS_RARETE[p.rarete], np.int64)
+        self.poids = (poids, poids + BONUS_PATTE_LAPIN)
+        self.gratuite = self.cout == 0
+        self.nb_portes = a(lambda p: p.nb_portes)
+
+        # seuils entiers des tables de loot (TableLoot), mêmes probabilités que le moteur
+        tables = [TableLoot(p) for p in pieces]
+        t = lambda f, dt=np.int32: np.array([f(x) for x in tables], dtype=dt)
+        self.seuil_trou = t(lambda x: x.trou)
+        self.seuil_coffre = t(lambda x: x.coffre)
+        self.seuil_cle = t(lambda x: x.cle)        # (modèles, 4)
+        self.seuil_gemme = t(lambda x: x.gemme)
+        self.seuil_or = t(lambda x: x.or_)
+        self.repli = t(lambda x: x.repli, bool)
+        self.shop = a(lambda p: p.boutique, bool)
+        self.plus_pas = a(lambda p: "+Pas" in p.actions, bool)
+        self.moins_pas = a(lambda p: "-Pas" in p.actions, bool)
+        self.antechambre = a(lambda p: p.id == ID_ANTICHAMBRE, bool)
+
+
+class SimulationLot:
+    """
+    N parties indépendantes. Les ensembles de cases (découvertes, portes par
+    direction, verrous de niveau 1 et 2 par direction) sont des bitboards uint64,
+    bit i = y * largeur + x : une grille de 64 cases au plus (5x9 = 45).
+    Les données par case (pièce posée, loot) sont des tableaux (n, largeur * hauteur).
+    """
+    def __init__(self, n: int, graine: Optional[int] = None, pieces: List[Piece] = PIECES_MODELES,
+                 largeur: int = GRID_W, hauteur: int = GRID_H):
+        if largeur * hauteur > 64:
+            raise ValueError("SimulationLot : 64 cases au plus (bitboards uint64).")
+        self.n = n
+        self.w, self.h = W, H = largeur, hauteur
+        nc = W * H
+        self.rng = np.random.default_rng(graine)
+        self.cat = CatalogueTableaux(pieces)
+
+        # Masques constants
+        self.grille = np.uint64((1 << nc) - 1)
+        col0 = sum(1 << (y * W) for y in range(H))
+        self.pas_col0 = np.uint64(~col0 & ((1 << nc) - 1))
+        self.pas_coln = np.uint64(~(col0 << (W - 1)) & ((1 << nc) - 1))
+        self.decalage = (-W, 1, W, -1)
+        self.possibles = np.zeros(nc, dtype=np.uint8)     # directions restant dans la grille
+        for i in range(nc):
+            x, y = i % W, i // W
+            self.possibles[i] = (y > 0) | ((x < W - 1) << 1) | ((y < H - 1) << 2) | ((x > 0) << 3)
+        self.nb_possibles = np.array([bin(v).count("1") for v in self.possibles], dtype=np.int32)
+
+        # Grille : -1 = case vide, sinon index dans le catalogue (-2 = Entrée)
+        self.occupee = np.full((n, nc), -1, dtype=np.int16)
+        # Pioche de chaque partie : exemplaires restants par modèle
+        exemplaires = exemplaires_pour(nc)
+        self.restants = np.tile(np.array([exemplaires[r] for r in self.cat.rarete], dtype=np.int16), (n, 1))
+        self.decouv = np.zeros(n, dtype=np.uint64)
+        self.boutiques = np.zeros(n, dtype=np.uint64)
+        self.porte = np.zeros((n, 4), dtype=np.uint64)
+        self.v1, self.v2 = self._tirer_verrous()
+        self.has_trou = np.zeros((n, nc), dtype=bool)
+        self.has_coffre = np.zeros((n, nc), dtype=bool)
+        self.cles_sol = np.zeros((n, nc), dtype=np.int8)
+        self.gemmes_sol = np.zeros((n, nc), dtype=np.int8)
+        self.or_sol = np.zeros((n, nc), dtype=np.int16)
+
+        inv = Inventaire()
+        self.pas = np.full(n, inv.pas, dtype=np.int32)
+        self.or_ = np.full(n, inv.or_, dtype=np.int32)
+        self.gemmes = np.full(n, inv.gemmes, dtype=np.int32)
+        self.cles = np.full(n, inv.cles, dtype=np.int32)
+        self.des = np.full(n, inv.des, dtype=np.int32)
+        self.kit_crochetage = np.full(n, inv.kit_crochetage, dtype=bool)
+        self.detecteur_metaux = np.full(n, inv.detecteur_metaux, dtype=bool)
+        self.patte_lapin = np.full(n, inv.patte_lapin, dtype=bool)
+
+        depart = (H - 1) * W + W // 2
+        self.pos = np.full(n, depart, dtype=np.int64)
+        self.occupee[:, depart] = -2
+        self.decouv[:] = UN << np.uint64(depart)
+        for d in (0, 1, 3):                              # Entrée : N/E/W
+            self.porte[:, d] = UN << np.uint64(depart)
+        self.statut = np.zeros(n, dtype=np.int8)
+        self.pas_utilises = np.zeros(n, dtype=np.int32)
+        self.tours = 0
+
+    # ---------- bitboards ----------
+    def _decale(self, s: np.ndarray, d: int) -> np.ndarray:
+        """Cases dont la voisine dans la direction d appartient à s."""
+        if d == 0:
+            return (s << np.uint64(self.w)) & self.grille
+        if d == 2:
+            return s >> np.uint64(self.w)
+        if d == 1:
+            return (s >> UN) & self.pas_coln
+        return (s << UN) & self.pas_col0
+
+    def _bit(self, pos: np.ndarray) -> np.ndarray:
+        return UN << pos.astype(np.uint64)
+
+    # ---------- génération ----------
+    def _tirer_verrous(self):
+        """niveau_verrou_pour_ligne pour toutes les parties, cases et portes, en bitboards."""
+        W, H, n = self.w, self.h, self.n
+        lvl = np.empty((n, H, W, 4), dtype=np.uint8)
+        for y in range(H):
+            cumul = poids_verrou_pour_ligne(y, H)
+            if isinstance(cumul, int):
+                lvl[:, y] = cumul
+            else:
+                p = np.diff(cumul, prepend=0) / cumul[2]
+                lvl[:, y] = self.rng.choice(3, size=(n, W, 4), p=p)
+        lvl = lvl.reshape(n, W * H, 4)
+        poids = (UN << np.arange(W * H, dtype=np.uint64))
+        v1 = np.zeros((n, 4), dtype=np.uint64)
+        v2 = np.zeros((n, 4), dtype=np.uint64)
+        for d in range(4):
+            v1[:, d] = np.bitwise_or.reduce(np.where(lvl[:, :, d] == 1, poids, ZERO), axis=1)
+            v2[:, d] = np.bitwise_or.reduce(np.where(lvl[:, :, d] == 2, poids, ZERO), axis=1)
+        return v1, v2
+
+    def niveau_verrou(self, g: np.ndarray, pos: np.ndarray, d) -> np.ndarray:
+        b = self._bit(pos)
+        return ((self.v1[g, d] & b) != 0) + 2 * ((self.v2[g, d] & b) != 0)
+
+    def _tirer_ponderes(self, poids: np.ndarray, k: int) -> np.ndarray:
+        """
+        k tirages avec remise par ligne de poids (entiers, total > 0) : une seule recherche
+        dans les cumuls de toutes les lignes mises bout à bout.
+        """
+        m, nb = poids.shape
+        cumul = np.cumsum(poids.ravel())
+        fin = cumul[nb - 1::nb]
+        debut = np.concatenate(([0], fin[:-1]))
+        u = debut[:, None] + self.rng.integers(0, fin - debut, size=(k, m)).T
+        return np.searchsorted(cumul, u, side="right") - (np.arange(m) * nb)[:, None]
+
+    def tirer_cartes(self, g: np.ndarray) -> np.ndarray:
+        """
+        Tirage de 3 cartes pour chaque partie de g (équivalent vectorisé de _generer_tirage).
+        La pioche de chaque partie de g doit contenir au moins une pièce.
+        """
+        restants = self.restants[g]
+        poids = np.where(self.patte_lapin[g][:, None], self.cat.poids[1], self.cat.poids[0]) * restants
+        choix = self._tirer_ponderes(poids, 3)
+        # toutes payantes : la première est remplacée par une pièce gratuite restante (uniforme)
+        tous_payants = (self.cat.cout[choix] > 0).all(axis=1)
+        gratuites = self.cat.gratuite & (restants[tous_payants] > 0)
+        remplace = gratuites.any(axis=1)
+        if remplace.any():
+            lignes = np.flatnonzero(tous_payants)[remplace]
+            choix[lignes, 0] = self._tirer_ponderes(gratuites[remplace].astype(np.int64), 1)[:, 0]
+        return choix
+
+    def generer_loot(self, g: np.ndarray, pos: np.ndarray, p: np.ndarray):
+        """Loot de première entrée de la pièce p posée en pos, pour chaque partie de g."""
+        c = self.cat
+        m = len(g)
+        # colonnes : trou, coffre, clé, gemme, or, puis quantité d'or - 1 (bits 0-1) et repli (bit 2)
+        u = self.rng.integers(0, ECHELLE_LOOT, size=(m, 6), dtype=np.int32)
+        k = self.detecteur_metaux[g] | self.patte_lapin[g].astype(np.int32) << 1
+        trou = u[:, 0] < c.seuil_trou[p]
+        coffre = u[:, 1] < c.seuil_coffre[p]
+        cle = u[:, 2] < c.seuil_cle[p, k]
+        gem = u[:, 3] < c.seuil_gemme[p, k]
+        orr = u[:, 4] < c.seuil_or[p]
+        quant = np.where(orr, 1 + (u[:, 5] & 3), 0)
+        vide = c.repli[p] & ~(cle | gem | orr | trou | coffre | c.shop[p])
+        repli_cle = vide & (u[:, 5] & 4 != 0)
+        repli_gem = vide & ~repli_cle
+
+        self.has_trou[g, pos] = trou
+        self.has_coffre[g, pos] = coffre
+        self.cles_sol[g, pos] = cle.astype(np.int8) + repli_cle
+        self.gemmes_sol[g, pos] = gem.astype(np.int8) + repli_gem
+        self.or_sol[g, pos] = quant
+
+    def _ramasser(self, g: np.ndarray):
+        pos = self.pos[g]
+        self.cles[g] += self.cles_sol[g, pos]
+        self.gemmes[g] += self.gemmes_sol[g, pos]
+        self.or_[g] += self.or_sol[g, pos]
+        self.cles_sol[g, pos] = 0
+        self.gemmes_sol[g, pos] = 0
+        self.or_sol[g, pos] = 0
+
+    # ---------- portes ----------
+    def _ouvrables(self, g: np.ndarray) -> np.ndarray:
+        """(m, 4) bitboards : porte existante, vers une case vide, ouvrable avec l'inventaire."""
+        dec = self.decouv[g]
+        vide = ~dec & self.grille
+        k1 = np.where(self.kit_crochetage[g] | (self.cles[g] > 0), TOUT, ZERO)
+        k2 = np.where(self.cles[g] > 0, TOUT, ZERO)
+        out = np.empty((len(g), 4), dtype=np.uint64)
+        for d in range(4):
+            v1, v2 = self.v1[g, d], self.v2[g, d]
+            ok = ~(v1 | v2) | (v1 & k1) | (v2 & k2)
+            out[:, d] = dec & self.porte[g, d] & self._decale(vide, d) & ok
+        return out
+
+    def _ouvrir(self, g: np.ndarray, d: np.ndarray):
+        """
+        Ouvre la porte d de la pièce courante, tire, pose une carte abordable, entre.
+        Sans carte abordable, la clé est dépensée et rien n'est posé (valider_tirage).
+        """
+        # pioche vide : la porte reste fermée (tenter_ouvrir_porte), la partie est bloquée
+        vide = self.restants[g].sum(axis=1) == 0
+        self.statut[g[vide]] = BLOQUE
+        g, d = g[~vide], d[~vide]
+        pos = self.pos[g]
+        lvl = self.niveau_verrou(g, pos, d)
+        self.cles[g] -= (lvl == 2) | ((lvl == 1) & ~self.kit_crochetage[g])
+
+        choix = self.tirer_cartes(g)
+        abordable = self.cat.cout[choix] <= self.gemmes[g][:, None]
+        pose = abordable.any(axis=1)
+        g, pos, d, choix, abordable = g[pose], pos[pose], d[pose], choix[pose], abordable[pose]
+        m = len(g)
+        cles_alea = np.where(abordable, self.rng.random(choix.shape), -1.0)
+        p = choix[np.arange(m), cles_alea.argmax(axis=1)]
+        self.gemmes[g] -= self.cat.cout[p]
+        self.restants[g, p] -= 1
+
+        npos = pos + np.array(self.decalage)[d]
+        self.occupee[g, npos] = p
+        bit, nbit = self._bit(pos), self._bit(npos)
+        self.decouv[g] |= nbit
+        self.boutiques[g] |= np.where(self.cat.shop[p], nbit, ZERO)
+        self.porte[g, d] |= bit
+
+        # portes de la nouvelle pièce : celle par où l'on entre + un tirage parmi les autres
+        opp = np.array(OPP)[d]
+        possibles = self.possibles[npos]
+        autres = np.zeros((m, 4), dtype=bool)
+        for dd in range(4):
+            autres[:, dd] = ((possibles >> dd) & 1 == 1) & (opp != dd)
+        restant = np.minimum(self.cat.nb_portes[p], self.nb_possibles[npos]) - 1
+        alea = np.where(autres, self.rng.random((m, 4)), -1.0)
+        rang = (alea[:, None, :] > alea[:, :, None]).sum(axis=2)
+        gardees = autres & (rang < restant[:, None])
+        gardees[np.arange(m), opp] = True
+        for dd in range(4):
+            self.porte[g, dd] |= np.where(gardees[:, dd], nbit, ZERO)
+
+        self.pos[g] = npos
+        self._consommer_pas(g)
+        self.generer_loot(g, npos, p)
+        self._ramasser(g)
+        gagne = self.cat.antechambre[p] & (npos == self.w // 2)
+        self.statut[g[gagne]] = VICTOIRE
+
+    def _consommer_pas(self, g: np.ndarray):
+        self.pas_utilises[g] += self.pas[g] > 0
+        self.pas[g] = np.maximum(0, self.pas[g] - 1)
+
+    def _rapprocher(self, g: np.ndarray, cibles: np.ndarray):
+        """
+        Avance d'une pièce vers la case ouvrable la plus proche : BFS multi-source
+        depuis les cibles, une couche de bitboard par itération.
+        """
+        dec = self.decouv[g]
+        liens = []          # liens[d] : cases d'où l'on peut passer dans la direction d
+        for d in range(4):
+            retour = self._decale(dec & self.porte[g, OPP[d]], d)
+            liens.append(dec & self.porte[g, d] & retour)
+        joueur = self._bit(self.pos[g])
+        atteint = cibles.copy()
+        direction = np.full(len(g), -1)
+        actifs = np.arange(len(g))
+        for _ in range(self.w * self.h):
+            r = atteint[actifs]
+            nouv = r.copy()
+            for d in range(4):
+                nouv |= liens[d][actifs] & self._decale(r, d)
+            j = joueur[actifs]
+            arrive = (nouv & j) != 0
+            for d in range(4):
+                ok = arrive & (direction[actifs] < 0) & ((liens[d][actifs] & self._decale(r, d) & j) != 0)
+                direction[actifs[ok]] = d
+            atteint[actifs] = nouv
+            actifs = actifs[~arrive & (nouv != r)]
+            if not len(actifs):
+                break
+
+        bouge = direction >= 0
+        g, d = g[bouge], direction[bouge]
+        self.pos[g] += np.array(self.decalage)[d]
+        self._consommer_pas(g)
+        p = self.occupee[g, self.pos[g]]
+        connu = p >= 0
+        p_c, gc = p[connu], g[connu]
+        self.pas[gc] += 5 * self.cat.plus_pas[p_c]
+        moins = self.cat.moins_pas[p_c] & (self.pas[gc] > 0)
+        self.pas[gc[moins]] = np.maximum(0, self.pas[gc[moins]] - 3)
+        return bouge
+
+    # ---------- boucle ----------
+    def tour(self) -> int:
+        """Joue un tour de toutes les parties en cours ; renvoie le nombre restant en cours."""
+        self.statut[(self.statut == EN_COURS) & (self.pas == 0)] = DEFAITE
+        g = np.flatnonzero(self.statut == EN_COURS)
+        if not len(g):
+            return 0
+        joueur = self._bit(self.pos[g])
+        achat = (self.cles[g] == 0) & (self.or_[g] >= PRIX_CLE_BOUTIQUE) & ((self.boutiques[g] & joueur) != 0)
+        self.cles[g[achat]] += 1
+        self.or_[g[achat]] -= PRIX_CLE_BOUTIQUE
+
+        ouv = self._ouvrables(g)
+        ici = (ouv & joueur[:, None]) != 0                # (m, 4)
+        peut_ouvrir = ici.any(axis=1)
+
+        if peut_ouvrir.any():
+            alea = np.where(ici[peut_ouvrir], self.rng.random((int(peut_ouvrir.sum()), 4)), -1.0)
+            self._ouvrir(g[peut_ouvrir], alea.argmax(axis=1))
+
+        reste = ~peut_ouvrir
+        if reste.any():
+            gr = g[reste]
+            cibles = np.bitwise_or.reduce(ouv[reste], axis=1)
+            sans_cle = (cibles == 0) & (self.cles[gr] == 0) & (self.or_[gr] >= PRIX_CLE_BOUTIQUE)
+            cibles[sans_cle] = self.boutiques[gr[sans_cle]]
+            bloque = cibles == 0
+            self.statut[gr[bloque]] = BLOQUE
+            if (~bloque).any():
+                gr = gr[~bloque]
+                bouge = self._rapprocher(gr, cibles[~bloque])
+                self.statut[gr[~bouge]] = BLOQUE      # cible hors d'atteinte
+        self.tours += 1
+        return int((self.statut == EN_COURS).sum())
+
+    def jouer(self, max_tours: int = 10_000) -> Dict[str, float]:
+        for _ in range(max_tours):
+            if self.tour() == 0:
+                break
+        return self.resultats()
+
+    def resultats(self) -> Dict[str, float]:
+        res: Dict[str, float] = {"parties": self.n, "tours": self.tours}
+        for code, nom in NOMS_STATUTS.items():
+            res[nom] = int((self.statut == code).sum())
+        res["taux_victoire"] = res["victoire"] / self.n
+        res["pas_utilises_moyen"] = float(self.pas_utilises.mean())
+        return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulation NumPy de N parties en parallèle.")
+    ap.add_argument("-n", type=int, default=10_000, help="nombre de parties")
+    ap.add_argument("--graine", type=int, default=None)
+    args = ap.parse_args()
+
+    t = time.perf_counter()
+    sim = SimulationLot(args.n, args.graine)
+    res = sim.jouer()
+    dt = time.perf_counter() - t
+    tours_parties = int(sim.pas_utilises.sum())
+    for k, v in res.items():
+        print(f"{k:>20} : {v}")
+    print(f"{'durée':>20} : {dt:.2f} s  ({tours_parties / dt:,.0f} tours-parties/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""Les modules du jeu sont à la racine du dépôt ; pygame tourne sans fenêtre."""
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
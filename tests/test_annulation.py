@@ -0,0 +1,96 @@
+"""GameState.annuler remet la partie dans l'état d'avant l'action."""
+import random
+
+from moteur import GameState
+from monte_carlo import politique_gloutonne
+from sauvegarde import empreinte as _empreinte
+
+
+def empreinte(e):
+    t = list(_empreinte(e))
+    del t[10]           # révision : incrémentée par annuler()
+    return t
+
+
+def test_annuler_sans_historique():
+    e = GameState(0)
+    assert e.annuler() is False
+    e.activer_historique()
+    assert e.annuler() is False
+
+
+def test_annuler_plusieurs_actions():
+    for graine in range(10):
+        e = GameState(graine)
+        e.activer_historique()
+        rng = random.Random(graine)
+        pile = []
+        while e.statut() is None:
+            a = politique_gloutonne(e, rng)
+            if a is None:
+                break
+            avant = empreinte(e)
+            dernier = e.historique[-1] if e.historique else None
+            e.step(a)
+            if e.historique and e.historique[-1] is not dernier:    # action non refusée
+                pile.append(avant)
+            if rng.random() < 0.3:
+                for _ in range(min(len(pile), rng.randint(1, 3))):
+                    assert e.annuler()
+                    assert empreinte(e) == pile.pop()
+
+
+def test_rejouer_apres_annulation():
+    # l'aléa est restauré : la même action redonne le même résultat
+    e = GameState(4)
+    e.activer_historique()
+    e.step(("ouvrir", "N"))
+    choix = [p.nom for p in e.choix]
+    msgs = e.step(("choisir", 0))
+    apres = empreinte(e)
+    assert e.annuler() and e.annuler()
+    assert not e.ouverture_en_cours and e.choix == []
+    e.step(("ouvrir", "N"))
+    assert [p.nom for p in e.choix] == choix
+    assert e.step(("choisir", 0)) == msgs
+    assert empreinte(e) == apres
+
+
+def test_action_refusee_hors_historique():
+    # une action refusée ne change rien : annuler() défait la dernière action réelle
+    e = GameState(4)
+    e.activer_historique()
+    avant = empreinte(e)
+    e.step(("ouvrir", "N"))
+    assert e.ouverture_en_cours
+    e.step(("porte", "E"))          # refusée pendant le tirage
+    e.step(("porte", "S"))          # refusée : pas de porte au sud de l'entrée
+    assert len(e.historique) == 1
+    assert e.annuler()
+    assert empreinte(e) == avant
+    assert e.annuler() is False
+
+
+def test_journal_grille():
+    # les écritures notées dans le journal sont défaites par restaurer()
+    e = GameState(2)
+    g = e.grille
+    avant = g.empreinte()
+    journal = g.journal = []
+    e._jouer(("ouvrir", "N"))
+    e._jouer(("choisir", 0))
+    g.journal = None
+    assert journal and g.empreinte() != avant
+    g.restaurer(journal)
+    assert g.empreinte() == avant
+
+
+def test_capacite_bornee():
+    e = GameState(5)
+    e.activer_historique(capacite=3)
+    for a in [("porte", "E"), ("porte", "W"), ("porte", "N"), ("porte", "E"), ("porte", "W")]:
+        e.step(a)
+    assert len(e.historique) == 3
+    assert e.annuler() and e.annuler() and e.annuler()
+    assert e.annuler() is False
+    assert e.direction() == "W"
@@ -0,0 +1,44 @@
+"""Atlas de textures : les poignées ne se recouvrent pas et rendent les pixels d'origine."""
+import pygame
+
+from images import Atlas
+
+
+def carre(taille, couleur):
+    s = pygame.Surface(taille, pygame.SRCALPHA)
+    s.fill(couleur)
+    return s
+
+
+def verifier(atlas, images):
+    for cle, surf in images.items():
+        page, rect = atlas.get(cle)
+        assert page.subsurface(rect).get_at((0, 0)) == surf.get_at((0, 0))
+        for autre, (page2, rect2) in ((k, atlas.get(k)) for k in images if k != cle):
+            assert page2 is not page or not rect.colliderect(rect2), (cle, autre)
+
+
+def test_grande_image_en_premier():
+    atlas = Atlas((32, 32))
+    images = {"grande": carre((40, 20), (255, 0, 0, 255)),
+              "a": carre((10, 10), (0, 255, 0, 255)),
+              "b": carre((10, 10), (0, 0, 255, 255))}
+    for cle, surf in images.items():
+        atlas.ajouter(cle, surf)
+    assert len(atlas.pages) == 2
+    verifier(atlas, images)
+
+
+def test_etageres_et_pages():
+    atlas = Atlas((32, 32))
+    images = {}
+    for k in range(30):
+        taille = (40, 8) if k % 7 == 3 else (6 + k % 5, 5 + k % 4)
+        images[k] = carre(taille, (k * 8, 255 - k * 8, k, 255))
+        atlas.ajouter(k, images[k])
+    assert atlas.ajouter(0, images[0]) is atlas.get(0)
+    verifier(atlas, images)
+    atlas.vider()
+    assert len(atlas) == 0 and atlas.pages == []
+    atlas.ajouter("x", images[1])
+    assert atlas.get("x")[1].topleft == (0, 0)
@@ -0,0 +1,70 @@
+"""Caméra du plateau : seules les cases visibles sont dessinées."""
+import pygame
+
+from jeu import Plateau, CENTRE_W, HAUTEUR, ZOOM_DEFAUT
+from moteur import GameState
+
+
+class PiecesLues(list):
+    """Liste des pièces qui retient les cases consultées."""
+    def __init__(self, pieces):
+        super().__init__(pieces)
+        self.lues = set()
+
+    def __getitem__(self, i):
+        self.lues.add(i)
+        return super().__getitem__(i)
+
+
+def _plateau(largeur, hauteur):
+    pygame.font.init()
+    e = GameState(0, largeur=largeur, hauteur=hauteur)
+    return e, Plateau(pygame.Rect(0, 0, CENTRE_W, HAUTEUR), e)
+
+
+def test_petit_manoir_ajuste():
+    e, p = _plateau(5, 9)
+    assert p.zoom is None
+    xs, ys = p._cases_visibles()
+    assert (xs, ys) == (range(5), range(9))
+
+
+def test_grand_manoir_seules_les_cases_visibles():
+    e, p = _plateau(60, 120)
+    assert p.zoom == ZOOM_DEFAUT
+    p.centrer(e.x, e.y)
+    xs, ys = p._cases_visibles()
+    assert 0 < len(xs) < 60 and 0 < len(ys) < 120
+    assert e.x in xs and e.y in ys
+
+    # toute case visible recoupe la vue, les voisines hors plage non
+    vue = p._vue()
+    cw, ch, (ox, oy) = p._geometrie()
+    case = lambda x, y: pygame.Rect(ox + x * cw, oy + y * ch, cw, ch)
+    for x in (xs.start, xs.stop - 1):
+        for y in (ys.start, ys.stop - 1):
+            assert case(x, y).colliderect(vue)
+    if xs.start > 0:
+        assert not case(xs.start - 1, ys.start).colliderect(vue)
+    if ys.start > 0:
+        assert not case(xs.start, ys.start - 1).colliderect(vue)
+
+    e.grille.pieces = lues = PiecesLues(e.grille.pieces)
+    p._couche_statique()
+    assert lues.lues == {e.grille.indice(x, y) for x in xs for y in ys}
+
+
+def test_sprites_vides_au_changement_de_zoom():
+    e, p = _plateau(60, 120)
+    surf = pygame.Surface((CENTRE_W, HAUTEUR))
+    p.dessiner(surf)
+    assert len(p._sprites) > 0
+    avant = len(p._sprites)
+    p.dessiner(surf)
+    assert len(p._sprites) == avant
+    for _ in range(6):
+        p.zoomer(1.25)
+        p.dessiner(surf)
+    # seuls les sprites de la taille de case courante restent dans l'atlas
+    assert len(p._sprites) == avant
+    assert len(p._sprites.pages) == 1
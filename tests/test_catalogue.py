@@ -0,0 +1,36 @@
+"""Catalogue indexé : ids, tables de loot et drapeaux des pièces."""
+import dataclasses
+
+import pytest
+
+from moteur import (CATALOGUE, PIECES_MODELES, ENTREE, ID_ANTICHAMBRE, BOUTIQUE, CASIER, ECHELLE_LOOT,
+                    PoolTirage)
+
+
+def test_ids():
+    assert len(CATALOGUE) == len(PIECES_MODELES) + 1 and CATALOGUE[ENTREE.id] is ENTREE
+    assert all(CATALOGUE[k].id == k for k in range(len(CATALOGUE)))
+    assert CATALOGUE[ID_ANTICHAMBRE].nom == "Antechamber"
+    with pytest.raises(ValueError):
+        PoolTirage(PIECES_MODELES[1:])
+
+
+def test_loot_hors_catalogue():
+    p = dataclasses.replace(PIECES_MODELES[0], id=-1, actions={"Coffre": 100})
+    assert CATALOGUE.table_loot(p).coffre == ECHELLE_LOOT
+    assert CATALOGUE.table_loot(PIECES_MODELES[0]) is CATALOGUE.loot[0]
+
+
+def test_drapeaux_de_loot():
+    for p in CATALOGUE.pieces:
+        drapeaux = CATALOGUE.loot[p.id].drapeaux
+        assert bool(drapeaux & BOUTIQUE) == p.boutique
+        assert bool(drapeaux & CASIER) == p.casier
+    assert [p.nom for p in CATALOGUE.pieces if p.casier] == ["Locker Room"]
+
+
+def test_pieces_immuables():
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        PIECES_MODELES[0].nom = "x"
+    with pytest.raises(TypeError):
+        PIECES_MODELES[0].actions["Clé"] = 99
@@ -0,0 +1,39 @@
+"""ChronoImages : tampon circulaire des temps par image et export CSV."""
+import csv
+
+from jeu import ChronoImages
+
+
+def test_tampon_circulaire():
+    chrono = ChronoImages(["a", "b"], capacite=4)
+    for k in range(6):
+        chrono.ajouter("a", k / 1000)
+        chrono.ajouter("a", k / 1000)
+        chrono.ajouter("b", 0.001)
+        chrono.fin_image()
+    assert chrono.n == 6
+    # seules les 4 dernières images restent, de la plus ancienne à la plus récente
+    assert [chrono.tampons["a"][i] for i in chrono.indices()] == [0.004, 0.006, 0.008, 0.010]
+    assert [chrono.tampons["a"][i] for i in chrono.indices(2)] == [0.008, 0.010]
+    assert chrono.courante == {"a": 0.0, "b": 0.0}
+    assert chrono.mediane_ms("a") == 8.0 and chrono.mediane_ms("b") == 1.0
+
+
+def test_export_csv(tmp_path):
+    chrono = ChronoImages(["a", "b"], capacite=3)
+    for k in range(5):
+        chrono.ajouter("a", k / 1000)
+        chrono.fin_image()
+    chemin = tmp_path / "images.csv"
+    assert chrono.exporter_csv(str(chemin)) == 3
+    with open(chemin, newline="", encoding="utf-8") as f:
+        lignes = list(csv.reader(f))
+    assert lignes == [["image", "a", "b"],
+                      ["2", "2.000", "0.000"],
+                      ["3", "3.000", "0.000"],
+                      ["4", "4.000", "0.000"]]
+
+
+def test_vide():
+    chrono = ChronoImages(["a"])
+    assert chrono.indices() == [] and chrono.mediane_ms("a") == 0.0
@@ -0,0 +1,62 @@
+"""Frontière incrémentale comparée à un balayage complet du manoir."""
+import random
+
+import pytest
+
+from moteur import Grille, Frontiere, DIRECTIONS, DECOUVERTE, BOUTIQUE
+
+
+def balayage(g):
+    portes = {}
+    for i in range(g.n):
+        if not g.a(i, DECOUVERTE):
+            continue
+        for d, j in g.voisins[i].items():
+            if g.a_porte(i, d) and not g.a(j, DECOUVERTE):
+                portes[g.xy(i) + (d,)] = g.verrou(i, d)
+    cles = sum(1 for i in range(g.n) if g.a(i, DECOUVERTE)
+               for pk in g.objets[i] if pk.get("nom") == "Clé")
+    boutiques = sum(1 for i in range(g.n) if g.a(i, DECOUVERTE) and g.a(i, BOUTIQUE))
+    return portes, cles, boutiques
+
+
+def progression_brute(portes, cles, kit):
+    for lvl in portes.values():
+        if lvl == 0 or (lvl == 1 and (kit or cles > 0)) or (lvl == 2 and cles > 0):
+            return True
+    return False
+
+
+@pytest.mark.parametrize("graine", range(8))
+def test_frontiere_egale_balayage(graine):
+    rng = random.Random(graine)
+    g = Grille()
+    depart = g.indice(g.largeur // 2, g.hauteur - 1)
+    g.marquer(depart, DECOUVERTE)
+    for d in ("N", "E", "W"):
+        g.ajouter_porte(depart, d)
+    front = Frontiere(g)
+    cases = [i for i in range(g.n) if i != depart]
+    rng.shuffle(cases)
+    for i in cases:
+        g.marquer(i, DECOUVERTE)
+        for d in DIRECTIONS:
+            if rng.random() < 0.5:
+                g.ajouter_porte(i, d)
+            g.definir_verrou(i, d, rng.randrange(3))
+        g.marquer(i, BOUTIQUE, rng.random() < 0.1)
+        if rng.random() < 0.5:
+            g.ajouter_objet(i, {"type": "item", "nom": "Clé"})
+        front.piece_posee(*g.xy(i))
+        front.loot_genere(g.cellule(*g.xy(i)))
+        if g.objets[i] and rng.random() < 0.5:
+            g.retirer_objet(i, g.objets[i][0])
+            front.cle_ramassee()
+
+        portes, cles, boutiques = balayage(g)
+        assert front.portes == portes
+        assert front.par_niveau == [sum(1 for v in portes.values() if v == n) for n in range(3)]
+        assert front.cles_au_sol == cles
+        assert front.boutiques == boutiques
+        for c, kit in ((0, False), (0, True), (1, False)):
+            assert front.progression_possible(c, kit) == progression_brute(portes, c, kit)
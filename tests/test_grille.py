@@ -0,0 +1,49 @@
+"""Grille compacte : masque des portes et verrous sur 2 bits."""
+import itertools
+
+from moteur import Grille, DIRECTIONS, BIT_DIR, DECOUVERTE, COFFRE, CASIER
+
+
+def test_portes_et_verrous_empaquetes():
+    g = Grille()
+    i = g.indice(1, 4)
+    niveaux = dict(zip(DIRECTIONS, (2, 0, 1, 2)))
+    for d in ("N", "S"):
+        g.ajouter_porte(i, d)
+    for d, lvl in niveaux.items():
+        g.definir_verrou(i, d, lvl)
+    assert g.portes[i] == BIT_DIR["N"] | BIT_DIR["S"]
+    assert [g.a_porte(i, d) for d in DIRECTIONS] == [True, False, True, False]
+    assert {d: g.verrou(i, d) for d in DIRECTIONS} == niveaux
+    assert g.verrous[i] == 2 | 0 << 2 | 1 << 4 | 2 << 6
+    # réécrire un verrou ne touche pas les trois autres
+    g.definir_verrou(i, "W", 0)
+    assert {d: g.verrou(i, d) for d in DIRECTIONS} == dict(niveaux, W=0)
+    assert g.portes[i - 1] == g.verrous[i - 1] == 0 and g.portes[i + 1] == g.verrous[i + 1] == 0
+
+
+def test_tous_les_verrous():
+    g = Grille()
+    for i, combo in enumerate(itertools.product(range(3), repeat=4)):
+        i %= g.n
+        for d, lvl in zip(DIRECTIONS, combo):
+            g.definir_verrou(i, d, lvl)
+        assert tuple(g.verrou(i, d) for d in DIRECTIONS) == combo
+
+
+def test_drapeaux_et_copie():
+    g = Grille()
+    g.marquer(3, DECOUVERTE)
+    g.marquer(3, COFFRE)
+    g.marquer(3, COFFRE, False)
+    assert g.a(3, DECOUVERTE) and not g.a(3, COFFRE)
+    c = g.copie()
+    c.marquer(3, CASIER)
+    c.ajouter_porte(3, "E")
+    c.definir_verrou(3, "E", 2)
+    assert not g.a(3, CASIER) and not g.a_porte(3, "E") and g.verrou(3, "E") == 0
+    assert c.empreinte() != g.empreinte()
+    c.marquer(3, CASIER, False)
+    c.portes[3] = 0
+    c.definir_verrou(3, "E", 0)
+    assert c.empreinte() == g.empreinte()
@@ -0,0 +1,24 @@
+"""IA en faisceau : ses macro-actions restent des actions acceptées par le moteur."""
+from ia import IA, actions_gratuites, appliquer
+from moteur import GameState
+
+REFUS = "Tirage en cours : choisis d'abord une pièce."
+
+
+def test_rien_de_gratuit_pendant_un_tirage():
+    e = GameState(0)
+    e.step(("ouvrir", "N"))
+    assert e.ouverture_en_cours
+    assert actions_gratuites(e) == []
+
+
+def test_partie_sans_action_refusee():
+    for graine in range(3):
+        e = GameState(graine)
+        ia = IA(largeur=2, profondeur=1, graine=graine)
+        for _ in range(300):
+            m = ia.decider(e)
+            if m is None:
+                break
+            assert REFUS not in [txt for txt, _ in appliquer(e, m)]
+        assert e.statut() is not None
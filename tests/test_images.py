@@ -0,0 +1,83 @@
+"""Chargement des icônes : manifeste et récupération depuis le thread."""
+import time
+
+import pygame
+
+from images import CacheIcones, ChargeurImages, manifeste_pieces, nom_fichier
+
+
+def icone(dossier, nom):
+    pygame.image.save(pygame.Surface((4, 4)), str(dossier / nom_fichier(nom)))
+
+
+def test_manifeste_fichiers_presents(tmp_path):
+    icone(tmp_path, "Grand Hall")
+    assert manifeste_pieces(["Grand Hall", "Serre"], str(tmp_path)) == \
+        [("Grand Hall", str(tmp_path / "grand_hall.png"))]
+    assert manifeste_pieces(["Serre"], str(tmp_path / "absent")) == []
+
+
+def test_manifeste_csv(tmp_path):
+    icone(tmp_path, "serre")
+    (tmp_path / "manifeste.csv").write_text("Serre;serre.png\nCave;cave.png\n", encoding="utf-8")
+    assert manifeste_pieces([], str(tmp_path)) == [("Serre", str(tmp_path / "serre.png"))]
+
+
+def test_recuperer_sans_thread():
+    c = ChargeurImages()
+    debut = time.perf_counter()
+    assert c.recuperer(budget=1.0) == 0
+    assert time.perf_counter() - debut < 0.5
+    assert c.generation == 0
+
+
+def test_recuperer_images_chargees(tmp_path):
+    icone(tmp_path, "Serre")
+    icone(tmp_path, "Cave")
+    c = ChargeurImages()
+    c.demarrer(["Serre", "Cave"], str(tmp_path))
+    limite = time.perf_counter() + 5
+    while not c.termine and time.perf_counter() < limite:
+        c.recuperer()
+    assert c.termine
+    assert set(c.images) == {"Serre", "Cave"} and c.echecs == 0
+    assert c.generation >= 1
+
+
+def sources(*noms):
+    return {nom: pygame.Surface((8, 8), pygame.SRCALPHA) for nom in noms}
+
+
+def test_cache_icones_reutilise():
+    c = CacheIcones(sources("A", "B"))
+    page, rect = c.icone("A", (16, 16))
+    assert rect.size == (16, 16)
+    assert c.icone("A", (16, 16)) == (page, rect)
+    assert c.icone("B", (16, 16))[0] is page      # même taille : même page d'atlas
+    assert (c.hits, c.misses) == (1, 2)
+    assert c.icone("C", (16, 16)) is None
+
+
+def test_cache_icones_evince_l_atlas_le_moins_recent():
+    c = CacheIcones(sources("A"), prevues=1)
+    c.icone("A", (16, 16))
+    c.plafond = 3 * c.octets                      # deux atlas tiennent, pas trois
+    c.icone("A", (17, 16))
+    assert c.icone("A", (16, 16)) is not None      # l'atlas 16 redevient le plus récent
+    c.icone("A", (18, 16))
+    assert c.evictions >= 1 and c.octets <= c.plafond
+    misses = c.misses
+    c.icone("A", (16, 16))
+    assert c.misses == misses                      # 16 gardé, 17 évincé
+    c.icone("A", (17, 16))
+    assert c.misses == misses + 1
+
+
+def test_cache_icones_vide_au_changement_de_contexte():
+    c = CacheIcones(sources("A"))
+    c.contexte((800, 600), 9)
+    c.icone("A", (16, 16))
+    c.contexte((800, 600), 9)
+    assert len(c) == 1
+    c.contexte((1024, 768), 9)
+    assert len(c) == 0 and c.octets == 0
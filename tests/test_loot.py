@@ -0,0 +1,63 @@
+"""Tables de loot : seuils entiers et fréquences obtenues par le tirage unique."""
+import pytest
+
+from moteur import (GameState, Piece, TableLoot, ECHELLE_LOOT, BOUTIQUE, COFFRE, TROU, LOOT_GENERE,
+                    C_BLEU, C_JAUNE, C_VERT, C_VIOLET)
+
+
+def seuil(pourcent):
+    return round(pourcent * ECHELLE_LOOT / 100)
+
+
+def piece(couleur=C_VIOLET, **actions):
+    return Piece("Essai", couleur, 1, 0, [], actions)
+
+
+def test_seuils_et_bonus():
+    t = TableLoot(piece(Clé=20, Gemmes=10, Coffre=30))
+    # k = détecteur de métaux (bit 0) | patte de lapin (bit 1)
+    assert t.cle == (seuil(20), seuil(30), seuil(25), seuil(35))
+    assert t.gemme == (seuil(10), seuil(10), seuil(15), seuil(15))
+    assert (t.coffre, t.trou, t.or_) == (seuil(30), 0, 0)
+    assert t.repli and t.drapeaux == 0
+
+
+def test_seuils_selon_la_couleur():
+    assert TableLoot(piece(C_VERT)).trou == seuil(50)
+    assert TableLoot(piece(C_VERT, Creuser=10)).trou == seuil(10)
+    assert TableLoot(piece(C_BLEU)).or_ == seuil(25)
+    assert TableLoot(piece(C_JAUNE)).drapeaux == BOUTIQUE
+
+
+def test_valeur_non_entiere_jamais_tiree():
+    t = TableLoot(piece(Clé="parfois", Gemmes="?"))
+    assert t.cle == (0, 0, 0, 0) and t.gemme == (0, 0, 0, 0)
+    assert not t.repli
+
+
+def frequences(detecteur, n=20000):
+    e = GameState(11)
+    e.inv.detecteur_metaux = detecteur
+    p = piece(Clé=20, Gemmes=10, Coffre=30)
+    cell = e.current_cell()
+    g, i = e.grille, cell.i
+    cles = gemmes = coffres = 0
+    for _ in range(n):
+        g.marquer(i, LOOT_GENERE | TROU | COFFRE, False)
+        g.definir_objets(i, ())
+        e._generer_loot_si_premiere_fois(p, cell)
+        noms = [o["nom"] for o in g.objets[i]]
+        cles += "Clé" in noms
+        gemmes += "Gemme" in noms
+        coffres += bool(g.drapeaux[i] & COFFRE)
+    return cles / n, gemmes / n, coffres / n
+
+
+@pytest.mark.parametrize("detecteur, p_cle", [(False, 0.20), (True, 0.30)])
+def test_frequences_graine_fixe(detecteur, p_cle):
+    cles, gemmes, coffres = frequences(detecteur)
+    # repli : une pièce sans rien d'autre donne une clé ou une gemme (une chance sur deux)
+    repli = (1 - p_cle) * 0.9 * 0.7 * 0.5
+    assert cles == pytest.approx(p_cle + repli, abs=0.015)
+    assert gemmes == pytest.approx(0.1 + repli, abs=0.015)
+    assert coffres == pytest.approx(0.3, abs=0.015)
@@ -0,0 +1,32 @@
+"""Monte Carlo : reproductibilité par graine et intervalles de Wilson."""
+import pytest
+
+from monte_carlo import estimer, intervalle_wilson, ISSUES
+
+
+def test_memes_totaux_quel_que_soit_le_nombre_de_processus():
+    un = estimer(24, 1, graine=3, taille_bloc=5)
+    deux = estimer(24, 2, graine=3, taille_bloc=5)
+    for k in ISSUES + ("pas_utilises",):
+        assert un[k] == deux[k]
+    assert sum(un[k]["nombre"] for k in ISSUES) == 24
+
+
+def test_wilson_valeurs_connues():
+    assert intervalle_wilson(0, 0) == (0.0, 0.0)
+    bas, haut = intervalle_wilson(5, 10)
+    assert bas == pytest.approx(0.2366, abs=1e-4) and haut == pytest.approx(0.7634, abs=1e-4)
+    bas, haut = intervalle_wilson(0, 10)
+    assert bas == 0.0 and haut == pytest.approx(0.2775, abs=1e-4)
+    assert intervalle_wilson(10, 10)[1] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("k,n", [(1, 7), (3, 50), (120, 1000), (999, 1000)])
+def test_wilson_encadre_et_symetrique(k, n):
+    bas, haut = intervalle_wilson(k, n)
+    assert 0.0 <= bas <= k / n <= haut <= 1.0
+    b2, h2 = intervalle_wilson(n - k, n)
+    assert (bas, haut) == pytest.approx((1 - h2, 1 - b2))
+    # plus de parties, intervalle plus étroit
+    b4, h4 = intervalle_wilson(4 * k, 4 * n)
+    assert h4 - b4 < haut - bas
@@ -0,0 +1,97 @@
+"""GameState.step sur des graines fixes."""
+import random
+
+import pytest
+
+from moteur import GameState, ENTREE, ID_ENTREE
+from monte_carlo import politique_gloutonne, politique_aleatoire
+
+
+def trace(graine, politique, n=400):
+    e = GameState(graine)
+    rng = random.Random(graine)
+    actions = []
+    for _ in range(n):
+        if e.statut() is not None:
+            break
+        a = politique(e, rng)
+        if a is None:
+            break
+        actions.append((a, e.step(a), e.x, e.y, e.inv.pas, [p.nom for p in e.choix]))
+    return actions, e.statut()
+
+
+def test_partie_initiale():
+    e = GameState(0)
+    assert (e.x, e.y) == (2, 8)
+    assert e.grille.pieces[e.ici()] is ENTREE and ENTREE.id == ID_ENTREE
+    assert e.inv.pas == 70
+    assert e.statut() is None
+    assert e.actions_possibles() == [("ouvrir", "N"), ("ouvrir", "E"), ("ouvrir", "W")]
+
+
+def test_ouvrir_puis_choisir():
+    e = GameState(0)
+    assert e.step(("ouvrir", "N")) == []
+    assert e.ouverture_en_cours
+    assert [p.nom for p in e.choix] == ["Foundation", "Spare Room", "Spare Room"]
+    assert e.step(("choisir", 0)) == [("Entrée dans Foundation", 2.0)]
+    assert not e.ouverture_en_cours and e.choix == []
+    assert (e.x, e.y) == (2, 7)
+    assert e.grille.pieces[e.ici()].nom == "Foundation"
+    assert e.inv.pas == 69
+    assert e.grille.a_porte(e.grille.indice(2, 8), "N") and e.grille.a_porte(e.ici(), "S")
+    assert ("aller", "S") in e.actions_possibles()
+
+
+@pytest.mark.parametrize("politique", [politique_gloutonne, politique_aleatoire])
+def test_meme_graine_meme_partie(politique):
+    assert trace(7, politique) == trace(7, politique)
+    assert trace(7, politique) != trace(8, politique)
+
+
+def test_actions_possibles_jouables():
+    for graine in range(5):
+        e = GameState(graine)
+        rng = random.Random(graine)
+        while e.statut() is None:
+            acts = e.actions_possibles()
+            if not acts:
+                break
+            e.step(rng.choice(acts))
+        assert e.statut() is not None or not e.actions_possibles()
+
+
+@pytest.mark.parametrize("action", [("aller", "S"), ("ok",), ("ouvrir", "E"), ("porte", "E"),
+                                    ("voyager", 2, 8), ("menu", 0), ("consommer", "Repas")])
+def test_tirage_en_cours_seules_choisir_et_relancer(action):
+    e = GameState(0)
+    e.step(("ouvrir", "N"))
+    e.step(("choisir", 0))                 # Foundation en (2, 7)
+    e.inv.cles = 3
+    e.step(("ouvrir", "N"))
+    assert e.ouverture_en_cours and e.porte_tirage == (2, 6, "N")
+    avant = (e.x, e.y, e.dir_idx, e.inv.cles, e.inv.pas, e.choix)
+    assert e.step(action) == [("Tirage en cours : choisis d'abord une pièce.", 2.0)]
+    assert (e.x, e.y, e.dir_idx, e.inv.cles, e.inv.pas, e.choix) == avant
+    e.step(("choisir", 0))
+    assert e.grille.pieces[e.grille.indice(2, 7)].nom == "Foundation"
+    assert e.grille.pieces[e.grille.indice(2, 6)].nom == "Corridor"
+    assert (e.x, e.y) == (2, 6) and e.porte_tirage is None
+
+
+def test_action_inconnue():
+    with pytest.raises(ValueError):
+        GameState(0).step(("voler",))
+
+
+def test_pioche_vide_bloque():
+    e = GameState(0)
+    assert e.frontiere.progression_possible(e.cles_obtenables(), e.inv.kit_crochetage)
+    for p, k in zip(e.pool.modeles, list(e.pool.restants)):
+        for _ in range(k):
+            e.pool.retirer(p)
+    assert e.pool.total() == 0
+    assert e.statut() == "bloque"
+    assert e.step(("ok",)) == [("Plus aucune pièce dans la pioche.", 2.0)]
+    assert not e.ouverture_en_cours
@@ -0,0 +1,63 @@
+"""Pilote de scénarios : format texte et rejeu sans fenêtre."""
+import random
+
+import pygame
+import pytest
+
+import pilote
+from pilote import (EchecScenario, Scenario, analyser, formater, generer, rejouer, rejouer_tous,
+                    CODES_TOUCHES)
+from jeu import FICHIER_SAUVEGARDE
+
+
+@pytest.fixture(autouse=True)
+def polices():
+    pygame.font.init()
+    yield
+
+
+def test_aller_retour_texte():
+    sc = generer(random.Random(3), 100, graine=42)
+    sc.largeur, sc.hauteur = 7, 11
+    relu = analyser(formater(sc, par_ligne=9))
+    assert relu.touches == sc.touches
+    assert (relu.graine, relu.largeur, relu.hauteur) == (42, 7, 11)
+    assert formater(relu, par_ligne=9) == formater(sc, par_ligne=9)
+
+
+def test_analyser_commentaires_et_touche_inconnue():
+    sc = analyser("graine=5  # partie courte\nz SPACE  # ouvrir\n1\n")
+    assert sc.graine == 5
+    assert sc.touches == [CODES_TOUCHES["z"], CODES_TOUCHES["SPACE"], CODES_TOUCHES["1"]]
+    with pytest.raises(ValueError):
+        analyser("z pas_une_touche")
+
+
+def test_echec_indique_l_evenement(monkeypatch):
+    appels = []
+
+    def update(self, dt):
+        appels.append(dt)
+        if len(appels) == 3:
+            raise RuntimeError("panne")
+
+    monkeypatch.setattr(pilote.SceneJeu, "update", update)
+    sc = analyser("graine=1 z q SPACE d", nom="panne.scn")
+    with pytest.raises(EchecScenario) as err:
+        rejouer(sc)
+    assert (err.value.nom, err.value.indice, err.value.touche) == ("panne.scn", 2, "SPACE")
+    assert isinstance(err.value.__cause__, RuntimeError)
+
+
+def test_sauvegarde_illisible_ignoree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / FICHIER_SAUVEGARDE).write_bytes(b"pas une sauvegarde")
+    scene = rejouer(Scenario([CODES_TOUCHES["F9"], CODES_TOUCHES["z"]], graine=2))
+    assert scene.statut() is None
+
+
+def test_rejouer_tous():
+    rng = random.Random(7)
+    scenarios = [generer(rng, 200, graine=i) for i in range(5)]
+    issues = rejouer_tous(scenarios)
+    assert sum(issues.values()) == 5
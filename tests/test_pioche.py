@@ -0,0 +1,103 @@
+"""Pioche pondérée : ArbreFenwick, fréquences de tirage de PoolTirage, épuisement."""
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from moteur import ArbreFenwick, PoolTirage, PIECES_MODELES, POIDS_RARETE, EXEMPLAIRES, exemplaires_pour
+
+
+def test_fenwick_prefixes():
+    rng = random.Random(1)
+    valeurs = [rng.randrange(0, 20) for _ in range(37)]
+    a = ArbreFenwick(valeurs)
+    for _ in range(200):
+        i = rng.randrange(len(valeurs))
+        delta = rng.randrange(-valeurs[i], 10)
+        valeurs[i] += delta
+        a.ajouter(i, delta)
+        assert a.total == sum(valeurs)
+        cible = rng.randrange(a.total) if a.total else 0
+        attendu = next(k for k in range(len(valeurs)) if sum(valeurs[:k + 1]) > cible) if a.total else None
+        if attendu is not None:
+            assert a.chercher(cible) == attendu
+
+
+def test_fenwick_copie_independante():
+    a = ArbreFenwick([1, 2, 3])
+    b = a.copie()
+    b.ajouter(0, 5)
+    assert (a.total, b.total) == (6, 11)
+    assert a.chercher(0) == 0 and b.chercher(5) == 0
+
+
+def _attendu(pool):
+    poids = [k * (POIDS_RARETE[p.rarete] + pool.bonus) for p, k in zip(pool.modeles, pool.restants)]
+    total = sum(poids)
+    return [w / total for w in poids]
+
+
+@pytest.mark.parametrize("bonus", [0, 5])
+def test_frequences_de_tirage(bonus):
+    pool = PoolTirage(PIECES_MODELES)
+    pool.definir_bonus(bonus)
+    rng = random.Random(bonus)
+    n = 100_000
+    vus = Counter(pool.tirer(rng).id for _ in range(n))
+    for k, p in enumerate(_attendu(pool)):
+        z = (vus[k] - n * p) / math.sqrt(n * p * (1 - p))
+        assert abs(z) < 5, (PIECES_MODELES[k].nom, vus[k], n * p)
+
+
+def test_tirage_gratuit_uniforme():
+    pool = PoolTirage(PIECES_MODELES)
+    rng = random.Random(3)
+    gratuites = [p.id for p in PIECES_MODELES if p.cout_gemmes == 0]
+    n = 30_000
+    vus = Counter(pool.tirer_gratuite(rng).id for _ in range(n))
+    assert set(vus) == set(gratuites)
+    p = 1 / len(gratuites)
+    for k in gratuites:
+        assert abs(vus[k] - n * p) < 5 * math.sqrt(n * p * (1 - p))
+
+
+def test_epuisement():
+    pool = PoolTirage(PIECES_MODELES)
+    p = PIECES_MODELES[1]
+    total = pool.total()
+    for _ in range(EXEMPLAIRES[p.rarete]):
+        pool.retirer(p)
+    assert pool.restants[p.id] == 0
+    assert pool.total() == total - EXEMPLAIRES[p.rarete] * POIDS_RARETE[p.rarete]
+    pool.retirer(p)                  # plus d'exemplaire : sans effet
+    assert pool.restants[p.id] == 0
+    rng = random.Random(4)
+    assert all(pool.tirer(rng) is not p for _ in range(5000))
+    assert all(pool.tirer_gratuite(rng) is not p for _ in range(5000))
+
+
+def test_pioche_vide():
+    pool = PoolTirage(PIECES_MODELES, {1: 1, 2: 1, 3: 1})
+    rng = random.Random(5)
+    tirees = []
+    while pool.total() > 0:
+        p = pool.tirer(rng)
+        pool.retirer(p)
+        tirees.append(p.id)
+    assert sorted(tirees) == list(range(len(PIECES_MODELES)))
+    assert pool.tirer(rng) is None and pool.tirer_gratuite(rng) is None
+
+
+def test_copie_sur_ecriture():
+    pool = PoolTirage(PIECES_MODELES)
+    copie = pool.copie()
+    copie.retirer(PIECES_MODELES[0])
+    assert pool.restants[0] == EXEMPLAIRES[PIECES_MODELES[0].rarete]
+    assert copie.restants[0] == pool.restants[0] - 1
+    assert copie.total() < pool.total()
+
+
+def test_exemplaires_selon_la_surface():
+    assert exemplaires_pour(45) == EXEMPLAIRES
+    assert exemplaires_pour(46) == {r: 2 * k for r, k in EXEMPLAIRES.items()}
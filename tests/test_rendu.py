@@ -0,0 +1,56 @@
+"""Rendu retenu : seules les zones dont un calque a changé sont redessinées."""
+import pygame
+import pytest
+
+from jeu import Calque, RenduRetenu, SceneJeu, LARGEUR, HAUTEUR
+
+
+@pytest.fixture(autouse=True)
+def polices():
+    pygame.font.init()
+    yield
+
+
+class Compteur:
+    def __init__(self):
+        self.etat = 0
+        self.dessins = 0
+
+    def signature(self):
+        return self.etat
+
+    def dessiner(self, surf):
+        self.dessins += 1
+
+
+def test_zones_sales_seulement():
+    ecran = pygame.Surface((100, 100))
+    a, b = Compteur(), Compteur()
+    rendu = RenduRetenu([Calque("a", pygame.Rect(0, 0, 50, 50), a.signature, a.dessiner),
+                         Calque("b", pygame.Rect(60, 60, 20, 20), b.signature, b.dessiner)])
+    assert rendu.dessiner(ecran) == [pygame.Rect(0, 0, 50, 50), pygame.Rect(60, 60, 20, 20)]
+    assert rendu.dessiner(ecran) == []
+    assert (a.dessins, b.dessins) == (1, 1)
+    b.etat = 1
+    assert rendu.dessiner(ecran) == [pygame.Rect(60, 60, 20, 20)]
+    assert (a.dessins, b.dessins) == (1, 2)
+
+
+def test_calque_plein_ecran_redessine_tout():
+    ecran = pygame.Surface((100, 100))
+    a, fond = Compteur(), Compteur()
+    rendu = RenduRetenu([Calque("a", pygame.Rect(0, 0, 50, 50), a.signature, a.dessiner),
+                         Calque("fond", None, fond.signature, fond.dessiner)])
+    rendu.dessiner(ecran)
+    fond.etat = 1
+    assert rendu.dessiner(ecran) == [ecran.get_rect()]
+    assert (a.dessins, fond.dessins) == (2, 2)
+    assert rendu.dessiner(ecran) == []
+
+
+def test_scene_immobile_sans_zone_sale():
+    ecran = pygame.Surface((LARGEUR, HAUTEUR))
+    scene = SceneJeu()
+    assert scene.dessiner(ecran) == [ecran.get_rect()]
+    scene.update(1 / 60)
+    assert scene.dessiner(ecran) == []
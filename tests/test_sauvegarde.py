@@ -0,0 +1,110 @@
+"""Aller-retour de la sauvegarde binaire."""
+import os
+import random
+import struct
+
+import pytest
+
+import sauvegarde
+from moteur import GameState, PIECES_MODELES
+from monte_carlo import politique_gloutonne
+from sauvegarde import sauver, charger, ecrire, lire, empreinte, ENTETE, JOUEUR, INVENTAIRE
+
+
+def etats_joues(graine, n=150):
+    e = GameState(graine)
+    rng = random.Random(graine)
+    etats = [e.copie()]
+    while e.statut() is None and len(etats) < n:
+        a = politique_gloutonne(e, rng)
+        if a is None:
+            break
+        e.step(a)
+        etats.append(e.copie())
+    return etats
+
+
+def test_aller_retour():
+    pendant_tirage = 0
+    for graine in range(4):
+        for e in etats_joues(graine):
+            f = charger(sauver(e))
+            assert empreinte(f) == empreinte(e)
+            pendant_tirage += e.ouverture_en_cours
+    assert pendant_tirage > 0
+
+
+def test_partie_rechargee_continue_a_l_identique():
+    e = etats_joues(2, 40)[-1]
+    f = charger(sauver(e))
+    for k in range(60):
+        if e.statut() is not None:
+            break
+        a = politique_gloutonne(e, random.Random(k))
+        assert politique_gloutonne(f, random.Random(k)) == a
+        assert e.step(a) == f.step(a)
+    assert empreinte(f) == empreinte(e)
+
+
+def test_fichier(tmp_path):
+    e = etats_joues(3, 30)[-1]
+    chemin = tmp_path / "partie.sav"
+    ecrire(e, str(chemin))
+    assert empreinte(lire(str(chemin))) == empreinte(e)
+
+
+@pytest.mark.parametrize("coupe", [0, 3, 10, 40, 0.5, -100, -1])
+def test_fichier_tronque(coupe):
+    data = sauver(etats_joues(1, 60)[-1])
+    n = int(len(data) * coupe) if isinstance(coupe, float) else coupe % len(data)
+    with pytest.raises(ValueError):
+        charger(data[:n])
+
+
+def test_octets_en_trop():
+    with pytest.raises(ValueError):
+        charger(sauver(GameState(0)) + b"\0")
+
+
+def test_mauvais_en_tete():
+    data = bytearray(sauver(GameState(0)))
+    data[:4] = b"XXXX"
+    with pytest.raises(ValueError, match="pas une sauvegarde"):
+        charger(bytes(data))
+
+
+def _debut_grille(e):
+    return (ENTETE.size + JOUEUR.size + INVENTAIRE.size
+            + sum(1 + len(nom.encode()) + 4 for nom in e.inv.autres_objets))
+
+
+def test_code_de_piece_inconnu():
+    e = GameState(0)
+    data = bytearray(sauver(e))
+    o = _debut_grille(e) + 3 * e.grille.n
+    struct.pack_into("<H", data, o, len(PIECES_MODELES) + 1)
+    with pytest.raises(ValueError, match="pièce"):
+        charger(bytes(data))
+
+
+def test_code_d_objet_inconnu():
+    e = next(e for e in etats_joues(1, 200) if any(e.grille.objets))
+    data = bytearray(sauver(e))
+    o = _debut_grille(e) + 5 * e.grille.n + 4 + 5      # premier objet au sol
+    data[o] = 200
+    with pytest.raises(ValueError, match="objet"):
+        charger(bytes(data))
+
+
+def test_ecriture_atomique(tmp_path, monkeypatch):
+    chemin = str(tmp_path / "partie.sav")
+    e = etats_joues(3, 30)[-1]
+    ecrire(e, chemin)
+
+    def echec(_):
+        raise OSError("disque plein")
+    monkeypatch.setattr(sauvegarde, "sauver", echec)
+    with pytest.raises(OSError):
+        ecrire(GameState(0), chemin)
+    assert os.listdir(tmp_path) == ["partie.sav"]
+    assert empreinte(lire(chemin)) == empreinte(e)
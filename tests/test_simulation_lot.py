@@ -0,0 +1,75 @@
+"""Simulation NumPy : mêmes règles de tirage que le moteur (pioche épuisée par partie)."""
+import numpy as np
+
+from moteur import EXEMPLAIRES, PIECES_MODELES, exemplaires_pour, poids_verrou_pour_ligne
+from simulation_lot import SimulationLot, BLOQUE
+
+
+def test_pioche_par_partie():
+    sim = SimulationLot(500, graine=2)
+    initiaux = sim.restants[0].copy()
+    assert list(initiaux) == [EXEMPLAIRES[r] for r in sim.cat.rarete]
+    assert (SimulationLot(1, largeur=8, hauteur=8).restants[0]
+            == [exemplaires_pour(64)[r] for r in sim.cat.rarete]).all()
+    sim.jouer()
+    posees = np.zeros_like(sim.restants)
+    for g in range(sim.n):
+        p = sim.occupee[g][sim.occupee[g] >= 0]
+        np.add.at(posees[g], p, 1)
+    assert (sim.restants >= 0).all()
+    assert (sim.restants + posees == initiaux).all()
+
+
+def test_cartes_tirees_dans_la_pioche():
+    sim = SimulationLot(2000, graine=3)
+    sim.restants[:, ::2] = 0              # la moitié des modèles épuisés
+    choix = sim.tirer_cartes(np.arange(sim.n))
+    assert (sim.restants[np.arange(sim.n)[:, None], choix] > 0).all()
+
+
+def test_pioche_vide_bloque():
+    sim = SimulationLot(100, graine=6)
+    sim.restants[::2] = 0                 # une partie sur deux sans pièce à tirer
+    cles = sim.cles.copy()
+    sim.tour()
+    assert (sim.statut[::2] == BLOQUE).all()
+    assert (sim.occupee[::2] < 0).all() and (sim.cles[::2] == cles[::2]).all()
+    assert (sim.statut[1::2] != BLOQUE).all()
+
+
+def test_gemmes_jamais_negatives():
+    sim = SimulationLot(2000, graine=4)
+    while sim.tour():
+        assert (sim.gemmes >= 0).all()
+
+
+def test_sans_carte_abordable_rien_n_est_pose():
+    payantes = [p for p in PIECES_MODELES if p.cout_gemmes > 0]
+    sim = SimulationLot(200, graine=5, pieces=payantes)
+    sim.gemmes[:] = 0
+    cles = sim.cles.copy()
+    for _ in range(5):
+        sim.tour()
+    assert (sim.occupee < 0).all()
+    assert (sim.gemmes == 0).all() and (sim.restants == sim.restants[0]).all()
+    assert (sim.cles <= cles).all()
+    assert (sim.pos == sim.pos[0]).all() and (sim.pas == SimulationLot(1).pas[0]).all()
+
+
+def test_verrous_selon_la_courbe_du_moteur():
+    W, H = 4, 16                          # 64 cases : courbe du 5x9 étirée sur 16 rangées
+    sim = SimulationLot(3000, graine=7, largeur=W, hauteur=H)
+    for y in range(H):
+        bits = np.array([y * W + x for x in range(W)], dtype=np.uint64)
+        v1 = (sim.v1[:, :, None] >> bits) & np.uint64(1)
+        v2 = (sim.v2[:, :, None] >> bits) & np.uint64(1)
+        assert not (v1 & v2).any()
+        niveaux = (v1 + 2 * v2).ravel()
+        cumul = poids_verrou_pour_ligne(y, H)
+        if isinstance(cumul, int):
+            assert (niveaux == cumul).all()
+            continue
+        n = len(niveaux)
+        for lvl, p in enumerate(np.diff(cumul, prepend=0) / cumul[2]):
+            k = (niveaux == lvl).sum()
+            assert abs(k - n * p) < 5 * np.sqrt(n * p * (1 - p)), (y, lvl, k, n * p)
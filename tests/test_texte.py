@@ -0,0 +1,44 @@
+"""Cache des surfaces de texte derrière texte()."""
+import pygame
+import pytest
+
+from jeu import CacheTexte, cache_texte, texte
+
+
+@pytest.fixture(autouse=True)
+def polices():
+    pygame.font.init()
+    yield
+
+
+def test_hits_et_misses():
+    c = CacheTexte(capacite=8)
+    a = c.rendu("Pas : 70", 24, (255, 255, 255))
+    assert c.rendu("Pas : 70", 24, [255, 255, 255]) is a          # couleur en liste : même clé
+    assert c.rendu("Pas : 70", 24, (255, 255, 255), antialias=False) is not a
+    c.rendu("Pas : 70", 30, (255, 255, 255))
+    assert c.stats() == {"hits": 1, "misses": 3, "evictions": 0, "taille": 3}
+
+
+def test_eviction_lru():
+    c = CacheTexte(capacite=3)
+    for t in "abc":
+        c.rendu(t, 20, (0, 0, 0))
+    c.rendu("a", 20, (0, 0, 0))            # « a » redevient récent
+    c.rendu("d", 20, (0, 0, 0))            # « b » est évincé
+    assert c.evictions == 1 and c.stats()["taille"] == 3
+    misses = c.misses
+    c.rendu("a", 20, (0, 0, 0))
+    c.rendu("c", 20, (0, 0, 0))
+    assert c.misses == misses
+    c.rendu("b", 20, (0, 0, 0))
+    assert c.misses == misses + 1
+
+
+def test_texte_passe_par_le_cache():
+    surf = pygame.Surface((200, 50))
+    avant = cache_texte.stats()
+    texte(surf, "Bonjour", (100, 25), 24, centre=True)
+    texte(surf, "Bonjour", (10, 10), 24)
+    assert cache_texte.hits == avant["hits"] + 1
+    assert cache_texte.misses <= avant["misses"] + 1
@@ -0,0 +1,30 @@
+"""Voiles translucides : une seule allocation par (taille, alpha), puis réutilisation."""
+import pygame
+
+from jeu import CompositeurVoiles, SceneJeu, LARGEUR, HAUTEUR, voiles
+
+
+def test_voile_reutilise():
+    comp = CompositeurVoiles()
+    ecran = pygame.Surface((64, 32))
+    for _ in range(10):
+        comp.assombrir(ecran, 180)
+    assert comp.allocations == 1
+    assert comp.octets_alloues == 64 * 32 * 4
+    comp.assombrir(ecran, 160)
+    assert comp.allocations == 2
+
+
+def test_allocations_stables_entre_frames():
+    pygame.font.init()
+    ecran = pygame.Surface((LARGEUR, HAUTEUR))
+    scene = SceneJeu()
+    scene.jouer(("ok",))            # porte N de l'entrée : tirage ouvert
+    assert scene.etat.ouverture_en_cours
+    scene.tirage.ouvrir()
+    scene.tirage.dessiner(ecran)
+    avant = voiles.allocations
+    for _ in range(20):
+        scene.tirage.dessiner(ecran)
+        scene.dessiner(ecran)
+    assert voiles.allocations == avant
@@ -0,0 +1,88 @@
+"""Voyage rapide : le cache de distances reste un plus court chemin par des portes ouvertes."""
+import random
+from collections import deque
+
+from moteur import GameState, CacheDistances
+from monte_carlo import politique_aleatoire
+
+
+def bfs(g, source):
+    """Distances recalculées de zéro, en ne passant que par des cases reliées des deux côtés."""
+    dist = {source: 0}
+    file = deque([source])
+    while file:
+        i = file.popleft()
+        for d in g.voisins[i]:
+            j = g.relie(i, d)
+            if j >= 0 and j not in dist:
+                assert g.pieces[j] is not None and g.a_porte(j, {"N": "S", "S": "N", "E": "W", "W": "E"}[d])
+                dist[j] = dist[i] + 1
+                file.append(j)
+    return dist
+
+
+def verifier_cache(e):
+    g = e.grille
+    for source in list(e.distances._sources):
+        assert e.distances.distances(source) == bfs(g, source)
+
+
+def jouer(e, rng, n=300):
+    for _ in range(n):
+        a = politique_aleatoire(e, rng) if e.statut() is None else None
+        if a is None:
+            return
+        yield a
+
+
+def test_cache_apres_pieces_posees():
+    for graine in range(6):
+        e = GameState(graine)
+        rng = random.Random(graine)
+        copie = None
+        for a in jouer(e, rng):
+            e.step(a)
+            if not e.ouverture_en_cours:
+                e.distance_vers(rng.randrange(e.grille.largeur), rng.randrange(e.grille.hauteur))
+            verifier_cache(e)
+            if copie is None and e.pas_utilises > 10:
+                copie = e.copie()
+        if copie is not None:
+            # une copie partage les cartes : les deux parties restent justes
+            for a in jouer(copie, random.Random(-graine)):
+                copie.step(a)
+                verifier_cache(copie)
+            verifier_cache(e)
+
+
+def test_voyage_paye_le_plus_court_chemin():
+    e = GameState(3)
+    rng = random.Random(3)
+    while e.pas_utilises < 25 and e.statut() is None:
+        e.step(politique_aleatoire(e, rng))
+    if e.ouverture_en_cours:
+        e.step(("choisir", 0))
+    depart = e.ici()
+    dist = bfs(e.grille, depart)
+    cible = max(dist, key=dist.get)
+    utilises = e.pas_utilises
+    x, y = e.grille.xy(cible)
+    e.step(("voyager", x, y))
+    assert e.ici() == cible and e.pas_utilises == utilises + dist[cible]
+
+
+def test_voyage_refuse_pendant_un_tirage():
+    e = GameState(0)
+    e.step(("ouvrir", "N"))
+    e.step(("choisir", 0))
+    e.step(("ouvrir", "E"))
+    assert e.ouverture_en_cours
+    e.voyager(2, 8)
+    assert (e.x, e.y) == (2, 7)
+
+
+def test_cache_vide_ne_calcule_rien():
+    e = GameState(1)
+    assert isinstance(e.distances, CacheDistances) and e.distances.bfs == 0
+    assert e.distance_vers(e.x, e.y) == 0
+    assert e.distance_vers(-1, 0) is None